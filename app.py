@@ -0,0 +1,393 @@
+"""
+Telephony server: runs one conversation per Exotel call, many calls at a time.
+
+Exotel's Voicebot applet streams each call's audio to this websocket server (see
+exotel_client.py). Every call gets a CallSession in the SessionRegistry, keyed by call
+SID, with its own ConversationManager, capture buffer and voice activity detector, so
+calls never share audio state. The event loop only moves audio and runs endpointing;
+the blocking Sarvam calls (STT, LLM validation, translation, TTS) run on a bounded
+worker pool shared by all calls.
+
+    python app.py --port 8765
+
+GET /stats on the same port returns the session statistics as JSON, and GET /metrics the
+per-stage latency histograms (see tracing.py) and the latency budget's hedge, fallback and
+circuit breaker counters (see latency_budget.py) in the Prometheus text format.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+
+import numpy as np
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+import config # Loads .env before the settings below are read
+import http_client
+import latency_budget
+from audio_capture import CaptureBuffer
+from audio_encoding import downsample, resample_pcm
+from conversation_manager import ConversationManager
+from exotel_client import StreamStart, decode_media, mark_message, media_messages, parse_event, parse_start
+from stt import create_vad, transcribe_samples
+from submission_store import get_submission_store, migrate_legacy_db
+from tts import synthesize_pcm
+import tracing
+
+# --- Configuration ---
+SERVER_HOST = os.getenv("VOICEBOT_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("VOICEBOT_PORT", "8765"))
+MAX_CONCURRENT_CALLS = int(os.getenv("VOICEBOT_MAX_CALLS", "100"))
+WORKER_POOL_SIZE = int(os.getenv("VOICEBOT_WORKERS", "16")) # Threads for blocking Sarvam calls, shared by all calls
+IDLE_TIMEOUT_SECONDS = 60.0 # A call whose stream sends nothing for this long is hung up
+IDLE_CHECK_SECONDS = 5.0
+CALL_MAX_UTTERANCE_SECONDS = 15.0
+PLAYBACK_TIMEOUT_SECONDS = 30.0 # Longest wait for Exotel to confirm a prompt finished playing
+
+
+def transcribe_call_audio(samples, sample_rate: int, call_sid: str) -> str | None:
+    """Transcribes one caller utterance, already cut by the VAD; returns None if nothing usable came back."""
+    response = transcribe_samples(samples, sample_rate, trim=False)
+    return response.transcript if response else None
+
+
+class CallSession:
+    """Everything that belongs to one call."""
+    def __init__(self, start: StreamStart, websocket, conversation: ConversationManager):
+        self.call_sid = start.call_sid
+        self.stream_sid = start.stream_sid
+        self.sample_rate = start.sample_rate
+        self.websocket = websocket
+        self.conversation = conversation
+        self.voice_detector = create_vad(start.sample_rate)
+        self.capture = CaptureBuffer(start.sample_rate, CALL_MAX_UTTERANCE_SECONDS, self.voice_detector.lookback_samples)
+        self.listening = False # Off while a prompt plays or an answer is being processed
+        self.is_speaking = False
+        self.started_at = self.last_activity = time.monotonic()
+        self.turns = 0
+        self.ended = False
+        self.tasks = set()
+        self.pending_marks = {} # mark name -> future resolved when Exotel reports it played
+        self._marks_sent = 0
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def next_mark_name(self) -> str:
+        self._marks_sent += 1
+        return f"{self.call_sid}-{self._marks_sent}"
+
+    def memory_bytes(self) -> int:
+        """Audio buffers held by this call (the dominant per-call allocation)."""
+        return self.capture.nbytes
+
+
+class SessionRegistry:
+    """
+    Active calls by call SID, with counters for capacity planning.
+    Only touched from the event loop thread, so it needs no lock.
+    """
+    def __init__(self, max_sessions: int = MAX_CONCURRENT_CALLS):
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self.max_concurrent = 0
+        self.total_calls = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.peak_memory_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, call_sid: str) -> CallSession | None:
+        return self._sessions.get(call_sid)
+
+    def add(self, session: CallSession):
+        self._sessions[session.call_sid] = session
+        self.total_calls += 1
+        self.max_concurrent = max(self.max_concurrent, len(self._sessions))
+        self.peak_memory_bytes = max(self.peak_memory_bytes, sum(s.memory_bytes() for s in self._sessions.values()))
+
+    def remove(self, session: CallSession):
+        # A reconnect may already have replaced the entry with a newer session for the same call
+        if self._sessions.get(session.call_sid) is session:
+            del self._sessions[session.call_sid]
+
+    def idle(self, timeout: float) -> list:
+        cutoff = time.monotonic() - timeout
+        return [session for session in self._sessions.values() if session.last_activity < cutoff]
+
+    def stats(self) -> dict:
+        sessions = list(self._sessions.values())
+        return {
+            "active": len(sessions),
+            "max_concurrent": self.max_concurrent,
+            "capacity": self.max_sessions,
+            "total_calls": self.total_calls,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "memory_bytes": sum(s.memory_bytes() for s in sessions),
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "memory_per_call_bytes": self.peak_memory_bytes // self.max_concurrent if self.max_concurrent else 0,
+        }
+
+
+class CallServer:
+    """
+    Websocket server for Exotel call streams. The blocking functions are injectable so the
+    load test can run against local stand-ins:
+      transcribe_fn(int16 samples, sample_rate, call_sid) -> transcript or None
+      synthesize_fn(text, language_code, sample_rate) -> (pcm bytes, sample rate) or None
+      conversation_factory() -> ConversationManager
+    """
+    def __init__(self, transcribe_fn=transcribe_call_audio, synthesize_fn=synthesize_pcm,
+                 conversation_factory=ConversationManager, max_calls: int = MAX_CONCURRENT_CALLS,
+                 workers: int = WORKER_POOL_SIZE, idle_timeout: float = IDLE_TIMEOUT_SECONDS):
+        self.transcribe_fn = transcribe_fn
+        self.synthesize_fn = synthesize_fn
+        self.conversation_factory = conversation_factory
+        self.idle_timeout = idle_timeout
+        self.registry = SessionRegistry(max_calls)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sarvam-worker")
+        self._starting = 0
+
+    def stats(self) -> dict:
+        return {**self.registry.stats(), "workers": self.workers, "queued_jobs": self.pool._work_queue.qsize(),
+                "latency_budget": latency_budget.budget_report.report()}
+
+    async def run_blocking(self, fn, *args):
+        # Carry the caller's trace tags (call SID, step) over to the worker thread
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.pool, context.run, fn, *args)
+
+    async def start(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        """Starts listening and the idle-eviction task; returns the websockets server."""
+        self._server = await serve(self.handle_call, host, port, process_request=self._process_request, max_size=None)
+        self._evictor = asyncio.create_task(self._evict_idle_calls())
+        print(f"[INFO] Call server listening on {host}:{self.port} "
+              f"(max {self.registry.max_sessions} calls, {self.workers} workers).")
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._evictor.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _process_request(self, connection, request):
+        if request.path == "/stats":
+            return connection.respond(HTTPStatus.OK, json.dumps(self.stats()) + "\n")
+        if request.path == "/metrics":
+            return connection.respond(HTTPStatus.OK, tracing.prometheus_text() + latency_budget.budget_report.prometheus_text())
+        return None # Anything else is a call stream
+
+    async def handle_call(self, websocket):
+        """Runs one call stream from "connected" to "stop" or hangup."""
+        session = None
+        try:
+            async for raw_message in websocket:
+                message = parse_event(raw_message)
+                event = message.get("event")
+                if session:
+                    session.touch()
+                if event == "start" and session is None:
+                    session = await self._start_call(websocket, parse_start(message))
+                    if session is None:
+                        return
+                elif session is None:
+                    continue # "connected", or anything before the stream started
+                elif event == "media":
+                    self._on_media(session, decode_media(message))
+                elif event == "mark":
+                    future = session.pending_marks.pop(message.get("mark", {}).get("name"), None)
+                    if future and not future.done():
+                        future.set_result(None)
+                elif event == "stop":
+                    break
+        except ConnectionClosed:
+            pass
+        finally:
+            if session:
+                self._end_call(session)
+
+    async def _start_call(self, websocket, start: StreamStart) -> CallSession | None:
+        if len(self.registry) + self._starting >= self.registry.max_sessions:
+            self.registry.rejected += 1
+            print(f"[WARNING] Rejecting call {start.call_sid}: {len(self.registry)} calls already active.")
+            await websocket.close(code=1013, reason="Server busy")
+            return None
+        start.call_sid = start.call_sid or str(uuid.uuid4())
+        previous = self.registry.get(start.call_sid)
+        if previous:
+            print(f"[WARNING] Call {start.call_sid} reconnected; dropping its previous stream.")
+            self._end_call(previous)
+            await previous.websocket.close()
+
+        self._starting += 1 # Holds the slot while the conversation is set up
+        try:
+            conversation = await self.run_blocking(self.conversation_factory)
+        finally:
+            self._starting -= 1
+        conversation.session_id = start.call_sid
+        session = CallSession(start, websocket, conversation)
+        self.registry.add(session)
+        print(f"[INFO] Call {session.call_sid} started ({session.sample_rate} Hz). Active calls: {len(self.registry)}")
+        self._spawn(session, self._greet(session))
+        return session
+
+    def _end_call(self, session: CallSession):
+        if session.ended:
+            return
+        session.ended = True
+        for task in session.tasks:
+            task.cancel()
+        for future in session.pending_marks.values():
+            future.cancel()
+        self.registry.remove(session)
+        session.conversation.close()
+        print(f"[INFO] Call {session.call_sid} ended after {time.monotonic() - session.started_at:.1f}s, "
+              f"{session.turns} turns. Active calls: {len(self.registry)} (max {self.registry.max_concurrent})")
+
+    def _spawn(self, session: CallSession, coroutine):
+        task = asyncio.create_task(coroutine)
+        session.tasks.add(task)
+        task.add_done_callback(session.tasks.discard)
+
+    async def _greet(self, session: CallSession):
+        with session.conversation.trace_context():
+            await self._speak(session, session.conversation.start_conversation())
+        self._listen(session)
+
+    def _listen(self, session: CallSession):
+        session.capture.reset()
+        session.voice_detector.reset()
+        session.is_speaking = False
+        session.listening = True
+
+    def _on_media(self, session: CallSession, pcm: bytes):
+        if not session.listening:
+            return
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        session.capture.write(samples)
+        for event in session.voice_detector.process(samples):
+            if event.kind == "speech_start" and not session.is_speaking:
+                session.is_speaking = True
+                session.capture.start_utterance(event.sample)
+            elif event.kind == "speech_end" and session.is_speaking:
+                endpoint_delay = (event.detected_at - event.sample + session.voice_detector.hangover_samples) / session.sample_rate
+                with session.conversation.trace_context():
+                    tracing.record("vad_endpoint", endpoint_delay)
+                self._end_utterance(session, event.sample)
+                return
+        if session.capture.is_full:
+            self._end_utterance(session)
+
+    def _end_utterance(self, session: CallSession, sample: int | None = None):
+        session.listening = False
+        session.capture.end_utterance(sample)
+        self._spawn(session, self._answer(session))
+
+    async def _answer(self, session: CallSession):
+        """Transcribes the caller's utterance, advances the conversation and speaks the reply."""
+        conversation = session.conversation
+        try:
+            with conversation.trace_context():
+                # A copy: the capture buffer is reused once the caller is listened to again
+                samples = session.capture.utterance_samples().copy()
+                transcript = await self.run_blocking(self.transcribe_fn, samples, session.sample_rate, session.call_sid)
+            if transcript:
+                print(f"[INFO] Call {session.call_sid} >> {transcript}")
+                reply = await self.run_blocking(conversation.process_user_response, transcript)
+                session.turns += 1
+                with conversation.trace_context():
+                    await self._speak(session, reply)
+                if conversation.is_complete:
+                    await session.websocket.close() # Hangs up; Exotel moves on to the next applet
+                    return
+            else:
+                print(f"[WARNING] Call {session.call_sid}: STT returned no result. Listening again.")
+        except (asyncio.CancelledError, ConnectionClosed):
+            raise
+        except Exception as e:
+            print(f"[ERROR] Call {session.call_sid}: could not process the turn: {e}")
+        self._listen(session)
+
+    def _prompt_audio(self, session: CallSession, text: str):
+        """Bundled audio for fixed prompts, synthesized audio otherwise, at the call's sample rate."""
+        language_code = session.conversation.user_language_code
+        bundle = session.conversation.prompt_bundle
+        audio = bundle.find_audio(language_code, text) if bundle else None
+        if audio is None:
+            audio = self.synthesize_fn(text, language_code, session.sample_rate)
+        if audio is None:
+            return None
+        pcm, sample_rate = audio
+        if sample_rate > session.sample_rate: # e.g. 22.05 kHz bundled prompts on an 8 kHz call, filtered against aliasing
+            return downsample(np.frombuffer(pcm, dtype=np.int16), sample_rate, session.sample_rate).tobytes()
+        return resample_pcm(pcm, sample_rate, session.sample_rate)
+
+    async def _speak(self, session: CallSession, text: str):
+        """Sends a prompt's audio and waits until Exotel reports it has been played."""
+        pcm = await self.run_blocking(self._prompt_audio, session, text)
+        if not pcm:
+            print(f"[ERROR] Call {session.call_sid}: no audio for prompt '{text}'.")
+            return
+        for message in media_messages(session.stream_sid, pcm, session.sample_rate):
+            await session.websocket.send(message)
+        mark = session.next_mark_name()
+        played = asyncio.get_running_loop().create_future()
+        session.pending_marks[mark] = played
+        await session.websocket.send(mark_message(session.stream_sid, mark))
+        try:
+            await asyncio.wait_for(played, PLAYBACK_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            session.pending_marks.pop(mark, None)
+            print(f"[WARNING] Call {session.call_sid}: no playback confirmation, listening anyway.")
+
+    async def _evict_idle_calls(self):
+        while True:
+            await asyncio.sleep(IDLE_CHECK_SECONDS)
+            for session in self.registry.idle(self.idle_timeout):
+                print(f"[WARNING] Call {session.call_sid} idle for {self.idle_timeout:.0f}s, hanging up.")
+                self.registry.evicted += 1
+                self._end_call(session)
+                await session.websocket.close(code=1000, reason="Idle timeout")
+
+
+async def serve_calls(host: str, port: int, max_calls: int, workers: int, multi_slot: bool = False):
+    http_client.start_warm_up() # The SDK and connections are ready by the time the first call connects
+    migrate_legacy_db(get_submission_store()) # Imports an old db.json, once
+    server = CallServer(conversation_factory=partial(ConversationManager, multi_slot=multi_slot),
+                        max_calls=max_calls, workers=workers)
+    await server.start(host, port)
+    try:
+        await asyncio.Future() # Run until cancelled
+    finally:
+        print(f"[INFO] Session stats: {server.stats()}")
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sarvam AI voice assistant for Exotel calls.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-calls", type=int, default=MAX_CONCURRENT_CALLS)
+    parser.add_argument("--workers", type=int, default=WORKER_POOL_SIZE)
+    parser.add_argument("--multi-slot", action="store_true", help="Fill every field a caller mentions in one answer.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_calls(args.host, args.port, args.max_calls, args.workers, args.multi_slot))
+    except KeyboardInterrupt:
+        print("\n[INFO] Exiting program.")
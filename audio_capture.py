@@ -0,0 +1,123 @@
+import io
+import struct
+import threading
+
+import numpy as np
+
+# --- Configuration ---
+MAX_UTTERANCE_SECONDS = 30.0  # Longest utterance kept; the REST STT API accepts up to 30 s
+WAV_HEADER_SIZE = 44
+
+_sounddevice = None
+_sounddevice_lock = threading.Lock()
+
+
+def get_sounddevice():
+    """
+    Returns the sounddevice module, loading it (and PortAudio) on first use. Only microphone
+    and speaker sessions need it; the telephony server never does.
+    """
+    global _sounddevice
+    with _sounddevice_lock:
+        if _sounddevice is None:
+            import sounddevice
+            _sounddevice = sounddevice
+    return _sounddevice
+
+
+class CaptureBuffer:
+    """
+    Preallocated audio buffer for one listening session (16-bit mono).
+
+    While waiting for speech it acts as a ring buffer, so the pre-roll before the detected
+    start is still available. Once an utterance starts, its first samples are moved to the
+    front and the rest is written linearly, so the finished utterance is one contiguous
+    block. Room for a WAV header is reserved in front of the samples, which lets wav_view()
+    return a complete WAV file as a memoryview without copying the audio.
+
+    Sample positions are absolute stream indices, as reported by the VAD. Pass the VAD's
+    lookback_samples so the ring never holds less than the onset plus the pre-roll.
+    """
+    def __init__(self, sample_rate: int = 16000, max_utterance_seconds: float = MAX_UTTERANCE_SECONDS,
+                 lookback_samples: int = 0):
+        self.sample_rate = sample_rate
+        self.capacity = max(int(max_utterance_seconds * sample_rate), lookback_samples)
+        self._raw = bytearray(WAV_HEADER_SIZE + 2 * self.capacity)
+        self._samples = np.frombuffer(self._raw, dtype=np.int16, offset=WAV_HEADER_SIZE)
+        self.reset()
+
+    def reset(self):
+        self.samples_written = 0 # Absolute index of the next sample
+        self.utterance_start = None # Absolute index of samples[0] while recording an utterance
+        self.utterance_end = None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the preallocated buffer."""
+        return len(self._raw)
+
+    @property
+    def is_recording(self) -> bool:
+        return self.utterance_start is not None and self.utterance_end is None
+
+    @property
+    def is_full(self) -> bool:
+        return self.is_recording and self.samples_written - self.utterance_start >= self.capacity
+
+    def write(self, block: np.ndarray):
+        """Appends a block of int16 samples from the audio callback."""
+        block = np.asarray(block, dtype=np.int16).reshape(-1)
+        if self.is_recording:
+            position = self.samples_written - self.utterance_start
+            room = self.capacity - position
+            if room <= 0:
+                return
+            block = block[:room]
+            self._samples[position:position + block.size] = block
+        else:
+            # Ring mode: keep only the most recent `capacity` samples
+            block = block[-self.capacity:]
+            position = self.samples_written % self.capacity
+            first = min(block.size, self.capacity - position)
+            self._samples[position:position + first] = block[:first]
+            self._samples[:block.size - first] = block[first:]
+        self.samples_written += block.size
+
+    def start_utterance(self, sample: int):
+        """Starts the utterance at an absolute sample index, keeping what was captured since."""
+        oldest = max(0, self.samples_written - self.capacity)
+        sample = min(max(sample, oldest), self.samples_written)
+        length = self.samples_written - sample
+        # Move the pre-roll (and anything captured after it) to the front of the buffer
+        ring_positions = np.arange(sample, self.samples_written) % self.capacity
+        self._samples[:length] = self._samples[ring_positions]
+        self.utterance_start = sample
+        self.utterance_end = None
+
+    def end_utterance(self, sample: int | None = None):
+        """Ends the utterance at an absolute sample index (default: everything captured so far)."""
+        end = self.samples_written if sample is None else sample
+        self.utterance_end = min(max(end, self.utterance_start), self.utterance_start + self.capacity, self.samples_written)
+
+    def utterance_samples(self) -> np.ndarray:
+        """The current or finished utterance as an int16 array view (no copy)."""
+        if self.utterance_start is None:
+            return self._samples[:0]
+        end = self.utterance_end if self.utterance_end is not None else min(self.samples_written, self.utterance_start + self.capacity)
+        return self._samples[:end - self.utterance_start]
+
+    def wav_view(self) -> memoryview:
+        """The utterance as a complete WAV file, as a memoryview over the buffer (no copy)."""
+        data_size = 2 * len(self.utterance_samples())
+        struct.pack_into(
+            "<4sI4s4sIHHIIHH4sI", self._raw, 0,
+            b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+            self.sample_rate, self.sample_rate * 2, 2, 16, b"data", data_size,
+        )
+        return memoryview(self._raw)[:WAV_HEADER_SIZE + data_size]
+
+    def wav_file(self, name: str = "utterance.wav") -> io.BytesIO:
+        """The utterance as an in-memory WAV file object, ready to upload."""
+        wav = io.BytesIO(self.wav_view())
+        wav.name = name
+        return wav
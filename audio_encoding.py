@@ -0,0 +1,158 @@
+"""
+Encoding stage between audio capture and the speech-to-text upload.
+
+Raw 16-bit WAV costs 32 KB per second of speech at 16 kHz, and on a congested uplink the
+upload is a visible part of STT latency. encode_for_stt() shrinks an utterance in memory:
+
+1. trims leading and trailing silence with the same VAD used for endpointing (for audio
+   whose bounds did not already come from the VAD, such as recorded files),
+2. downsamples to at most STT_UPLOAD_SAMPLE_RATE, with a low-pass filter first,
+3. encodes to STT_UPLOAD_CODEC: "flac" (lossless, about half the size), "opus" (lossy
+   speech codec, a tenth or less) or "wav".
+
+FLAC and Opus need the optional soundfile package (libsndfile); without it, or if the API
+rejects the format, uploads fall back to WAV.
+"""
+import io
+import os
+import threading
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+import config # Loads .env before the settings below are read
+from vad import AdaptiveVAD, speech_bounds
+
+# --- Configuration ---
+STT_UPLOAD_CODEC = os.getenv("SARVAM_STT_CODEC", "flac").lower() # "flac", "opus" or "wav"
+STT_UPLOAD_SAMPLE_RATE = int(os.getenv("SARVAM_STT_SAMPLE_RATE", "16000")) # Upper bound; audio is never upsampled
+STT_TRIM_SILENCE = os.getenv("SARVAM_STT_TRIM", "1") != "0"
+CODECS = ("wav", "flac", "opus")
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000) # The only rates Opus encodes
+LOW_PASS_TAPS = 31
+# (libsndfile format, subtype, file extension) per compressed codec
+SOUNDFILE_FORMATS = {"flac": ("FLAC", "PCM_16", "flac"), "opus": ("OGG", "OPUS", "ogg")}
+
+_soundfile = None
+_soundfile_missing = False
+_lock = threading.Lock()
+
+
+@dataclass
+class EncodedUpload:
+    """An utterance ready to upload, with the numbers needed to log what encoding saved."""
+    file: io.BytesIO
+    codec: str
+    sample_rate: int
+    nbytes: int
+    wav_bytes: int # Size of the same utterance as the untrimmed 16-bit WAV it was captured as
+    seconds: float
+    trimmed_seconds: float
+
+    def describe(self) -> str:
+        saved = 1 - self.nbytes / self.wav_bytes if self.wav_bytes else 0.0
+        return (f"{self.nbytes / 1024:.1f} KB {self.codec} at {self.sample_rate} Hz for {self.seconds:.2f}s of audio "
+                f"({self.trimmed_seconds:.2f}s of silence trimmed, {saved:.0%} smaller than {self.wav_bytes / 1024:.1f} KB WAV)")
+
+
+def _get_soundfile():
+    """Returns the soundfile module, or None (warning once) if it is not installed."""
+    global _soundfile, _soundfile_missing
+    with _lock:
+        if _soundfile is None and not _soundfile_missing:
+            try:
+                import soundfile
+                _soundfile = soundfile
+            except (ImportError, OSError) as e:
+                _soundfile_missing = True
+                print(f"[WARNING] soundfile is not available ({e}); STT uploads fall back to WAV.")
+    return _soundfile
+
+
+def resample_pcm(pcm, from_rate: int, to_rate: int) -> bytes:
+    """Linear-interpolation resampling of 16-bit mono PCM, with no filtering; use downsample() to lower the rate."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if from_rate == to_rate or samples.size == 0:
+        return bytes(pcm)
+    positions = np.arange(int(samples.size * to_rate / from_rate)) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.int16).tobytes()
+
+
+def downsample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Low-pass filters below the new Nyquist frequency, then resamples; keeps speech free of aliasing."""
+    if to_rate >= from_rate or samples.size == 0:
+        return samples
+    cutoff = 0.9 * to_rate / from_rate # Of the old Nyquist frequency, leaving room for the filter's roll-off
+    taps = np.arange(LOW_PASS_TAPS) - (LOW_PASS_TAPS - 1) / 2
+    kernel = cutoff * np.sinc(cutoff * taps) * np.hamming(LOW_PASS_TAPS)
+    filtered = np.convolve(samples.astype(np.float32), kernel / kernel.sum(), mode="same")
+    filtered = np.clip(np.round(filtered), -32768, 32767).astype(np.int16)
+    return np.frombuffer(resample_pcm(filtered.tobytes(), from_rate, to_rate), dtype=np.int16)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Drops audio before the first and after the last speech the VAD finds (pre-roll and hangover kept)."""
+    bounds = speech_bounds(AdaptiveVAD(sample_rate), samples)
+    if bounds is None:
+        return samples # Nothing detected: let the STT model decide rather than upload nothing
+    start, end = bounds
+    return samples[start:end]
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def _upload_rate(codec: str, sample_rate: int, max_sample_rate: int) -> int:
+    rate = min(sample_rate, max_sample_rate)
+    if codec == "opus" and rate not in OPUS_SAMPLE_RATES:
+        rate = max([r for r in OPUS_SAMPLE_RATES if r <= rate] or [OPUS_SAMPLE_RATES[0]])
+    return rate
+
+
+def encode_for_stt(samples: np.ndarray, sample_rate: int, codec: str = STT_UPLOAD_CODEC,
+                   max_sample_rate: int = STT_UPLOAD_SAMPLE_RATE, trim: bool = STT_TRIM_SILENCE) -> EncodedUpload:
+    """Trims, downsamples and encodes an int16 mono utterance in memory (see the module docstring)."""
+    samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+    wav_bytes = 44 + 2 * samples.size
+    trimmed = trim_silence(samples, sample_rate) if trim else samples
+    trimmed_seconds = (samples.size - trimmed.size) / sample_rate
+
+    if codec not in CODECS:
+        print(f"[WARNING] Unknown STT upload codec '{codec}', using WAV.")
+        codec = "wav"
+    soundfile = _get_soundfile() if codec != "wav" else None
+    if soundfile is None:
+        codec = "wav"
+    rate = _upload_rate(codec, sample_rate, max_sample_rate)
+    audio = downsample(trimmed, sample_rate, rate)
+
+    if codec == "wav":
+        data, extension = encode_wav(audio, rate), "wav"
+    else:
+        file_format, subtype, extension = SOUNDFILE_FORMATS[codec]
+        buffer = io.BytesIO()
+        soundfile.write(buffer, audio, rate, format=file_format, subtype=subtype)
+        data = buffer.getvalue()
+
+    upload = io.BytesIO(data)
+    upload.name = f"utterance.{extension}" # The SDK sends the file name, and with it the format
+    return EncodedUpload(upload, codec, rate, len(data), wav_bytes, audio.size / rate, trimmed_seconds)
+
+
+def read_wav(file) -> tuple | None:
+    """Reads a 16-bit mono WAV file (path or file object) as (int16 samples, sample rate); None for other formats."""
+    try:
+        with wave.open(file, "rb") as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                return None
+            return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16), wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
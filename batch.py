@@ -0,0 +1,259 @@
+"""
+Batch mode: transcribes and validates recorded answers offline, e.g. to re-check stored
+answers after a validation prompt changes, or to audit collected data.
+
+    python batch.py recordings/ --out results.jsonl --workers 8 --rate 5
+    python batch.py --manifest answers.jsonl --out results.jsonl
+
+Input is a directory of WAV files or a JSONL manifest. In a directory, an answer's step
+comes from its folder or file name (recordings/askAge/0001.wav, askAge_0001.wav) or from
+--step; without one, the file is only transcribed. A manifest line looks like
+
+    {"id": "call42-age", "audio": "call42/age.wav", "step": "askAge", "language": "hi-IN",
+     "context": {"pincode": 560001}}
+
+where "audio" is relative to the manifest, "context" holds earlier answers (the city is
+checked against the pincode), and a "transcript" skips speech-to-text.
+
+Utterances run on a bounded worker pool, started at most --rate per second. Every result
+is appended to --out as one JSON line as soon as it is done, so an interrupted run picks
+up where it stopped: ids already in the file are skipped, unless their line has an error
+or validation fell back to local rules. The last line for an id wins.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator
+
+from audio_encoding import read_wav
+from conversation_manager import ConversationManager
+import latency_budget
+from stt import transcribe_audio, transcribe_samples
+
+# --- Configuration ---
+WORKERS = 8
+RATE_PER_SECOND = 10.0 # Utterances started per second, across workers; 0 is unlimited
+PROGRESS_SECONDS = 10.0 # How often throughput is printed
+
+
+class RateLimiter:
+    """Token bucket shared by the workers: at most `rate` acquisitions per second, in bursts of `burst`."""
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+def _step_from_path(path: str, flow_order: list) -> str | None:
+    """The flow step a recording answers, from its folder (askAge/0001.wav) or name (askAge_0001.wav)."""
+    folder = os.path.basename(os.path.dirname(path))
+    if folder in flow_order:
+        return folder
+    name = os.path.splitext(os.path.basename(path))[0]
+    for separator in ("_", "-", "."):
+        prefix = name.split(separator, 1)[0]
+        if prefix in flow_order:
+            return prefix
+    return None
+
+
+def scan_directory(directory: str, flow_order: list, step: str | None = None, language: str | None = None) -> Iterator[dict]:
+    """Yields one item per WAV file under `directory`, in sorted order."""
+    for root, folders, files in os.walk(directory):
+        folders.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(".wav"):
+                continue
+            path = os.path.join(root, name)
+            item = {"id": os.path.relpath(path, directory), "audio": path,
+                    "step": step or _step_from_path(path, flow_order)}
+            if language:
+                item["language"] = language
+            yield item
+
+
+def read_manifest(manifest_path: str, step: str | None = None, language: str | None = None) -> Iterator[dict]:
+    """Yields the items of a JSONL manifest; relative audio paths are resolved against its folder."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get("audio"):
+                item["audio"] = os.path.join(base, item["audio"])
+            elif not item.get("transcript"):
+                print(f"[WARNING] Manifest line {line_number} has neither audio nor a transcript, skipped.")
+                continue
+            item.setdefault("id", item.get("audio") or f"line-{line_number}")
+            if step:
+                item.setdefault("step", step)
+            if language:
+                item.setdefault("language", language)
+            yield item
+
+
+def completed_ids(out_path: str) -> set:
+    """Ids whose last line in `out_path` needs no retry: no error and no fallback validation."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue # A line cut short when the last run was killed
+            if record.get("error") or record.get("fallback"):
+                done.discard(record.get("id"))
+            else:
+                done.add(record.get("id"))
+    return done
+
+
+class BatchProcessor:
+    """Runs items through STT and step validation, one ConversationManager per worker thread."""
+    def __init__(self, flow_script_path: str = "conversation_flow.json"):
+        self.flow_script_path = flow_script_path
+        self._local = threading.local()
+
+    def _conversation(self) -> ConversationManager:
+        conversation = getattr(self._local, "conversation", None)
+        if conversation is None:
+            conversation = self._local.conversation = ConversationManager(self.flow_script_path)
+        return conversation
+
+    def process(self, item: dict) -> dict:
+        result = {"id": item["id"], "audio": item.get("audio"), "step": item.get("step"), "language": item.get("language")}
+        transcript = item.get("transcript")
+        if not transcript:
+            started = time.perf_counter()
+            try:
+                with open(item["audio"], 'rb') as wav_file:
+                    wav = read_wav(wav_file)
+                    if wav is None: # Not 16-bit mono PCM: upload the file as it is
+                        wav_file.seek(0)
+                        response = transcribe_audio(wav_file)
+                if wav is not None: # Silence trimmed and compressed like live audio
+                    response = transcribe_samples(*wav)
+            except OSError as e:
+                return {**result, "error": f"could not read audio: {e}"}
+            result["stt_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if response is None:
+                return {**result, "error": "transcription failed"}
+            transcript = response.transcript
+        result["transcript"] = transcript
+
+        step = item.get("step")
+        if not step:
+            return result
+        conversation = self._conversation()
+        if step not in conversation.flow_order:
+            return {**result, "error": f"unknown step '{step}'"}
+        conversation.user_data = dict(item.get("context") or {})
+        conversation.user_language_code = item.get("language") or "en-IN"
+        started = time.perf_counter()
+        is_valid, value, reprompt = conversation._validate_and_normalize(transcript, step)
+        result.update(valid=is_valid, value=value, reprompt=reprompt,
+                      validate_ms=round((time.perf_counter() - started) * 1000, 1))
+        if conversation.validation_fallback:
+            result["fallback"] = conversation.validation_fallback
+        return result
+
+
+def run_batch(items, out_path: str, workers: int = WORKERS, rate: float = RATE_PER_SECOND,
+              resume: bool = True, processor: BatchProcessor | None = None) -> dict:
+    """Processes `items` concurrently, appending results to `out_path`. Returns the run's counts."""
+    processor = processor or BatchProcessor()
+    done = completed_ids(out_path) if resume else set()
+    limiter = RateLimiter(rate, burst=max(1, workers))
+    counts = {"processed": 0, "skipped": 0, "valid": 0, "invalid": 0, "errors": 0, "fallbacks": 0}
+
+    def run(item):
+        limiter.acquire()
+        try:
+            return processor.process(item)
+        except Exception as e:
+            return {"id": item["id"], "audio": item.get("audio"), "step": item.get("step"), "error": str(e)}
+
+    started = time.perf_counter()
+    last_progress = started
+    with open(out_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-worker") as pool:
+
+        def write(futures):
+            nonlocal last_progress
+            for future in futures:
+                result = future.result()
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush() # Every finished line is a checkpoint
+                counts["processed"] += 1
+                if result.get("error"):
+                    counts["errors"] += 1
+                elif "valid" in result:
+                    counts["valid" if result["valid"] else "invalid"] += 1
+                counts["fallbacks"] += bool(result.get("fallback"))
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_SECONDS:
+                last_progress = now
+                print(f"[INFO] {counts['processed']} utterances done, {counts['processed'] / (now - started):.1f}/s")
+
+        pending = set()
+        for item in items:
+            if item["id"] in done:
+                counts["skipped"] += 1
+                continue
+            if len(pending) >= workers * 2: # Keeps a large manifest from queueing up all at once
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(finished)
+            pending.add(pool.submit(run, item))
+        write(wait(pending).done)
+
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    counts["utterances_per_second"] = round(counts["processed"] / counts["seconds"], 2) if counts["seconds"] else 0.0
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe and validate recorded answers offline.")
+    parser.add_argument("directory", nargs="?", help="Directory of WAV files.")
+    parser.add_argument("--manifest", help="JSONL manifest of answers, instead of a directory.")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL file results are appended to.")
+    parser.add_argument("--step", help="Flow step for answers whose path does not name one, e.g. askAge.")
+    parser.add_argument("--language", help="Language code for reprompts of items that do not set one.")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="Utterances started per second; 0 is unlimited.")
+    parser.add_argument("--fresh", action="store_true", help="Overwrite --out instead of resuming from it.")
+    args = parser.parse_args()
+    if bool(args.directory) == bool(args.manifest):
+        parser.error("give either a directory or --manifest")
+
+    flow_order = ConversationManager().flow_order
+    if args.manifest:
+        items = read_manifest(args.manifest, args.step, args.language)
+    else:
+        items = scan_directory(args.directory, flow_order, args.step, args.language)
+    counts = run_batch(items, args.out, args.workers, args.rate, resume=not args.fresh)
+    print(f"[INFO] Batch finished: {counts}")
+    print(f"[INFO] Throughput: {counts['utterances_per_second']} utterances/s over {counts['seconds']}s "
+          f"({args.workers} workers, rate limit {args.rate or 'none'}/s).")
+    print(f"[INFO] Latency budget (hedges, give-ups, fallbacks):\n{latency_budget.budget_report.format_report()}")
@@ -0,0 +1,183 @@
+"""
+End-to-end turn latency benchmark against a local mock of the Sarvam APIs.
+
+Starts MockSarvamAPI (mock_sarvam.py) with the configured latency and error injection,
+points the clients at it, and replays scripted conversations (benchmarks/e2e_conversations.json:
+a recorded WAV and the expected transcript for every step) through the real STT, TTS and
+ConversationManager code. Reports p50/p95/p99 latency per stage and per turn, and the
+API calls made per completed conversation, retries included.
+
+With --stall-rate, that fraction of chat and translate requests hangs for --stall-seconds;
+compare --turn-budget 0 (no budget) with the default to see what hedging and the
+rule-based fallbacks (see latency_budget.py) save.
+
+    python -m benchmarks.bench_e2e --repeat 5 --stt-latency 0.35 --error-rate 0.05
+    python -m benchmarks.bench_e2e --repeat 5 --cold-cache --stall-rate 0.1 --turn-budget 0
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from mock_sarvam import MockSarvamAPI
+
+SCRIPT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "e2e_conversations.json")
+STAGES = ["stt", "validate", "llm", "translate", "tts", "turn"]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def point_clients_at(api: MockSarvamAPI, directory: str, turn_budget: float | None = None):
+    """Must run before the project modules are imported: they read these settings at import time."""
+    os.environ["SARVAM_BASE_URL"] = api.url
+    os.environ.setdefault("SARVAM_API_KEY", "mock-key")
+    os.environ["TRANSLATION_CACHE_FILE"] = "" # Memory only, so every run starts from the same state
+    os.environ["VALIDATION_CACHE_FILE"] = ""
+    os.environ["SUBMISSION_STORE_FILE"] = os.path.join(directory, "submissions.jsonl")
+    if turn_budget is not None:
+        os.environ["VOICEBOT_TURN_BUDGET"] = str(turn_budget)
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - started)
+        return timed
+
+    def measure(self, stage: str, fn, *args):
+        return self.wrap(stage, fn)(*args)
+
+
+def load_wav(path: str, cache: dict) -> io.BytesIO:
+    if path not in cache:
+        with open(path, 'rb') as f:
+            cache[path] = f.read()
+    wav = io.BytesIO(cache[path])
+    wav.name = os.path.basename(path)
+    return wav
+
+
+def run_conversation(script: dict, api: MockSarvamAPI, timer: StageTimer, wavs: dict) -> dict:
+    from conversation_manager import ConversationManager
+    from stt import transcribe_audio
+    from tts import synthesize_pcm
+
+    conversation = ConversationManager()
+    timer.measure("tts", synthesize_pcm, conversation.start_conversation(), conversation.user_language_code)
+    problems = []
+    for turn in script["turns"]:
+        asked = conversation.flow_order[conversation.current_step] if not conversation.is_complete else "done"
+        if asked != turn["step"]:
+            problems.append(f"expected {turn['step']}, was asked {asked}")
+            break
+        api.expect_transcript(turn["transcript"])
+        turn_started = time.perf_counter()
+        response = timer.measure("stt", transcribe_audio, load_wav(turn["wav"], wavs))
+        if response is None:
+            problems.append(f"{turn['step']}: transcription failed")
+            break
+        reply = timer.measure("validate", conversation.process_user_response, response.transcript)
+        timer.measure("tts", synthesize_pcm, reply, conversation.user_language_code)
+        timer.samples["turn"].append(time.perf_counter() - turn_started)
+
+    if not conversation.is_complete and not problems:
+        problems.append(f"conversation not complete, stuck at {conversation.flow_order[conversation.current_step]}")
+    for key, expected in script.get("expect", {}).items():
+        if conversation.user_data.get(key) != expected:
+            problems.append(f"{key}: expected {expected!r}, got {conversation.user_data.get(key)!r}")
+    conversation.close()
+    return {"complete": conversation.is_complete, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--script", default=SCRIPT_FILE)
+    parser.add_argument("--repeat", type=int, default=3, help="Times every scripted conversation is replayed.")
+    parser.add_argument("--stt-latency", type=float, default=0.35)
+    parser.add_argument("--llm-latency", type=float, default=0.45)
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.05, help="Up to this much random extra latency per call.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls to every API that fail with 503.")
+    parser.add_argument("--cold-cache", action="store_true", help="Clear the translation and validation caches before each conversation.")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of chat and translate calls that hang.")
+    parser.add_argument("--stall-seconds", type=float, default=8.0)
+    parser.add_argument("--turn-budget", type=float, default=None, help="Seconds per turn for LLM and translation calls; 0 disables.")
+    args = parser.parse_args()
+
+    endpoints = ("chat", "translate", "stt", "tts")
+    latencies = (args.llm_latency, args.translate_latency, args.stt_latency, args.tts_latency)
+    api = MockSarvamAPI(
+        latency=dict(zip(endpoints, latencies)),
+        error_rate={endpoint: args.error_rate for endpoint in endpoints},
+        jitter=args.jitter,
+        stall_rate={"chat": args.stall_rate, "translate": args.stall_rate},
+        stall_seconds=args.stall_seconds,
+    ).start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        point_clients_at(api, directory, args.turn_budget)
+        import conversation_manager
+        import latency_budget
+        import translate
+
+        timer = StageTimer()
+        conversation_manager.chat_with_sarvam = timer.wrap("llm", conversation_manager.chat_with_sarvam)
+        conversation_manager.translate_text = timer.wrap("translate", conversation_manager.translate_text)
+
+        with open(args.script, 'r', encoding='utf-8') as f:
+            scripts = json.load(f)["conversations"]
+
+        wavs = {}
+        completed = 0
+        api.reset_counters()
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for script in scripts:
+                if args.cold_cache:
+                    translate.translation_cache.clear()
+                    conversation_manager.validation_cache.clear()
+                result = run_conversation(script, api, timer, wavs)
+                completed += result["complete"]
+                for problem in result["problems"]:
+                    print(f"[WARNING] {script['name']}: {problem}")
+        elapsed = time.perf_counter() - started
+    api.stop()
+
+    runs = args.repeat * len(scripts)
+    print(f"\nConversations completed: {completed}/{runs} in {elapsed:.1f}s "
+          f"(latency stt={args.stt_latency}s llm={args.llm_latency}s translate={args.translate_latency}s "
+          f"tts={args.tts_latency}s, error rate {args.error_rate:.0%})")
+    print(f"\n  {'stage':10s} {'count':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for stage in STAGES:
+        samples = timer.samples.get(stage)
+        if samples:
+            print(f"  {stage:10s} {len(samples):6d} " + " ".join(
+                f"{percentile(samples, pct) * 1000:8.0f}" for pct in (50, 95, 99)))
+
+    per_conversation = {endpoint: api.calls[endpoint] / max(1, completed) for endpoint in endpoints}
+    print(f"\nAPI calls per completed conversation: {sum(per_conversation.values()):.1f} "
+          + " ".join(f"{endpoint}={calls:.1f}" for endpoint, calls in per_conversation.items()))
+    if any(api.errors.values()):
+        print(f"Injected errors: {api.errors}")
+    if any(api.stalls.values()):
+        print(f"Injected stalls: {api.stalls}")
+    budget = f"{latency_budget.TURN_BUDGET_SECONDS:g}s" if latency_budget.TURN_BUDGET_SECONDS > 0 else "off"
+    print(f"\nLatency budget {budget}:\n{latency_budget.budget_report.format_report()}")
+
+
+if __name__ == "__main__":
+    main()
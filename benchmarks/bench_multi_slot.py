@@ -0,0 +1,137 @@
+"""
+Turns and API calls per completed registration, with and without multi-slot extraction.
+
+Scripted callers (benchmarks/multi_slot_callers.json) answer every question they are
+asked; some volunteer several fields in one answer. The conversations run through the
+real ConversationManager against the local mock API. The chat endpoint is answered by a
+scripted LLM that recognizes the caller's own phrases: it extracts exactly the fields
+mentioned, so the numbers measure the flow, not model accuracy. STT and TTS are not
+called but counted (one STT per turn, one TTS per reply plus the greeting).
+
+    python -m benchmarks.bench_multi_slot
+"""
+import argparse
+import json
+import os
+import tempfile
+from functools import partial
+
+from mock_sarvam import MockSarvamAPI
+
+CALLERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "multi_slot_callers.json")
+MAX_TURNS = 40
+# Words of each single-field validation prompt that tell which field it asks for
+VALIDATION_FIELDS = {
+    "full name": "name", "city name": "city", "job role": "role",
+    "education level": "education", "travel distance": "traveldistance",
+}
+
+
+class ScriptedLLM:
+    """Chat stand-in answering validation and extraction prompts from the current caller's phrases."""
+    def __init__(self):
+        self.caller = None
+
+    def _mentioned(self, content: str) -> list:
+        content = content.lower()
+        found = [(content.find(phrase.lower()), field, value)
+                 for field, (value, phrase) in self.caller["fields"].items() if phrase.lower() in content]
+        return [(field, value) for _, field, value in sorted(found)]
+
+    def __call__(self, messages: list) -> str:
+        system, content = messages[0]["content"], messages[-1]["content"]
+        mentioned = self._mentioned(content)
+        if "JSON object" in system:
+            return json.dumps(dict(mentioned))
+        if "numerical value" in system:
+            numbers = [value for _, value in mentioned if isinstance(value, int)]
+            return f"true: {numbers[0]}" if numbers else "false: Please say the number again."
+        for words, field in VALIDATION_FIELDS.items():
+            if words in system:
+                values = [value for name, value in mentioned if name == field]
+                return f"true: {values[0]}" if values else "false: Please say that again."
+        return "false: Please say that again."
+
+
+def answer(caller: dict, step: str, storage_key) -> str:
+    if step == "askLanguage":
+        return caller["language"]
+    fields = caller["answers"].get(step) or [storage_key(step)]
+    return ", ".join(caller["fields"][field][1] for field in fields)
+
+
+def run_caller(caller: dict, multi_slot: bool) -> dict:
+    import conversation_manager
+    import translate
+    from conversation_manager import ConversationManager
+
+    translate.translation_cache.clear() # Every registration starts cold
+    conversation_manager.validation_cache.clear()
+    conversation = ConversationManager(multi_slot=multi_slot)
+    # Warm in the foreground, so every translation is counted against the caller that caused it
+    conversation.warm_translation_cache = partial(conversation.warm_translation_cache, blocking=True)
+    conversation.start_conversation()
+    turns = 0
+    while not conversation.is_complete and turns < MAX_TURNS:
+        step = conversation.flow_order[conversation.current_step]
+        conversation.process_user_response(answer(caller, step, conversation._storage_key))
+        turns += 1
+
+    expected = {field: value for field, (value, _) in caller["fields"].items()}
+    expected.update(caller.get("expect", {}))
+    wrong = {field: conversation.user_data.get(field) for field, value in expected.items()
+             if conversation.user_data.get(field) != value}
+    conversation.close()
+    return {"complete": conversation.is_complete, "turns": turns, "wrong": wrong}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--callers", default=CALLERS_FILE)
+    args = parser.parse_args()
+
+    llm = ScriptedLLM()
+    api = MockSarvamAPI(chat_responder=llm).start()
+    with open(args.callers, 'r', encoding='utf-8') as f:
+        callers = json.load(f)["callers"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["SARVAM_BASE_URL"] = api.url
+        os.environ.setdefault("SARVAM_API_KEY", "mock-key")
+        os.environ["TRANSLATION_CACHE_FILE"] = ""
+        os.environ["VALIDATION_CACHE_FILE"] = ""
+        os.environ["SUBMISSION_STORE_FILE"] = os.path.join(directory, "submissions.jsonl")
+
+        results = {}
+        for multi_slot in (False, True):
+            rows = []
+            for caller in callers:
+                llm.caller = caller
+                api.reset_counters()
+                result = run_caller(caller, multi_slot)
+                result.update(chat=api.calls["chat"], translate=api.calls["translate"])
+                rows.append((caller["name"], result))
+            results["multi-slot" if multi_slot else "one field"] = rows
+    api.stop()
+
+    print(f"\n  {'mode':11s} {'caller':28s} {'done':>5s} {'turns':>6s} {'llm':>5s} {'translate':>10s} {'api calls':>10s}")
+    summary = {}
+    for mode, rows in results.items():
+        for name, result in rows:
+            api_calls = result["chat"] + result["translate"] + result["turns"] + (result["turns"] + 1)
+            result["api_calls"] = api_calls
+            print(f"  {mode:11s} {name:28s} {'yes' if result['complete'] else 'NO':>5s} {result['turns']:6d} "
+                  f"{result['chat']:5d} {result['translate']:10d} {api_calls:10d}")
+            if result["wrong"]:
+                print(f"  {'':11s} wrong fields: {result['wrong']}")
+        completed = [result for _, result in rows if result["complete"]]
+        summary[mode] = {key: sum(result[key] for result in completed) / max(1, len(completed))
+                         for key in ("turns", "chat", "api_calls")}
+
+    print("\nPer completed registration:")
+    for mode, averages in summary.items():
+        print(f"  {mode:11s} turns {averages['turns']:5.1f}  llm calls {averages['chat']:5.1f}  api calls {averages['api_calls']:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Checks the number parser against its corpus and measures how often it lets numeric
+fields skip the LLM.
+
+Corpus entries with `"expected": null` are utterances the parser must hand to the LLM.
+Any wrong value is a failure; an unsure answer for a parseable entry only lowers the
+skip rate.
+
+    python -m benchmarks.bench_number_parser
+"""
+import json
+import os
+import sys
+import time
+
+from number_parser import ParserUsageReport, parse_number
+
+CORPUS_FILE = os.path.join(os.path.dirname(__file__), "number_parser_corpus.json")
+
+
+def main() -> int:
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    usage = ParserUsageReport()
+    failures = []
+    for entry in corpus:
+        result = parse_number(entry["text"], entry["field"])
+        usage.record(entry["field"], skipped_llm=result.confident)
+        if result.confident and result.value != entry["expected"]:
+            failures.append(f"{entry['text']!r}: parsed {result.value}, expected {entry['expected']}")
+        elif not result.confident and entry["expected"] is not None:
+            print(f"[INFO] Left to the LLM ({result.reason}): {entry['text']!r}")
+
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for entry in corpus:
+            parse_number(entry["text"], entry["field"])
+    per_parse_us = (time.perf_counter() - started) / (rounds * len(corpus)) * 1e6
+
+    print(usage.format_report())
+    print(f"{len(corpus)} utterances, {per_parse_us:.1f} us per parse")
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Cold-start time of a worker process: import to first prompt.
+
+Spawns fresh interpreters that import the entry module (app.py by default), run the
+connection warm-up like a worker does before taking calls, then build a
+ConversationManager, produce the first prompt and synthesize it against the local mock
+API. Reports each phase (plus the wall time from spawning the process) and how long the
+first caller waits once the worker is ready. Fails when the median time from import
+to the first synthesized prompt exceeds the budget, so autoscaled workers keep
+starting fast.
+
+    python -m benchmarks.bench_startup --runs 5 --entry app --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_sarvam import MockSarvamAPI
+
+STARTUP_BUDGET_MS = 1500
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ["import", "ready", "first_prompt", "first_audio", "process", "first_caller_wait"]
+
+# Runs in the child; every phase is measured from the first line of the script
+CHILD = """
+import json, time
+started = time.perf_counter()
+import importlib
+importlib.import_module({entry!r})
+imported = time.perf_counter()
+if {warm_up!r}:
+    import http_client
+    http_client.start_warm_up().join() # What app.py and main.py start first; a worker waits for calls meanwhile
+ready = time.perf_counter()
+from conversation_manager import ConversationManager
+conversation = ConversationManager()
+prompt = conversation.start_conversation()
+prompted = time.perf_counter()
+from tts import synthesize_pcm
+audio = synthesize_pcm(prompt, conversation.user_language_code)
+spoken = time.perf_counter()
+print("STARTUP " + json.dumps({{
+    "import": imported - started, "ready": ready - started, "first_prompt": prompted - started,
+    "first_audio": spoken - started, "first_caller_wait": spoken - ready, "ok": audio is not None,
+}}))
+"""
+
+
+def run_once(entry: str, env: dict, warm_up: bool) -> dict:
+    spawned = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD.format(entry=entry, warm_up=warm_up)], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    elapsed = time.perf_counter() - spawned
+    for line in output.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return {**json.loads(line[len("STARTUP "):]), "process": elapsed}
+    raise RuntimeError(f"Startup run failed:\n{output.stdout[-2000:]}\n{output.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entry", default="app", help="Module a worker imports first (app or main).")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tts-latency", type=float, default=0.0)
+    parser.add_argument("--no-warm-up", action="store_true", help="Don't start the background warm-up after importing.")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Fail if the median time to the first synthesized prompt exceeds this.")
+    args = parser.parse_args()
+
+    api = MockSarvamAPI(latency={"tts": args.tts_latency}).start()
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "SARVAM_BASE_URL": api.url,
+            "SARVAM_API_KEY": os.environ.get("SARVAM_API_KEY", "mock-key"),
+            "TRANSLATION_CACHE_FILE": "",
+            "VALIDATION_CACHE_FILE": "",
+            "SUBMISSION_STORE_FILE": os.path.join(directory, "submissions.jsonl"),
+        }
+        runs = [run_once(args.entry, env, not args.no_warm_up) for _ in range(args.runs)]
+    api.stop()
+
+    print(f"\nCold start of '{args.entry}' over {args.runs} runs, warm-up {'off' if args.no_warm_up else 'on'} "
+          f"(ms since the first line of the script; 'process' is spawn to exit)")
+    print(f"  {'phase':18s} {'p50':>8s} {'max':>8s}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        print(f"  {phase:18s} {statistics.median(values):8.0f} {max(values):8.0f}")
+    if not all(run["ok"] for run in runs):
+        print("[WARNING] Some runs could not synthesize the first prompt.")
+
+    first_audio = statistics.median(run["first_audio"] * 1000 for run in runs)
+    if first_audio > args.budget_ms:
+        print(f"[ERROR] Time to first prompt audio {first_audio:.0f} ms is over the {args.budget_ms:.0f} ms budget.")
+        sys.exit(1)
+    print(f"[INFO] Time to first prompt audio {first_audio:.0f} ms is within the {args.budget_ms:.0f} ms budget.")
+
+
+if __name__ == "__main__":
+    main()
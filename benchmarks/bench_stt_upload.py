@@ -0,0 +1,87 @@
+"""
+STT upload size and latency: raw WAV (the old path) against trimmed, downsampled and compressed uploads.
+
+Encodes a recorded utterance (temp_input.wav, plus a copy padded with line noise the way
+recorded answers often arrive) in every mode, uploads it through the real SDK client to
+the local mock API behind a simulated uplink of --uplink-kbps, and reports the bytes sent,
+the encoding time and the end-to-end STT latency (encode + upload + response) per mode.
+
+    python -m benchmarks.bench_stt_upload --uplink-kbps 256 --repeat 10
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from mock_sarvam import MockSarvamAPI
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (name, codec, highest sample rate, trim silence)
+MODES = [
+    ("wav (old path)", "wav", 16000, False),
+    ("wav trimmed", "wav", 16000, True),
+    ("flac", "flac", 16000, True),
+    ("flac 8 kHz", "flac", 8000, True),
+    ("opus", "opus", 16000, True),
+    ("opus 8 kHz", "opus", 8000, True),
+]
+PAD_BEFORE_SECONDS = 0.8
+PAD_AFTER_SECONDS = 1.2
+NOISE_RMS = 100
+
+
+def padded(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    noise = np.random.default_rng(0).normal(0, NOISE_RMS, int((PAD_BEFORE_SECONDS + PAD_AFTER_SECONDS) * sample_rate))
+    noise = noise.astype(np.int16)
+    split = int(PAD_BEFORE_SECONDS * sample_rate)
+    return np.concatenate((noise[:split], samples, noise[split:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", default=os.path.join(REPO_DIR, "temp_input.wav"))
+    parser.add_argument("--uplink-kbps", type=float, default=256.0, help="Simulated uplink speed for the upload.")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="Mock processing time per transcription.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    api = MockSarvamAPI(latency={"stt": args.stt_latency}, upload_kbps=args.uplink_kbps).start()
+    os.environ["SARVAM_BASE_URL"] = api.url
+    os.environ.setdefault("SARVAM_API_KEY", "mock-key")
+    import stt
+    from audio_encoding import encode_for_stt, read_wav
+
+    samples, sample_rate = read_wav(args.wav)
+    inputs = {"utterance": samples, "padded": padded(samples, sample_rate)}
+    stt._request_transcription(encode_for_stt(samples, sample_rate, codec="wav", trim=False).file) # Builds the SDK client
+
+    print(f"\nSTT upload over a {args.uplink_kbps:g} kbps uplink, mock STT latency {args.stt_latency * 1000:.0f} ms, "
+          f"{args.repeat} runs each")
+    print(f"  {'input':10s} {'mode':15s} {'KB':>7s} {'vs old':>7s} {'encode ms':>10s} {'stt p50':>8s} {'stt p95':>8s}")
+    for input_name, audio in inputs.items():
+        baseline = None
+        for name, codec, max_rate, trim in MODES:
+            encode_times, totals = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                upload = encode_for_stt(audio, sample_rate, codec=codec, max_sample_rate=max_rate, trim=trim)
+                encoded = time.perf_counter()
+                stt._request_transcription(upload.file)
+                encode_times.append(encoded - started)
+                totals.append(time.perf_counter() - started)
+            if upload.codec != codec:
+                print(f"  {input_name:10s} {name:15s} skipped: {codec} encoding is unavailable")
+                continue
+            totals.sort()
+            p50, p95 = statistics.median(totals) * 1000, totals[int(0.95 * (len(totals) - 1))] * 1000
+            baseline = baseline or p50
+            print(f"  {input_name:10s} {name:15s} {upload.nbytes / 1024:7.1f} {upload.nbytes / upload.wav_bytes:7.0%} "
+                  f"{statistics.median(encode_times) * 1000:10.1f} {p50:8.0f} {p95:8.0f}"
+                  + (f"  ({p50 - baseline:+.0f} ms)" if p50 != baseline else ""))
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmarks saving candidate submissions.
+
+Compares the old db.json read-modify-write against the append-only stores: the cost of
+one save as the store grows, and throughput with several conversations finishing at
+once (records lost by the old scheme are counted). Runs in a temporary directory.
+
+    python -m benchmarks.bench_submission_store --sizes 0 1000 10000 --threads 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from submission_store import JsonlSubmissionStore, SqliteSubmissionStore
+
+SAMPLE_RECORD = {
+    "language": "hi-IN", "name": "Ravi Kumar", "pincode": 560001, "city": "Bengaluru", "age": 27,
+    "gender": "Male", "education": "Graduate", "experience": 4, "lastsalary": 25000,
+    "expectedsalary": 32000, "traveldistance": "10 to 20 kilometers", "role": "Delivery Executive",
+    "submission_timestamp": "2025-01-01T10:00:00",
+}
+
+
+class LegacyJsonStore:
+    """The original ConversationManager._save_to_db: load the whole array, append, rewrite."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def append(self, record: dict) -> bool:
+        all_users = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    all_users = json.load(f)
+            except json.JSONDecodeError:
+                all_users = []
+        all_users.append(record)
+        with open(self.path, 'w') as f:
+            json.dump(all_users, f, indent=4)
+        return True
+
+    def count(self) -> int:
+        try:
+            with open(self.path, 'r') as f:
+                return len(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return 0
+
+    def close(self):
+        pass
+
+
+def make_store(kind: str, directory: str):
+    if kind == "db.json (rewrite)":
+        return LegacyJsonStore(os.path.join(directory, "db.json"))
+    if kind == "jsonl":
+        return JsonlSubmissionStore(os.path.join(directory, "submissions.jsonl"))
+    return SqliteSubmissionStore(os.path.join(directory, "submissions.sqlite3"))
+
+
+def prefill(store, kind: str, size: int):
+    if kind == "db.json (rewrite)":
+        with open(store.path, 'w') as f:
+            json.dump([SAMPLE_RECORD] * size, f, indent=4)
+        return
+    for _ in range(size):
+        store.append(SAMPLE_RECORD, wait=False)
+    store.flush()
+
+
+def time_single_saves(store, saves: int) -> float:
+    started = time.perf_counter()
+    for _ in range(saves):
+        store.append(SAMPLE_RECORD)
+    return (time.perf_counter() - started) / saves
+
+
+def time_concurrent_saves(store, threads: int, saves_per_thread: int) -> float:
+    def worker():
+        for _ in range(saves_per_thread):
+            try:
+                store.append(SAMPLE_RECORD)
+            except (OSError, json.JSONDecodeError):
+                pass # The old scheme can read a half-written file; that record is lost
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000], help="Records already stored.")
+    parser.add_argument("--saves", type=int, default=50, help="Saves timed at each size.")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent writers in the throughput test.")
+    parser.add_argument("--saves-per-thread", type=int, default=50)
+    args = parser.parse_args()
+
+    kinds = ["db.json (rewrite)", "jsonl", "sqlite"]
+    print("Time per save by store size:")
+    for kind in kinds:
+        timings = []
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as directory:
+                store = make_store(kind, directory)
+                prefill(store, kind, size)
+                timings.append(f"{size:>6} stored: {time_single_saves(store, args.saves) * 1000:7.2f} ms")
+                store.close()
+        print(f"  {kind:18s} " + " | ".join(timings))
+
+    expected = args.threads * args.saves_per_thread
+    print(f"\nConcurrent saves ({args.threads} threads x {args.saves_per_thread}):")
+    for kind in kinds:
+        with tempfile.TemporaryDirectory() as directory:
+            store = make_store(kind, directory)
+            elapsed = time_concurrent_saves(store, args.threads, args.saves_per_thread)
+            stats = store.stats() if hasattr(store, "stats") else {}
+            store.close()
+            stored = store.count()
+            per_commit = f" records/commit={stats['records_per_commit']:.1f}" if stats else ""
+            print(f"  {kind:18s} {expected / elapsed:8,.0f} saves/s  stored {stored}/{expected} "
+                  f"(lost {expected - stored}){per_commit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Time to first audio for spoken prompts: whole-utterance synthesis vs sentence streaming.
+
+Every prompt of the flow script (plus the welcome prompt) is synthesized through the
+real tts.py code against the local mock API, whose TTS latency grows with the text
+length like the real service. "whole" synthesizes the prompt in one request and then
+plays it; "sentences" is what speak_text does: split at sentence boundaries, synthesize
+ahead and play each sentence as it arrives. Playback goes to a simulated sound card
+that consumes audio in real time, so silent gaps between sentences are counted too.
+
+    python -m benchmarks.bench_tts_playback --tts-latency 0.2 --tts-per-char 0.004
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from mock_sarvam import MockSarvamAPI
+
+FLOW_FILE = "conversation_flow.json"
+
+
+class SimulatedOutputStream:
+    """Plays audio in real time behind a small device buffer; write() blocks like sd.RawOutputStream."""
+    def __init__(self, sample_rate: int, buffer_seconds: float = 0.2):
+        self.sample_rate = sample_rate
+        self.buffer_seconds = buffer_seconds
+        self.playing_until = None # Clock time at which the queued audio runs out
+        self.gap_seconds = 0.0
+
+    def write(self, data):
+        now = time.perf_counter()
+        if self.playing_until is None:
+            self.playing_until = now
+        elif now > self.playing_until:
+            self.gap_seconds += now - self.playing_until # Device ran dry: the listener hears silence
+            self.playing_until = now
+        self.playing_until += len(data) / (2 * self.sample_rate)
+        wait = self.playing_until - self.buffer_seconds - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+
+    def stop(self):
+        if self.playing_until is not None:
+            time.sleep(max(0.0, self.playing_until - time.perf_counter()))
+
+    def close(self):
+        pass
+
+
+def play(mode: str, text: str, speed: float, streams: list) -> tuple[float, float]:
+    """Returns (time to first audio, total time until playback ended)."""
+    import tts
+
+    def open_stream(sample_rate: int):
+        stream = SimulatedOutputStream(int(sample_rate * speed))
+        streams.append(stream)
+        return stream
+
+    started = time.perf_counter()
+    if mode == "whole":
+        audio = tts.synthesize_pcm(text, "en-IN", tts.TTS_SAMPLE_RATE)
+        segments = [audio] if audio else []
+    else:
+        segments = tts.synthesize_sentences(text, "en-IN")
+    first_audio = tts.stream_pcm(segments, started, open_stream=open_stream)
+    return first_audio, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="Fixed seconds per TTS request.")
+    parser.add_argument("--tts-per-char", type=float, default=0.004, help="Extra seconds per character synthesized.")
+    parser.add_argument("--speed", type=float, default=4.0,
+                        help="Audio plays at this multiple of real time (gaps then err on the high side).")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    api = MockSarvamAPI(latency={"tts": args.tts_latency}, latency_per_character={"tts": args.tts_per_char}).start()
+    os.environ["SARVAM_BASE_URL"] = api.url
+    os.environ.setdefault("SARVAM_API_KEY", "mock-key")
+    import tts
+
+    with open(FLOW_FILE, 'r', encoding='utf-8') as f:
+        script = json.load(f)
+    prompts = [f"{script['welcome']} {script['askLanguage']}"] + [text for text in script.values() if isinstance(text, str)]
+
+    results = {}
+    for mode in ("whole", "sentences"):
+        streams = []
+        first_audio, total = [], []
+        api.reset_counters()
+        for _ in range(args.repeat):
+            for text in prompts:
+                first, elapsed = play(mode, text, args.speed, streams)
+                first_audio.append(first)
+                total.append(elapsed)
+        results[mode] = (first_audio, total, sum(stream.gap_seconds for stream in streams), api.calls["tts"])
+    api.stop()
+
+    multi = sum(1 for text in prompts if len(tts.split_sentences(text)) > 1)
+    print(f"\n{len(prompts)} prompts x {args.repeat}, {multi} of them split into several sentences "
+          f"(TTS {args.tts_latency * 1000:.0f} ms + {args.tts_per_char * 1000:.1f} ms/char, audio at {args.speed}x)")
+    print(f"\n  {'mode':10s} {'first audio p50':>16s} {'p95':>8s} {'mean':>8s} {'total mean':>11s} {'gaps s':>7s} {'requests':>9s}")
+    for mode, (first_audio, total, gaps, requests) in results.items():
+        ordered = sorted(first_audio)
+        print(f"  {mode:10s} {statistics.median(ordered) * 1000:13.0f} ms {ordered[int(0.95 * (len(ordered) - 1))] * 1000:5.0f} ms "
+              f"{statistics.mean(ordered) * 1000:5.0f} ms {statistics.mean(total) * 1000:8.0f} ms {gaps:7.2f} {requests:9d}")
+
+
+if __name__ == "__main__":
+    main()
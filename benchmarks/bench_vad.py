@@ -0,0 +1,80 @@
+"""
+Benchmarks voice activity detection over recorded WAVs.
+
+Each recording is padded with silence (optionally with added line noise) and fed through
+the detectors block by block, the way the audio callback would. Reports frames processed
+per second of CPU time and the endpoint delay: how long after the end of speech the
+utterance was declared over.
+
+    python -m benchmarks.bench_vad temp_input.wav --noise 300
+"""
+import argparse
+import time
+import wave
+
+import numpy as np
+
+from vad import AdaptiveVAD, RmsThresholdVAD
+
+
+def load_wav(path: str):
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16), wf.getframerate()
+
+
+def pad_with_silence(samples: np.ndarray, sample_rate: int, lead_seconds: float, tail_seconds: float,
+                     noise_rms: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    lead = np.zeros(int(lead_seconds * sample_rate))
+    tail = np.zeros(int(tail_seconds * sample_rate))
+    signal = np.concatenate((lead, samples.astype(np.float64), tail))
+    signal += rng.normal(0.0, noise_rms, signal.size)
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+def run_detector(detector, samples: np.ndarray, block_size: int, hangover_samples: int, sample_rate: int) -> dict:
+    events = []
+    started = time.perf_counter()
+    for offset in range(0, samples.size, block_size):
+        events.extend(detector.process(samples[offset:offset + block_size]))
+    elapsed = time.perf_counter() - started
+
+    ends = [event for event in events if event.kind == "speech_end"]
+    delays = [(event.detected_at - (event.sample - hangover_samples)) / sample_rate for event in ends]
+    return {
+        "utterances": len(ends),
+        "starts": [round(event.sample / sample_rate, 2) for event in events if event.kind == "speech_start"],
+        "frames_per_second": detector.frames_processed / elapsed if elapsed else float("inf"),
+        "realtime_factor": (samples.size / sample_rate) / elapsed if elapsed else float("inf"),
+        "endpoint_delay_ms": [round(delay * 1000) for delay in delays],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("wavs", nargs="*", default=["temp_input.wav"])
+    parser.add_argument("--noise", type=float, default=0.0, help="RMS of white noise added to simulate a noisy line.")
+    parser.add_argument("--lead", type=float, default=1.0, help="Seconds of silence before the recording.")
+    parser.add_argument("--tail", type=float, default=2.0, help="Seconds of silence after the recording.")
+    args = parser.parse_args()
+
+    for path in args.wavs:
+        samples, sample_rate = load_wav(path)
+        padded = pad_with_silence(samples, sample_rate, args.lead, args.tail, args.noise)
+        adaptive = AdaptiveVAD(sample_rate)
+        detectors = {
+            "adaptive (20 ms frames)": (adaptive, 320, adaptive.hangover_samples),
+            "rms threshold (0.5 s blocks)": (RmsThresholdVAD(sample_rate), 8000, 0),
+        }
+        print(f"{path}: {samples.size / sample_rate:.2f}s of audio, noise rms {args.noise}")
+        for name, (detector, block_size, hangover_samples) in detectors.items():
+            result = run_detector(detector, padded, block_size, hangover_samples, sample_rate)
+            print(f"  {name:30s} utterances={result['utterances']} starts={result['starts']} "
+                  f"endpoint_delay_ms={result['endpoint_delay_ms']} "
+                  f"frames/s={result['frames_per_second']:,.0f} realtime x{result['realtime_factor']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+API calls and latency per failed answer from a caller who does not speak English, before
+and after validation writes the reprompt in the caller's language.
+
+Before, the validation LLM answered `false: <English reprompt>` and the reprompt was then
+translated: two round trips in series. Now the validation prompt names the caller's language
+and the LLM's verdict carries the reprompt already in it. Answers the local parser and
+gazetteer cannot resolve run through the real ConversationManager against the local mock
+API, with the caches cleared before every answer so each one costs what a new answer does.
+A third mode shows the safety net: a reprompt that still comes back in English is translated.
+
+    python -m benchmarks.bench_validation_reprompt --language hi-IN --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from mock_sarvam import MockSarvamAPI
+
+# (step, answer the local rules cannot resolve)
+FAILED_ANSWERS = [
+    ("askAge", "pata nahi"),
+    ("askCity", "wahi jahan pehle tha"),
+    ("askRole", "kuch bhi"),
+    ("askEducation", "padhai chhod di thi beech mein"),
+    ("askTravelDistance", "jitna ho sake"),
+    ("askExpectedSalary", "jo aap theek samjhein"),
+    ("askName", "hmm"),
+]
+LOCALIZED_REPROMPT = "माफ़ कीजिए, मैं समझ नहीं पाया। कृपया फिर से बताइए।"
+ENGLISH_REPROMPT = "I did not understand that. Please say it again."
+MODES = {
+    "before: English reprompt, translated": lambda messages: f"false: {ENGLISH_REPROMPT}",
+    "after: reprompt in caller's language": lambda messages: json.dumps(
+        {"status": "false", "value": "", "reprompt": LOCALIZED_REPROMPT}, ensure_ascii=False),
+    "after, LLM ignored the language": lambda messages: json.dumps(
+        {"status": "false", "value": "", "reprompt": ENGLISH_REPROMPT}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--language", default="hi-IN")
+    parser.add_argument("--repeat", type=int, default=5, help="Times every answer is replayed per mode.")
+    parser.add_argument("--llm-latency", type=float, default=0.45)
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    api = MockSarvamAPI(latency={"chat": args.llm_latency, "translate": args.translate_latency}).start()
+    os.environ["SARVAM_BASE_URL"] = api.url
+    os.environ.setdefault("SARVAM_API_KEY", "mock-key")
+    os.environ["TRANSLATION_CACHE_FILE"] = "" # Memory only, so every answer starts cold
+    os.environ["VALIDATION_CACHE_FILE"] = ""
+    import latency_budget
+    from conversation_manager import ConversationManager, validation_cache
+    from translate import translation_cache
+
+    conversation = ConversationManager()
+    conversation.user_language_code = args.language
+    conversation.user_data = {}
+
+    print(f"\nFailed answers from a {args.language} caller, mock latency llm={args.llm_latency}s "
+          f"translate={args.translate_latency}s, {len(FAILED_ANSWERS)} answers x {args.repeat}")
+    print(f"  {'mode':38s} {'chat':>6s} {'transl':>7s} {'calls':>6s} {'p50 ms':>7s} {'mean ms':>8s}  reprompt")
+    for mode, responder in MODES.items():
+        api.chat_responder = responder
+        api.reset_counters()
+        times, reprompts = [], set()
+        for _ in range(args.repeat):
+            for step, answer in FAILED_ANSWERS:
+                validation_cache.clear()
+                translation_cache.clear()
+                started = time.perf_counter()
+                with latency_budget.turn():
+                    is_valid, _, reprompt = conversation._validate_and_normalize(answer, step)
+                times.append(time.perf_counter() - started)
+                assert not is_valid, f"{step}: '{answer}' was accepted"
+                reprompts.add(reprompt)
+        answers = len(times)
+        chat, translate = api.calls["chat"] / answers, api.calls["translate"] / answers
+        print(f"  {mode:38s} {chat:6.2f} {translate:7.2f} {chat + translate:6.2f} "
+              f"{statistics.median(times) * 1000:7.0f} {statistics.mean(times) * 1000:8.0f}  {sorted(reprompts)[0][:30]}")
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
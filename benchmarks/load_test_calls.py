@@ -0,0 +1,147 @@
+"""
+Load test for the telephony server: N simultaneous fake Exotel calls.
+
+The server in app.py runs in-process on a free port, with local stand-ins for STT, TTS
+and the validation LLM that sleep for a configurable latency (blocking, like the real
+clients, so they occupy the worker pool the same way). Every call speaks the answers
+below and goes through the whole flow. Reports completed calls, max concurrent
+sessions, per-call memory and the response latency callers heard.
+
+    python -m benchmarks.load_test_calls --calls 50 --workers 16 --speed 4
+"""
+import argparse
+import asyncio
+import resource
+import statistics
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import app
+import conversation_manager
+from conversation_manager import ConversationManager
+from exotel_client import FakeExotelCall
+from submission_store import JsonlSubmissionStore
+
+# One valid answer per step; the pincode fills in the city, so askCity is skipped
+ANSWERS = [
+    "English", "Ravi Kumar", "560001", "27", "male", "graduate", "4 years",
+    "25000", "32000", "10 kilometers", "delivery executive",
+]
+
+
+class StandIns:
+    """Blocking stand-ins for the Sarvam calls, each answering after a fixed latency."""
+    def __init__(self, stt_latency: float, llm_latency: float, tts_latency: float):
+        self.stt_latency = stt_latency
+        self.llm_latency = llm_latency
+        self.tts_latency = tts_latency
+        self._turns = {}
+        self._lock = threading.Lock()
+        self.calls = {"stt": 0, "llm": 0, "tts": 0}
+
+    def _count(self, api: str):
+        with self._lock:
+            self.calls[api] += 1
+
+    def transcribe(self, samples, sample_rate: int, call_sid: str) -> str:
+        self._count("stt")
+        time.sleep(self.stt_latency)
+        with self._lock:
+            turn = self._turns.get(call_sid, 0)
+            self._turns[call_sid] = turn + 1
+        return ANSWERS[turn % len(ANSWERS)]
+
+    def chat(self, messages, max_tokens=None) -> str:
+        self._count("llm")
+        time.sleep(self.llm_latency)
+        return f"true: {messages[-1]['content']}"
+
+    def synthesize(self, text: str, language_code: str, sample_rate: int):
+        self._count("tts")
+        time.sleep(self.tts_latency)
+        return np.zeros(int(0.5 * sample_rate), dtype=np.int16).tobytes(), sample_rate
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_load_test(args) -> dict:
+    stand_ins = StandIns(args.stt_latency, args.llm_latency, args.tts_latency)
+    conversation_manager.chat_with_sarvam = stand_ins.chat # Validation LLM stand-in
+    with tempfile.TemporaryDirectory() as directory:
+        store = JsonlSubmissionStore(f"{directory}/submissions.jsonl")
+        server = app.CallServer(
+            transcribe_fn=stand_ins.transcribe,
+            synthesize_fn=stand_ins.synthesize,
+            conversation_factory=lambda: ConversationManager(submission_store=store),
+            max_calls=args.calls,
+            workers=args.workers,
+        )
+        await server.start("127.0.0.1", 0)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        url = f"ws://127.0.0.1:{server.port}"
+
+        async def one_call(index: int):
+            await asyncio.sleep(index * args.ramp / max(1, args.calls))
+            return await FakeExotelCall(url, f"call-{index:04d}", turns=len(ANSWERS), speed=args.speed).run()
+
+        started = time.perf_counter()
+        calls = await asyncio.gather(*(one_call(i) for i in range(args.calls)))
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats = server.stats()
+        await server.close()
+        store.close()
+        saved = store.count()
+
+    latencies = [latency for call in calls for latency in call.response_latencies]
+    return {
+        "calls": calls,
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "stats": stats,
+        "saved": saved,
+        "api_calls": stand_ins.calls,
+        "rss_growth_per_call": (rss_after - rss_before) * 1024 / max(1, stats["max_concurrent"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=app.WORKER_POOL_SIZE)
+    parser.add_argument("--ramp", type=float, default=1.0, help="Seconds over which the calls are started.")
+    parser.add_argument("--speed", type=float, default=4.0, help="Caller audio is sent at this multiple of real time.")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--tts-latency", type=float, default=0.25)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load_test(args))
+    calls = result["calls"]
+    completed = sum(1 for call in calls if call.turns_completed == len(ANSWERS))
+    errors = [call for call in calls if call.error]
+    latencies = result["latencies"]
+    stats = result["stats"]
+
+    print(f"\nCalls completed: {completed}/{len(calls)} in {result['elapsed']:.1f}s, "
+          f"submissions saved: {result['saved']}, errors: {len(errors)}")
+    for call in errors[:5]:
+        print(f"  {call.call_sid}: {call.error!r}")
+    print(f"Max concurrent sessions: {stats['max_concurrent']} (workers: {stats['workers']}, rejected: {stats['rejected']})")
+    print(f"Memory per call: {stats['memory_per_call_bytes'] / 1024:.0f} KiB audio buffers at peak, "
+          f"~{result['rss_growth_per_call'] / 1024:.0f} KiB process growth")
+    print(f"Stand-in API calls: {result['api_calls']}")
+    if latencies:
+        print(f"Response latency over {len(latencies)} turns (end of speech -> first bot audio): "
+              f"p50 {percentile(latencies, 50) * 1000:.0f} ms, p95 {percentile(latencies, 95) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 99) * 1000:.0f} ms, mean {statistics.mean(latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
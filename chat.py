@@ -1,14 +1,16 @@
-import os
 import requests
-import dotenv
+
+import config
+import http_client
+import latency_budget
+import tracing
 
 # --- Configuration ---
-dotenv.load_dotenv()
-API_KEY = os.getenv("SARVAM_API_KEY")
-API_URL = "https://api.sarvam.ai/v1/chat/completions"
+API_KEY = config.SARVAM_API_KEY
+API_PATH = "/v1/chat/completions"
 MODEL = "sarvam-m" 
 
-def chat_with_sarvam(chat_history):
+def chat_with_sarvam(chat_history, max_tokens: int = 50):
     """
     Sends a chat history to the Sarvam AI API and returns the response.
     """
@@ -20,10 +22,19 @@ def chat_with_sarvam(chat_history):
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json"
     }
-    payload = { "model": MODEL, "messages": chat_history, "temperature": 0.2, "max_tokens": 50 }
+    payload = { "model": MODEL, "messages": chat_history, "temperature": 0.2, "max_tokens": max_tokens }
+
+    with tracing.span("llm") as span:
+        # Hedged and cut short by the turn's latency budget; None if it ran out
+        ai_message = latency_budget.guarded_call("llm", _request_chat, headers, payload)
+        if ai_message is None:
+            span.tag(status="error")
+        return ai_message
 
+def _request_chat(headers: dict, payload: dict) -> str | None:
+    """Makes one chat completion request. Returns None if it failed."""
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=20)
+        response = http_client.post(API_PATH, headers=headers, json=payload)
         response.raise_for_status()
         response_data = response.json()
         ai_message = response_data['choices'][0]['message']['content']
@@ -32,6 +43,5 @@ def chat_with_sarvam(chat_history):
         print(f"[Error] A request error occurred: {req_err}")
     except Exception as e:
         print(f"[Error] An unexpected error occurred: {e}")
-        
     return None
 
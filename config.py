@@ -0,0 +1,16 @@
+"""
+Process-wide configuration, loaded once.
+
+Importing this module reads the .env file into the environment (variables that are
+already set win). Every module that reads settings imports it first instead of calling
+dotenv.load_dotenv() itself, then reads its own values in its "# --- Configuration ---"
+block as before.
+"""
+import os
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# --- Configuration ---
+SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
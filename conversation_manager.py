@@ -1,20 +1,106 @@
 import json
-import os
 import re
+import threading
+import uuid
 from datetime import datetime
 from typing import Any, Tuple # type hinting
 
 from chat import chat_with_sarvam
-from translate import translate_text
+from translate import translate_text, warm_translations
+from prompt_bundle import START_PROMPT_KEY, load_prompt_bundle
+from prefetch import PromptPrefetcher
+from number_parser import parse_number, parser_usage
+from gazetteer import get_gazetteer
+from submission_store import get_submission_store
+from validation_cache import ValidationCache, prompt_version
+import latency_budget
+import tracing
 
-DB_FILE = "db.json"
+NUMERIC_KEYS = ["askAge", "askPincode", "askExperience", "askLastSalary", "askExpectedSalary"]
+# LLM validation replies worth remembering; names are personal and rarely repeat
+CACHED_VALIDATION_KEYS = ["askRole", "askEducation", "askTravelDistance", "askCity"] + NUMERIC_KEYS
+# Free-text answers stored in normalized form, which callers often say the same way
+SEEDED_VALIDATION_KEYS = ["askRole", "askEducation", "askTravelDistance", "askCity"]
+
+# --- Multi-slot extraction ---
+MULTI_SLOT_MIN_WORDS = 4 # Shorter answers only ever hold the field that was asked for
+MULTI_SLOT_MAX_TOKENS = 200 # Room for a JSON object with every field
+SLOT_DESCRIPTIONS = {
+    "askName": "the person's full name",
+    "askPincode": "6-digit Indian pincode (integer)",
+    "askCity": "the Indian city they live in",
+    "askAge": "age in years (integer)",
+    "askGender": "Male, Female or Other",
+    "askEducation": "one of: 10th Pass, 12th Pass, Graduate, Post Graduate, Other",
+    "askExperience": "years of work experience (integer)",
+    "askLastSalary": "monthly salary in their last job, in rupees (integer)",
+    "askExpectedSalary": "monthly salary they expect, in rupees (integer)",
+    "askTravelDistance": "how far they will travel to work, e.g. 10 km",
+    "askRole": "the job they are looking for, as a standard job title",
+}
+FEMALE_WORDS = {"female", "femail", "woman", "girl", "she", "lady", "mahila", "aurat", "ladki", "stree",
+                "महिला", "औरत", "लड़की", "स्त्री"}
+MALE_WORDS = {"male", "mail", "man", "boy", "he", "purush", "aadmi", "ladka", "पुरुष", "आदमी", "लड़का"}
+
+# --- Rule-based fallbacks, used when the LLM fails or the turn's latency budget runs out ---
+LANGUAGE_KEYWORDS = {
+    'en-IN': ['english', 'angrezi', 'इंग्लिश', 'अंग्रेज़ी', 'अंग्रेजी'],
+    'hi-IN': ['hindi', 'हिंदी', 'हिन्दी'],
+    'bn-IN': ['bengali', 'bangla', 'বাংলা'],
+    'gu-IN': ['gujarati', 'ગુજરાતી'],
+    'kn-IN': ['kannada', 'ಕನ್ನಡ'],
+    'ml-IN': ['malayalam', 'മലയാളം'],
+    'mr-IN': ['marathi', 'मराठी'],
+    'od-IN': ['odia', 'oriya', 'ଓଡ଼ିଆ'],
+    'pa-IN': ['punjabi', 'ਪੰਜਾਬੀ'],
+    'ta-IN': ['tamil', 'tamizh', 'தமிழ்'],
+    'te-IN': ['telugu', 'తెలుగు'],
+}
+# Checked in order, so "post graduate" is not read as "graduate"
+EDUCATION_KEYWORDS = [
+    ("Post Graduate", ["post graduate", "postgraduate", "post graduation", "masters", "master's", "mba", "mca", "m.a", "m.sc", "m.com", "pg"]),
+    ("Graduate", ["graduate", "graduation", "bachelor", "degree", "b.a", "b.sc", "b.com", "btech", "b.tech", "bca"]),
+    ("12th Pass", ["12th", "12", "twelfth", "twelve", "barahvi", "intermediate", "hsc", "puc"]),
+    ("10th Pass", ["10th", "10", "tenth", "ten", "dasvi", "matric", "ssc"]),
+]
+NAME_LEAD_IN = re.compile(r"^(?:my name is|my name's|name is|i am|i'm|this is|it's|mera naam|main)\s+", re.IGNORECASE)
+NAME_TRAILER = re.compile(r"\s+(?:hai|hoon|hu|here)$", re.IGNORECASE)
+
+# --- Validation replies ---
+VALIDATION_MAX_TOKENS = 120 # Room for a reprompt in an Indic script, which takes more tokens
+VALIDATION_REPLY_FORMAT = """
+            Respond ONLY with one line in this format, with no other text:
+            {"status": "true", "value": "<the value, in English>", "reprompt": ""} if the response is valid, or
+            {"status": "false", "value": "", "reprompt": "<the reprompt>"} if it is not.
+            """
+VALIDATION_LANGUAGE_NOTE = """
+            The caller speaks {language}. Write the reprompt in {language}, in its native script, because it
+            is read out to them as it is. Always write the value in English.
+            """
+LANGUAGE_NAMES = {code: keywords[0].title() for code, keywords in LANGUAGE_KEYWORDS.items()}
+VERDICT_STATUSES = {"true": True, "valid": True, "yes": True, "false": False, "invalid": False, "no": False}
+# A field of a verdict that is not valid JSON: single quotes, bare words, or a reply cut off mid-string
+VERDICT_FIELD = re.compile(r"""["']?(status|value|reprompt)["']?\s*:\s*(?:"((?:[^"\\]|\\.)*)"|'([^']*)'|([^\s,}"'][^,}]*))""", re.IGNORECASE)
+VERDICT_LINE = re.compile(r"\b(true|false)\s*:\s*(.+)", re.IGNORECASE | re.DOTALL)
+
+validation_cache = ValidationCache()
 
 class ConversationManager:
     """
     Manages the state and flow of a structured conversation to gather user data,
     including input validation and normalization.
     """
-    def __init__(self, flow_script_path="conversation_flow.json"):
+    def __init__(self, flow_script_path="conversation_flow.json", pipeline: bool = False, synthesize_fn=None,
+                 submission_store=None, multi_slot: bool = False):
+        """
+        With `pipeline` enabled, the next prompt is translated (and synthesized with
+        `synthesize_fn(text, language_code)`, if given) in the background while the
+        caller answers the current one. See prefetch_next_prompt().
+        Completed submissions are appended to `submission_store`, by default the
+        process-wide store from submission_store.py.
+        With `multi_slot` enabled, longer answers are searched for every field that is
+        still missing, and the steps answered that way are skipped.
+        """
         with open(flow_script_path, 'r') as f:
             self.script = json.load(f)
         
@@ -26,12 +112,26 @@ class ConversationManager:
             "askExpectedSalary", "askTravelDistance", "askRole"
         ]
         
+        # Pre-translated prompts compiled by prompt_bundle.py; None if no bundle was built
+        self.prompt_bundle = load_prompt_bundle()
+        self.gazetteer = get_gazetteer()
+        self.submission_store = submission_store or get_submission_store()
+        self.multi_slot = multi_slot
+
+        self.prefetcher = PromptPrefetcher(self._localize_prompt, self._synthesize_unbundled(synthesize_fn)) if pipeline else None
+        self._prefetched_audio = None # (text, audio) of the last response served from a prefetch
+
+        self.session_id = uuid.uuid4().hex[:12] # Tags this conversation's trace spans; app.py uses the call SID
         self.user_data = {}
         self.current_step = 0
         self.is_complete = False
+        self.validation_fallback = None # "rules" or "reprompt" when the LLM last gave no verdict
         print("[INFO] ConversationManager initialized with validation logic.")
 
     def start_conversation(self) -> str:
+        bundled = self.prompt_bundle.get_text(self.user_language_code, START_PROMPT_KEY) if self.prompt_bundle else None
+        if bundled:
+            return bundled
         welcome_message = self.script.get("welcome", "Welcome!")
         first_question = self.script[self.flow_order[0]]
         return f"{welcome_message} {first_question}"
@@ -44,183 +144,524 @@ class ConversationManager:
             return self.script.get("goodbye", "Thank you!")
 
         current_key = self.flow_order[self.current_step]
-        is_valid, normalized_value, error_message = self._validate_and_normalize(user_input, current_key)
+        with self.trace_context(), latency_budget.turn():
+            return self._handle_response(user_input, current_key)
+
+    def trace_context(self):
+        """Tags trace spans started inside it with this session, the current step and the language."""
+        step = "done" if self.is_complete else self.flow_order[self.current_step]
+        return tracing.context(session=self.session_id, step=step, language=self.user_language_code)
+
+    def _handle_response(self, user_input: str, current_key: str) -> str:
+        self._prefetched_audio = None
+        with tracing.span("validate"):
+            filled = self._fill_slots(user_input, current_key) if self._wants_extraction(user_input, current_key) else []
+            if current_key in filled:
+                is_valid, normalized_value, error_message = (True, self.user_data[self._storage_key(current_key)], None)
+            else:
+                # Fields found along the way stay filled even if this one has to be asked again
+                is_valid, normalized_value, error_message = self._validate_and_normalize(user_input, current_key)
 
         if not is_valid:
+            # The prefetched prompt stays pending: it is still the next one once this step passes
             return error_message
 
         # If valid, store the normalized data
-        storage_key = current_key.replace("ask", "").lower()
-        self.user_data[storage_key] = normalized_value
+        self.user_data[self._storage_key(current_key)] = normalized_value
 
         if current_key == 'askLanguage':
             self.user_language_code = normalized_value
+        if current_key == 'askPincode':
+            self._prefill_from_pincode(normalized_value)
 
         self.current_step += 1
+        self._skip_filled_steps()
 
         if self.current_step >= len(self.flow_order):
             self.is_complete = True
             self._save_to_db()
-            goodbye_message = self.script.get("goodbye", "Thank you!")
-            return self._translate_if_needed(goodbye_message)
+            return self._take_prefetched("goodbye") or self._localize_prompt("goodbye", default="Thank you!")
         
         next_key = self.flow_order[self.current_step]
-        next_question = self.script[next_key]
-        return self._translate_if_needed(next_question)
+        next_question = self._take_prefetched(next_key) or self._localize_prompt(next_key)
+        if current_key == 'askLanguage':
+            # The next question is already translated; fetch the rest of the flow in the background
+            self.warm_translation_cache()
+        return next_question
     
-    def _translate_if_needed(self, text: str) -> str:
+    @staticmethod
+    def _storage_key(key: str) -> str:
+        return key.replace("ask", "").lower()
+
+    def _skip_filled_steps(self):
+        """Moves past steps whose answer is already known, e.g. a city derived from the pincode."""
+        while self.current_step < len(self.flow_order) and self._storage_key(self.flow_order[self.current_step]) in self.user_data:
+            print(f"[INFO] Skipping '{self.flow_order[self.current_step]}', already answered.")
+            self.current_step += 1
+
+    def _prefill_from_pincode(self, pincode: int):
+        """
+        Fills in the city when the exact pincode is known. A prefix only names the sorting
+        district, which may hold several towns, so then the district is kept as a hint and
+        askCity is still asked.
+        """
+        place = self.gazetteer.city_for_pincode(pincode)
+        if place:
+            self.user_data["city"] = place.city
+            print(f"[INFO] Pincode {pincode} is in {place.city}, {place.state}.")
+            return
+        districts = {place.district for place in self.gazetteer.lookup_pincode(pincode) or []}
+        if len(districts) == 1:
+            self.user_data["district"] = districts.pop()
+
+    def _wants_extraction(self, user_input: str, current_key: str) -> bool:
+        if not self.multi_slot or current_key not in SLOT_DESCRIPTIONS:
+            return False
+        return len(user_input.split()) >= MULTI_SLOT_MIN_WORDS
+
+    def _fill_slots(self, user_input: str, current_key: str) -> list:
+        """
+        Asks the LLM for every unfilled field mentioned in the answer, in one call, and stores
+        the ones that pass the usual checks. Returns the step keys that were filled.
+        """
+        wanted = [key for key in self.flow_order[self.current_step:]
+                  if key in SLOT_DESCRIPTIONS and self._storage_key(key) not in self.user_data]
+        message = [
+            {"role": "system", "content": self._get_extraction_prompt(wanted)},
+            {"role": "user", "content": user_input}
+        ]
+        print(f"[INFO] Using LLM to extract {len(wanted)} field(s) from input: '{user_input}'...")
+        slots = self._parse_slots(chat_with_sarvam(message, max_tokens=MULTI_SLOT_MAX_TOKENS))
+
+        filled = []
+        for key in wanted: # Flow order, so the pincode is stored before the city is checked against it
+            value = self._coerce_slot(key, slots.get(self._storage_key(key)))
+            if value is None:
+                continue
+            is_valid, normalized_value, _ = self._check_value(key, value)
+            if not is_valid:
+                continue
+            self.user_data[self._storage_key(key)] = normalized_value
+            filled.append(key)
+            if key == "askPincode" and "city" not in self.user_data:
+                self._prefill_from_pincode(normalized_value)
+        if filled:
+            print(f"[INFO] Filled {', '.join(filled)} from one answer.")
+        tracing.tag_current(slots_filled=len(filled))
+        return filled
+
+    def _get_extraction_prompt(self, keys: list) -> str:
+        """Returns the system prompt asking for the given fields as one JSON object."""
+        fields = "\n".join(f"- {self._storage_key(key)}: {SLOT_DESCRIPTIONS[key]}" for key in keys)
+        return f"""
+            You are a data extraction expert for an Indian job portal.
+            The user is answering a registration question and may mention several details at once.
+            Extract every one of these fields that the user clearly states:
+            {fields}
+            Respond ONLY with a JSON object using these keys, for example {{"name": "Ravi Kumar", "age": 24}}.
+            Leave out any field the user did not mention; never guess. If nothing is found, respond with {{}}.
+            """
+
+    @staticmethod
+    def _parse_slots(response: str | None) -> dict:
+        """Reads the JSON object out of the LLM reply, ignoring any text around it."""
+        if not response:
+            return {}
+        response = response.rsplit("</think>", 1)[-1]
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end < start:
+            return {}
+        try:
+            slots = json.loads(response[start:end + 1])
+        except json.JSONDecodeError:
+            print(f"[WARNING] Could not parse extracted fields: {response}")
+            return {}
+        return slots if isinstance(slots, dict) else {}
+
+    @staticmethod
+    def _coerce_slot(key: str, value: Any) -> Any:
+        """Brings an extracted value into the form the step stores, or None if it does not fit."""
+        if value is None or isinstance(value, bool):
+            return None
+        if key in NUMERIC_KEYS:
+            if isinstance(value, int):
+                return value
+            if isinstance(value, float):
+                return int(value) if value.is_integer() else None
+            parsed = parse_number(str(value), key)
+            return parsed.value if parsed.confident else None
+        if key == "askGender":
+            return ConversationManager._normalize_gender(str(value))
+        value = str(value).strip()
+        return value or None
+
+    @staticmethod
+    def _normalize_gender(text: str) -> str | None:
+        text = text.lower()
+        words = set(re.findall(r"\w+", text))
+        # \w splits Indic words at vowel signs, so those are matched as substrings
+        said = lambda vocabulary: bool(words & vocabulary) or any(word in text for word in vocabulary if not word.isascii())
+        # Female first: several female words contain a male one ("female", "woman", "she")
+        if said(FEMALE_WORDS):
+            return "Female"
+        if said(MALE_WORDS):
+            return "Male"
+        if "other" in words:
+            return "Other"
+        return None
+
+    def prefetch_next_prompt(self):
+        """
+        In pipeline mode, starts preparing the prompt that follows the current step so it is
+        ready the moment validation passes. Call it right before listening for the answer.
+        """
+        if not self.prefetcher or self.is_complete:
+            return
+        if self.flow_order[self.current_step] == 'askLanguage':
+            return # The language of the next prompt is not known yet
+        next_step = self.current_step + 1
+        while next_step < len(self.flow_order) and self._storage_key(self.flow_order[next_step]) in self.user_data:
+            next_step += 1
+        next_key = self.flow_order[next_step] if next_step < len(self.flow_order) else "goodbye"
+        self.prefetcher.start(next_key, self.user_language_code)
+
+    def take_prefetched_audio(self, text: str):
+        """Returns the synthesized audio prepared for `text` by the prefetcher, if any."""
+        if self._prefetched_audio and self._prefetched_audio[0] == text:
+            return self._prefetched_audio[1]
+        return None
+
+    def _take_prefetched(self, key: str) -> str | None:
+        if not self.prefetcher:
+            return None
+        prefetched = self.prefetcher.take(key, self.user_language_code)
+        if not prefetched:
+            return None
+        self._prefetched_audio = prefetched
+        return prefetched[0]
+
+    def _synthesize_unbundled(self, synthesize_fn):
+        """Wraps synthesize_fn so prompts that already have bundled audio are not synthesized again."""
+        if synthesize_fn is None:
+            return None
+        def synthesize(text: str, language_code: str):
+            if self.prompt_bundle and self.prompt_bundle.find_audio(language_code, text) is not None:
+                return None
+            return synthesize_fn(text, language_code)
+        return synthesize
+
+    def close(self):
+        """Stops any background prefetch work."""
+        if self.prefetcher:
+            print(f"[INFO] Prompt prefetch stats: {self.prefetcher.stats()}")
+            self.prefetcher.shutdown()
+
+    def warm_translation_cache(self, blocking: bool = False):
+        """
+        Pre-translates every fixed string of the flow script into the user's language,
+        so later prompts and reprompts are served from the translation cache.
+        Runs in a background thread unless `blocking` is set.
+        """
+        if self.user_language_code == 'en-IN':
+            return
+        if self.prompt_bundle and self.user_language_code in self.prompt_bundle.languages:
+            return # Every flow prompt is already pre-translated in the bundle
+        flow_strings = [text for text in self.script.values() if isinstance(text, str)]
+        if blocking:
+            warm_translations(flow_strings, self.user_language_code)
+            return
+        threading.Thread(target=warm_translations, args=(flow_strings, self.user_language_code), daemon=True).start()
+
+    def _localize_prompt(self, key: str, language_code: str | None = None, default: str | None = None) -> str | None:
+        """Returns a flow script prompt in the user's language, preferring the prompt bundle."""
+        language_code = language_code or self.user_language_code
+        if self.prompt_bundle:
+            bundled = self.prompt_bundle.get_text(language_code, key)
+            if bundled:
+                return bundled
+        text = self.script.get(key, default)
+        return self._translate_if_needed(text, language_code) if text else text
+
+    def _translate_if_needed(self, text: str, language_code: str | None = None) -> str:
         """Helper function to translate text if user's language is not English."""
-        if self.user_language_code != 'en-IN':
-            return translate_text(text, self.user_language_code)
+        language_code = language_code or self.user_language_code
+        if language_code != 'en-IN':
+            return translate_text(text, language_code)
         return text
     
     def _get_llm_validation_prompt(self, key: str) -> str:
-        """Returns the system prompt for a specific validation task."""
+        """
+        Returns the system prompt for a specific validation task, as sent for English callers;
+        _validate_with_llm() adds the caller's language for the others.
+        """
         if key == "askName":
-            return """
+            task = """
             You are a data validation expert. Analyze the user's response to extract a person's full name.
-            If a valid name is found, respond ONLY with `true: <Full Name>`.
-            Example 1: User says 'my name is Vikram Singh'. Respond `true: Vikram Singh`.
-            Example 2: User says 'xoxo'. Respond `true: Xoxo`.
-            If no name can be extracted, or if the input is nonsensical, respond ONLY with `false: That does not sound like a valid name. Please tell me your full name.`.
+            Example 1: User says 'my name is Vikram Singh'. The value is `Vikram Singh`.
+            Example 2: User says 'xoxo'. The value is `Xoxo`.
+            If no name can be extracted, or if the input is nonsensical, the response is not valid.
+            Reprompt: `That does not sound like a valid name. Please tell me your full name.`
             """
-        if key in ["askAge", "askPincode", "askExperience", "askLastSalary", "askExpectedSalary"]:
-            return """
+        elif key in NUMERIC_KEYS:
+            task = """
             You are a data validation expert. Analyze the user's response to extract a single numerical value.
-            Convert spoken numbers, digits, and Indian number formats into an integer.
-            If a valid number is found, respond ONLY with `true: <integer>`.
-            Example 1: User says 'pachas hazaar'. Respond `true: 50000`.
-            Example 2: User says 'twenty five'. Respond `true: 25`.
-            Example 3: User says '1,20,000'. Respond `true: 120000`.
-            Example 4: User says 'sixteen'. Respond `true: 16`.
-            Example 5: User says '560001'. Respond `true: 560001`.
-            Example 6: User says '2 year of experience'. Respond `true: 2`.
-            Example 7: User says 'I have five years experience'. Respond `true: 5`.
-            If no valid number can be extracted, respond ONLY with `false: I did not understand that as a number. Please state the number clearly.`.
+            Convert spoken numbers, digits, and Indian number formats into an integer; the value is that integer.
+            Example 1: User says 'pachas hazaar'. The value is `50000`.
+            Example 2: User says 'twenty five'. The value is `25`.
+            Example 3: User says '1,20,000'. The value is `120000`.
+            Example 4: User says 'sixteen'. The value is `16`.
+            Example 5: User says '560001'. The value is `560001`.
+            Example 6: User says '2 year of experience'. The value is `2`.
+            Example 7: User says 'I have five years experience'. The value is `5`.
+            If no valid number can be extracted, the response is not valid.
+            Reprompt: `I did not understand that as a number. Please state the number clearly.`
             """
-        if key == "askCity":
-            return """
+        elif key == "askCity":
+            task = """
             You are a data validation expert for an Indian job portal.
-            Analyze the user's response to identify a single city name in India.
-            If a valid Indian city name is found, respond ONLY with `true: <City Name>`.
-            If no valid city name can be extracted, respond ONLY with `false: That does not seem to be a valid city in India. Please tell me your current city.`.
+            Analyze the user's response to identify a single city name in India; the value is the city name.
+            If no valid Indian city name can be extracted, the response is not valid.
+            Reprompt: `That does not seem to be a valid city in India. Please tell me your current city.`
             """
-        if key == "askRole":
-            return f"""
+        elif key == "askRole":
+            task = """
             You are a data validation expert for a job portal in India.
-            Analyze the user's stated job role. Normalize it to a standard job title.
-            If the input is a valid job, respond ONLY with `true: <Standard Job Title>`.
-            If the input is not a valid job role, respond ONLY with `false: I did not recognize that as a job role. Please tell me the type of job you are looking for.`.
+            Analyze the user's stated job role. Normalize it to a standard job title; the value is that title.
+            If the input is not a valid job role, the response is not valid.
+            Reprompt: `I did not recognize that as a job role. Please tell me the type of job you are looking for.`
             """
-        if key == "askEducation":
-            return """
+        elif key == "askEducation":
+            task = """
             You are a data validation expert. Analyze the user's education level.
-            Normalize it to one of: 10th Pass, 12th Pass, Graduate, Post Graduate, Other.
-            If valid, respond ONLY with `true: <Normalized Level>`.
-            If invalid or unclear, respond ONLY with `false: Please state a valid education level, like 12th pass or graduate.`.
+            Normalize it to one of: 10th Pass, 12th Pass, Graduate, Post Graduate, Other; the value is that level.
+            If invalid or unclear, the response is not valid.
+            Reprompt: `Please state a valid education level, like 12th pass or graduate.`
             """
-        if key == "askTravelDistance":
-            return """
+        elif key == "askTravelDistance":
+            task = """
             You are a data validation expert. Analyze the user's travel distance preference.
-            Extract and normalize the distance.
-            If valid, respond ONLY with `true: <Normalized Distance>`.
-            If invalid or unclear, respond ONLY with `false: I did not understand the distance. Please tell me how far you are willing to travel, for example, 10 to 20 kilometers.`.
+            Extract and normalize the distance; the value is the normalized distance.
+            If invalid or unclear, the response is not valid.
+            Reprompt: `I did not understand the distance. Please tell me how far you are willing to travel, for example, 10 to 20 kilometers.`
             """
-        return ""
+        else:
+            return ""
+        return task + VALIDATION_REPLY_FORMAT
 
     def _validate_and_normalize(self, text: str, key: str) -> Tuple[bool, Any, str | None]:
         """
         Validates input using rules for simple types and LLM for complex types.
         """
+        self.validation_fallback = None
 
         # --- RULE-BASED VALIDATION for Language Selection ---
         if key == "askLanguage":
             text_lower = text.lower()
-            lang_map = {
-                'en-IN': ['english', 'angrezi'],
-                'hi-IN': ['hindi'],
-                'bn-IN': ['bengali', 'bangla'],
-                'gu-IN': ['gujarati'],
-                'kn-IN': ['kannada'],
-                'ml-IN': ['malayalam'],
-                'mr-IN': ['marathi'],
-                'od-IN': ['odia', 'oriya'],
-                'pa-IN': ['punjabi'],
-                'ta-IN': ['tamil', 'tamizh'],
-                'te-IN': ['telugu'],
-            }
-            for code, keywords in lang_map.items():
+            for code, keywords in LANGUAGE_KEYWORDS.items():
                 if any(keyword in text_lower for keyword in keywords):
                     return (True, code, None)
             return (False, None, self.script.get("repromptLanguage"))
         
+        # --- LOCAL NUMBER PARSING, the LLM is only used when the parser is unsure ---
+        if key in NUMERIC_KEYS:
+            parsed = parse_number(text, key)
+            parser_usage.record(key, skipped_llm=parsed.confident)
+            if parsed.confident:
+                print(f"[INFO] Parsed '{key}' locally from input: '{text}' -> {parsed.value}")
+                return self._check_value(key, parsed.value)
+
+        # --- OFFLINE CITY LOOKUP, the LLM is only used for cities not in the gazetteer ---
+        if key == "askCity":
+            place = self.gazetteer.match_city(text)
+            if place:
+                print(f"[INFO] Resolved city locally from input: '{text}' -> {place.city}")
+                return self._check_value(key, place.city)
+
         # --- LLM VALIDATION FOR ALL COMPLEX AND NUMERIC FIELDS ---
         if key in ["askName", "askRole", "askEducation", "askTravelDistance", "askAge", "askPincode", "askExperience", "askLastSalary", "askExpectedSalary", "askCity"]:
-            system_prompt = self._get_llm_validation_prompt(key)
-            message = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ]
-            print(f"[INFO] Using LLM to validate '{key}' for input: '{text}'...")
-            response = chat_with_sarvam(message)
-            
-            if response and ':' in response:
-                parts = response.split(':', 1)
-                status = parts[0].strip().lower()
-                value_str = parts[1].strip()
-                
-                if status == 'true':
-                    value = None
-                    # For numeric fields, try to cast to int
-                    if "Pincode" in key or "Age" in key or "Salary" in key or "Experience" in key:
-                        try:
-                            value = int(value_str)
-                        except ValueError:
-                             pass
-                    else:
-                        value = value_str # For other fields, keep as string
-
-                    if value is not None:
-                        # --- SECONDARY RULE-BASED CHECKS on LLM output ---
-                        if key == "askAge" and (value < 18 or value > 80):
-                            return (False, None, self._translate_if_needed(self.script.get("repromptAge")))
-                        if key == "askPincode" and len(str(value)) != 6:
-                            return (False, None, self._translate_if_needed(self.script.get("repromptPincode")))
-                        return (True, value, None) 
-                else:
-                    return (False, None, self._translate_if_needed(value_str)) # use llm response as reprompt message
+            response = self._validate_with_llm(key, text)
+            status, value, reprompt = self._parse_verdict(response, key)
+
+            if status is True:
+                return self._check_value(key, value)
+            if status is False:
+                if reprompt:
+                    return (False, None, self._localize_reprompt(reprompt))
+            elif response is None:
+                # The LLM failed, its breaker is open or the turn ran out of time: don't waste the turn
+                fallback = self._validate_with_rules(text, key)
+                self.validation_fallback = "rules" if fallback is not None else "reprompt"
+                if fallback is not None:
+                    latency_budget.record_fallback("validation_rules")
+                    tracing.tag_current(fallback="rules")
+                    return fallback
+                latency_budget.record_fallback("reprompt")
 
             # If LLM fails, returns false, or value is None, use the specific reprompt key
             reprompt_key = f"reprompt{key.replace('ask', '')}"
-            return (False, None, self._translate_if_needed(self.script.get(reprompt_key, "Please try again.")))
+            return (False, None, self._localize_prompt(reprompt_key, default="Please try again."))
 
         # --- RULE-BASED VALIDATION FOR SIMPLEST FIELDS ---
         text_cleaned = text.lower().strip().rstrip('.')
         
         if key == "askGender":
-            if any(word in text_cleaned for word in ["mail", "male", 'man', 'boy', 'he']): return (True, "Male", None)
-            if any(word in text_cleaned for word in ["femail", "female", 'woman', 'girl', 'she']): return (True, "Male", None)
-            if "other" in text_cleaned: return (True, "Other", None)
-            return (False, None, self._translate_if_needed(self.script.get("repromptGender")))
+            gender = self._normalize_gender(text_cleaned)
+            if gender: return (True, gender, None)
+            return (False, None, self._localize_prompt("repromptGender"))
             
         # For Name and City
         return (True, text_cleaned.title(), None)
     
-    def _save_to_db(self):
-        print(f"[INFO] Saving user data to {DB_FILE}...")
-        self.user_data["submission_timestamp"] = datetime.now().isoformat()
-        all_users = []
-        if os.path.exists(DB_FILE):
+    def _validate_with_rules(self, text: str, key: str) -> Tuple[bool, Any, str | None] | None:
+        """
+        Local stand-in for LLM validation. Returns None when the rules cannot tell, so the
+        caller is asked again. Values are stored as said, without the LLM's normalization.
+        """
+        text_cleaned = " ".join(text.strip().rstrip('.').split())
+        if not text_cleaned:
+            return None
+        if key in NUMERIC_KEYS or key == "askTravelDistance":
+            numbers = re.findall(r"\d+", re.sub(r"(?<=\d),(?=\d)", "", text_cleaned))
+            if len(numbers) != 1:
+                return None # parse_number was already unsure about the words
+            if key == "askTravelDistance":
+                return (True, f"{numbers[0]} km", None)
+            return self._check_value(key, int(numbers[0]))
+        if key == "askEducation":
+            words = " ".join(re.findall(r"[\w.']+", text_cleaned.lower()))
+            for level, keywords in EDUCATION_KEYWORDS:
+                if any(re.search(rf"(?<![\w.]){re.escape(keyword)}(?![\w])", words) for keyword in keywords):
+                    return (True, level, None)
+            return None
+        if key == "askName":
+            name = NAME_TRAILER.sub("", NAME_LEAD_IN.sub("", text_cleaned))
+            return (True, name.title(), None) if name else None
+        if key == "askCity":
+            return self._check_value(key, text_cleaned.title())
+        if key == "askRole":
+            return (True, text_cleaned.title(), None)
+        return None
+
+    def _validate_with_llm(self, key: str, text: str) -> str | None:
+        """
+        Returns the LLM's verdict on the answer, from the validation cache when possible.
+        For callers who do not speak English, the same call writes the reprompt in their
+        language, so a failed answer needs no translation round trip. Their verdicts are
+        cached under "<key>:<language>", versioned on the localized prompt actually sent.
+        """
+        base_prompt = self._get_llm_validation_prompt(key)
+        language = self.user_language_code
+        system_prompt = base_prompt
+        step = key
+        if language != 'en-IN':
+            system_prompt += VALIDATION_LANGUAGE_NOTE.format(language=LANGUAGE_NAMES.get(language, language))
+            step = f"{key}:{language}"
+        version = prompt_version(system_prompt)
+        cacheable = key in CACHED_VALIDATION_KEYS
+        if cacheable:
+            cached = None
+            if step != key:
+                # Accepted English verdicts (seeded ones included) hold for any language; their rejections are in English
+                cached = validation_cache.get(key, prompt_version(base_prompt), text)
+                if cached is not None and self._parse_verdict(cached, key)[0] is not True:
+                    cached = None
+            if cached is None:
+                cached = validation_cache.get(step, version, text)
+            if cached is not None:
+                print(f"[INFO] Validation cache hit for '{key}' on input: '{text}' -> {cached}")
+                tracing.tag_current(cache="hit")
+                return cached
+
+        message = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
+        print(f"[INFO] Using LLM to validate '{key}' for input: '{text}'...")
+        response = chat_with_sarvam(message, max_tokens=VALIDATION_MAX_TOKENS)
+        # Only well-formed verdicts are cached; failed calls and garbled replies are retried next time
+        if cacheable and self._parse_verdict(response, key)[0] is not None:
+            validation_cache.put(step, version, text, response)
+        return response
+
+    @staticmethod
+    def _parse_verdict(response: str | None, key: str) -> Tuple[bool | None, Any, str | None]:
+        """
+        Reads (status, value, reprompt) out of a validation reply: the JSON verdict, even when
+        it is wrapped in text, quoted loosely or cut short, or a legacy `true: ...`/`false: ...`
+        line (cached and seeded entries). status is None when the reply says neither; an
+        accepted answer always comes with a value in the step's stored form.
+        """
+        if not response:
+            return (None, None, None)
+        reply = response.rsplit("</think>", 1)[-1].strip()
+        fields = None
+        start, end = reply.find("{"), reply.rfind("}")
+        if start != -1 and end > start:
             try:
-                with open(DB_FILE, 'r') as f:
-                    all_users = json.load(f)
-                if not isinstance(all_users, list):
-                    all_users = []
+                fields = json.loads(reply[start:end + 1])
             except json.JSONDecodeError:
-                all_users = []
-        
-        all_users.append(self.user_data)
-        with open(DB_FILE, 'w') as f:
-            json.dump(all_users, f, indent=4)
-        print("[INFO] Data saved successfully.")
+                pass
+        if not isinstance(fields, dict) and start != -1:
+            fields = {match[0].lower(): next((v for v in match[1:] if v), "") for match in VERDICT_FIELD.findall(reply[start:])}
+        if not isinstance(fields, dict) or not fields:
+            match = VERDICT_LINE.search(reply)
+            if not match:
+                print(f"[WARNING] Could not parse validation reply: {response}")
+                return (None, None, None)
+            said = match.group(2).strip().strip('`"\' ')
+            fields = {"status": match.group(1), "value" if match.group(1).lower() == "true" else "reprompt": said}
+
+        status = str(fields.get("status", fields.get("valid", ""))).strip().strip('`"\' ').lower()
+        if status not in VERDICT_STATUSES:
+            print(f"[WARNING] Validation reply has no status: {response}")
+            return (None, None, None)
+        reprompt = fields.get("reprompt")
+        reprompt = reprompt.strip() if isinstance(reprompt, str) and reprompt.strip() else None
+        if not VERDICT_STATUSES[status]:
+            return (False, None, reprompt)
+        value = ConversationManager._coerce_slot(key, fields.get("value"))
+        if value is None: # Accepted, but with nothing usable to store
+            return (None, None, None)
+        return (True, value, None)
+
+    def _localize_reprompt(self, reprompt: str) -> str:
+        """The LLM's reprompt in the caller's language; translated only if it still came back in English."""
+        if self.user_language_code != 'en-IN' and reprompt.isascii():
+            return self._translate_if_needed(reprompt)
+        return reprompt
+
+    def seed_validation_cache(self, records, min_occurrences: int | None = None) -> int:
+        """Pre-seeds the validation cache with common answers from stored submissions."""
+        prompts = {key: self._get_llm_validation_prompt(key) for key in SEEDED_VALIDATION_KEYS}
+        fields = {key: self._storage_key(key) for key in SEEDED_VALIDATION_KEYS}
+        if min_occurrences is None:
+            return validation_cache.seed(records, prompts, fields)
+        return validation_cache.seed(records, prompts, fields, min_occurrences)
 
+    def _check_value(self, key: str, value: Any) -> Tuple[bool, Any, str | None]:
+        """Secondary rule-based checks on a value extracted by the parser or the LLM."""
+        if key == "askAge" and (value < 18 or value > 80):
+            return (False, None, self._localize_prompt("repromptAge"))
+        if key == "askPincode" and self.gazetteer.lookup_pincode(value) is None:
+            return (False, None, self._localize_prompt("repromptPincode"))
+        if key == "askCity":
+            place = self.gazetteer.match_city(value)
+            if place is None:
+                return (True, value, None) # Not in the gazetteer; trust the LLM
+            pincode = self.user_data.get("pincode")
+            if pincode is not None and not self.gazetteer.city_matches_pincode(place, self.gazetteer.lookup_pincode(pincode) or []):
+                # Asked once; the caller cannot change the pincode from here, so the second answer is kept and flagged
+                if not self.user_data.get("city_pincode_mismatch"):
+                    self.user_data["city_pincode_mismatch"] = True
+                    return (False, None, self._localize_prompt("repromptCityMismatch"))
+                print(f"[WARNING] City '{place.city}' does not match pincode {pincode}; stored with a flag for review.")
+                return (True, place.city, None)
+            self.user_data.pop("city_pincode_mismatch", None)
+            return (True, place.city, None)
+        return (True, value, None)
+
+    def _save_to_db(self):
+        print(f"[INFO] Saving user data to {self.submission_store.path}...")
+        self.user_data["submission_timestamp"] = datetime.now().isoformat()
+        if self.submission_store.append(self.user_data):
+            print("[INFO] Data saved successfully.")
@@ -1,6 +1,182 @@
-import os
-from flask import Flask, request, Response
-import dotenv
-from conversation_manager import ConversationManager
+"""
+Exotel Voicebot stream protocol.
 
-dotenv.load_dotenv()
\ No newline at end of file
+When a call reaches a Voicebot applet, Exotel opens a websocket to our server and sends
+JSON events: "connected", "start" (call details and media format), "media" (base64
+16-bit mono PCM, 8 kHz by default), "dtmf", "mark" (playback of our audio reached a mark
+we sent) and "stop". We answer with "media" events carrying audio to play, "mark"
+events to learn when playback finished, and "clear" to cut playback short.
+
+FakeExotelCall plays the Exotel side of one call, for load testing without a phone line.
+"""
+import asyncio
+import base64
+import json
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+from websockets.protocol import State
+
+# --- Configuration ---
+EXOTEL_SAMPLE_RATE = 8000
+MEDIA_CHUNK_MS = 100  # Exotel expects media payloads in multiples of 320 bytes
+
+
+@dataclass
+class StreamStart:
+    stream_sid: str
+    call_sid: str
+    account_sid: str = ""
+    from_number: str = ""
+    to_number: str = ""
+    sample_rate: int = EXOTEL_SAMPLE_RATE
+    custom_parameters: dict = field(default_factory=dict)
+
+
+def parse_event(raw_message) -> dict:
+    """Decodes one websocket message; returns {} for anything that is not a JSON event."""
+    try:
+        message = json.loads(raw_message)
+    except (TypeError, ValueError):
+        return {}
+    return message if isinstance(message, dict) else {}
+
+
+def parse_start(message: dict) -> StreamStart:
+    start = message.get("start", {})
+    media_format = start.get("media_format", {})
+    return StreamStart(
+        stream_sid=message.get("stream_sid") or start.get("stream_sid", ""),
+        call_sid=start.get("call_sid", ""),
+        account_sid=start.get("account_sid", ""),
+        from_number=start.get("from", ""),
+        to_number=start.get("to", ""),
+        sample_rate=int(media_format.get("sample_rate") or EXOTEL_SAMPLE_RATE),
+        custom_parameters=start.get("custom_parameters", {}),
+    )
+
+
+def decode_media(message: dict) -> bytes:
+    return base64.b64decode(message.get("media", {}).get("payload", ""))
+
+
+def media_messages(stream_sid: str, pcm, sample_rate: int, chunk_ms: int = MEDIA_CHUNK_MS) -> list:
+    """Splits 16-bit PCM into "media" events of `chunk_ms` each."""
+    chunk_bytes = 2 * sample_rate * chunk_ms // 1000
+    pcm = memoryview(pcm).cast("B")
+    return [
+        json.dumps({
+            "event": "media",
+            "stream_sid": stream_sid,
+            "media": {"payload": base64.b64encode(pcm[offset:offset + chunk_bytes]).decode("ascii")},
+        })
+        for offset in range(0, len(pcm), chunk_bytes)
+    ]
+
+
+def mark_message(stream_sid: str, name: str) -> str:
+    return json.dumps({"event": "mark", "stream_sid": stream_sid, "mark": {"name": name}})
+
+
+def clear_message(stream_sid: str) -> str:
+    return json.dumps({"event": "clear", "stream_sid": stream_sid})
+
+
+def synthetic_utterance(seconds: float, sample_rate: int = EXOTEL_SAMPLE_RATE, trailing_silence: float = 1.0) -> bytes:
+    """A voiced tone followed by silence: enough for voice activity detection to find one utterance."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = 6000 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    silence = np.zeros(int(trailing_silence * sample_rate))
+    return np.concatenate((voiced, silence)).astype(np.int16).tobytes()
+
+
+class FakeExotelCall:
+    """
+    Exotel's side of one call: starts the stream, waits for each bot prompt to finish
+    playing, then speaks `turns` utterances. Media is paced at `speed` times real time.
+    Records the response latency of each turn: from the end of the caller's speech to the
+    first audio of the bot's answer (endpointing included, as the caller hears it).
+    """
+    def __init__(self, url: str, call_sid: str, turns: int, sample_rate: int = EXOTEL_SAMPLE_RATE,
+                 utterance_seconds: float = 0.8, speed: float = 1.0, timeout: float = 60.0):
+        self.url = url
+        self.call_sid = call_sid
+        self.stream_sid = f"stream-{call_sid}"
+        self.turns = turns
+        self.sample_rate = sample_rate
+        self.utterance_seconds = utterance_seconds
+        self.utterance = synthetic_utterance(utterance_seconds, sample_rate)
+        self.speed = speed
+        self.timeout = timeout
+        self.response_latencies = []
+        self.turns_completed = 0
+        self.error = None
+
+    async def run(self):
+        try:
+            async with connect(self.url, max_size=None) as websocket:
+                events = asyncio.Queue()
+                reader = asyncio.create_task(self._read(websocket, events))
+                try:
+                    await self._converse(websocket, events)
+                finally:
+                    reader.cancel()
+        except Exception as e:
+            self.error = e
+        return self
+
+    async def _converse(self, websocket, events: asyncio.Queue):
+        await websocket.send(json.dumps({"event": "connected"}))
+        await websocket.send(json.dumps({
+            "event": "start",
+            "stream_sid": self.stream_sid,
+            "start": {
+                "stream_sid": self.stream_sid, "call_sid": self.call_sid, "account_sid": "load-test",
+                "from": "+910000000000", "to": "+910000000001",
+                "media_format": {"encoding": "raw/slin", "sample_rate": str(self.sample_rate), "bit_rate": "128kbps"},
+            },
+        }))
+        await asyncio.wait_for(self._wait_for_prompt(events), self.timeout)
+        for _ in range(self.turns):
+            speech_ended_at = await self._speak(websocket)
+            first_audio_at = await asyncio.wait_for(self._wait_for_prompt(events), self.timeout)
+            self.response_latencies.append(first_audio_at - speech_ended_at)
+            self.turns_completed += 1
+        if websocket.state is State.OPEN: # The bot hangs up by itself after its goodbye
+            await websocket.send(json.dumps({"event": "stop", "stream_sid": self.stream_sid}))
+
+    async def _speak(self, websocket) -> float:
+        """Sends the utterance and its trailing silence; returns when the voiced part ended."""
+        chunk_seconds = MEDIA_CHUNK_MS / 1000
+        started = time.perf_counter()
+        for message in media_messages(self.stream_sid, self.utterance, self.sample_rate):
+            await websocket.send(message)
+            await asyncio.sleep(chunk_seconds / self.speed)
+        return started + self.utterance_seconds / self.speed
+
+    async def _read(self, websocket, events: asyncio.Queue):
+        try:
+            async for raw_message in websocket:
+                message = parse_event(raw_message)
+                if message.get("event") == "mark":
+                    # Playback is instant here: acknowledge the mark straight away, as Exotel would once played
+                    await websocket.send(raw_message)
+                await events.put((time.perf_counter(), message))
+        except ConnectionClosed:
+            pass
+        await events.put((time.perf_counter(), None))
+
+    async def _wait_for_prompt(self, events: asyncio.Queue) -> float:
+        """Waits until the bot has sent a prompt and its closing mark; returns when its audio started."""
+        first_audio_at = None
+        while True:
+            received_at, message = await events.get()
+            if message is None:
+                raise ConnectionError("Bot closed the stream")
+            if message.get("event") == "media" and first_audio_at is None:
+                first_audio_at = received_at
+            elif message.get("event") == "mark":
+                return first_audio_at or received_at
@@ -0,0 +1,114 @@
+"""
+Offline pincode and city lookup for the askPincode / askCity steps.
+
+The bundled table (data/india_cities.csv) maps the 3-digit sorting-district prefix of a
+pincode to its city, district and state, and lists common alternative names for each
+city. A prefix covers a whole sorting district, towns around the city included, so only
+the full 6-digit pincodes listed for a city pin down the city.
+
+City names are matched on a phonetic key with fuzzy fallback, so STT spellings such as
+"Banglore" or "Bengalooru" still resolve. Pincodes outside the table are checked against
+the valid postal circle ranges.
+"""
+import csv
+import difflib
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+# --- Configuration ---
+CITY_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "india_cities.csv")
+FUZZY_CUTOFF = 0.85
+MAX_CITY_WORDS = 3
+
+# First two digits of every pincode in use (postal circles; 90-99 is the Army Postal Service)
+VALID_PINCODE_CIRCLES = (
+    {11, 12, 13, 14, 15, 16, 17, 18, 19}
+    | set(range(20, 29)) | set(range(30, 35)) | set(range(36, 54))
+    | set(range(56, 80)) | set(range(80, 86)) | set(range(90, 100))
+)
+
+
+@dataclass(frozen=True)
+class Place:
+    city: str
+    district: str
+    state: str
+
+
+def phonetic_key(name: str) -> str:
+    """Normalizes a place name for matching: 'Bengalooru', 'bengaluru' and 'Bengaluru.' agree."""
+    key = re.sub(r"[^a-z]", "", name.lower())
+    key = key.replace("ee", "i").replace("oo", "u").replace("w", "v").replace("ph", "f")
+    key = re.sub(r"([kgcjtdpb])h", r"\1", key) # aspirated consonants: 'Dharwad' ~ 'Darwad'
+    return re.sub(r"(.)\1+", r"\1", key)
+
+
+class Gazetteer:
+    """In-memory pincode-prefix and city-name index."""
+    def __init__(self, data_file: str = CITY_DATA_FILE):
+        self.by_prefix = {}   # "560" -> [Place, ...]
+        self.by_pincode = {}  # "560001" -> Place
+        self.by_key = {}      # phonetic key -> Place
+        with open(data_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                place = Place(row["city"], row["district"], row["state"])
+                for prefix in row["pincode_prefixes"].split("|"):
+                    self.by_prefix.setdefault(prefix, []).append(place)
+                for pincode in filter(None, (row.get("pincodes") or "").split("|")):
+                    self.by_pincode[pincode] = place
+                for name in [row["city"], *filter(None, row["aliases"].split("|"))]:
+                    self.by_key.setdefault(phonetic_key(name), place)
+        self._keys = list(self.by_key)
+
+    def lookup_pincode(self, pincode) -> list | None:
+        """
+        Returns the places a pincode belongs to: a non-empty list if it is in the table, an
+        empty list if it is valid but not in the table, or None if it cannot be a pincode.
+        """
+        digits = str(pincode)
+        if not re.fullmatch(r"[1-9]\d{5}", digits) or int(digits[:2]) not in VALID_PINCODE_CIRCLES:
+            return None
+        return list(self.by_prefix.get(digits[:3], []))
+
+    def city_for_pincode(self, pincode) -> Place | None:
+        """The city of a pincode listed in full in the table; None for pincodes only known by prefix."""
+        return self.by_pincode.get(str(pincode))
+
+    def match_city(self, text: str) -> Place | None:
+        """Finds a known city mentioned in an utterance ('I live in banglore' -> Bengaluru)."""
+        words = re.findall(r"[^\W\d_]+", text.lower())
+        candidates = []
+        # Longest phrases first, so 'navi mumbai' wins over 'mumbai'
+        for size in range(min(MAX_CITY_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                key = phonetic_key("".join(words[start:start + size]))
+                if key in self.by_key:
+                    return self.by_key[key]
+                if len(key) >= 4:
+                    candidates.append(key)
+        for key in candidates:
+            close = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                return self.by_key[close[0]]
+        return None
+
+    @staticmethod
+    def city_matches_pincode(place: Place, pincode_places: list) -> bool:
+        """True unless the pincode is known to belong to a different district."""
+        if not pincode_places:
+            return True
+        return any(place.district == other.district or place.city == other.city for other in pincode_places)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """Loads the process-wide gazetteer on first use."""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,210 @@
+"""
+Shared HTTP transport for every Sarvam API call in the process.
+
+chat.py and translate.py post through one pooled requests.Session, and stt.py/tts.py use
+one SarvamAI SDK client on one pooled httpx.Client, so TCP+TLS connections to
+api.sarvam.ai are kept alive and reused across turns and across concurrent calls.
+
+The SDK (slow to import) and the pools are only built on first use. start_warm_up() does
+that in the background at startup and pre-opens connections, so the first caller does
+not pay for the TLS handshakes.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+import latency_budget
+import tracing
+
+# --- Configuration ---
+SARVAM_API_KEY = config.SARVAM_API_KEY
+SARVAM_BASE_URL = os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai").rstrip("/")
+SARVAM_WS_URL = os.getenv("SARVAM_WS_URL", "wss://api.sarvam.ai").rstrip("/")
+
+POOL_SIZE = int(os.getenv("SARVAM_POOL_SIZE", "10"))  # Max kept-alive connections per host
+CONNECT_TIMEOUT = float(os.getenv("SARVAM_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("SARVAM_READ_TIMEOUT", "20"))
+MAX_RETRIES = int(os.getenv("SARVAM_MAX_RETRIES", "2"))
+RETRY_BACKOFF_FACTOR = 0.25  # 0.25s, 0.5s, 1s, ...
+RETRY_BACKOFF_JITTER = 0.25  # Up to 0.25s of random jitter per retry
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MIN_READ_TIMEOUT = 0.1 # Floor for read timeouts shortened by a turn's latency budget
+WARM_UP = os.getenv("SARVAM_WARM_UP", "1") != "0" # Pre-open connections in the background at startup
+WARM_UP_CONNECTIONS = int(os.getenv("SARVAM_WARM_UP_CONNECTIONS", "2")) # Per pool
+
+_session = None
+_sdk_http_client = None
+_sarvam_client = None
+_warm_up_thread = None
+_lock = threading.Lock()
+_client_lock = threading.Lock() # Separate: building the client takes _lock for the pool
+
+
+def api_url(path: str) -> str:
+    """Returns the absolute URL for a Sarvam REST path, e.g. '/translate'."""
+    return f"{SARVAM_BASE_URL}/{path.lstrip('/')}"
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide pooled session with keep-alive and a jittered retry policy."""
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                connect=MAX_RETRIES,
+                read=0,  # A timed-out read may already have been processed; don't double-submit
+                status=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                backoff_jitter=RETRY_BACKOFF_JITTER,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset({"GET", "POST"}),  # Sarvam endpoints are all POST
+                respect_retry_after_header=True,
+                raise_on_status=False,  # Hand the last response back so callers can raise_for_status
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, pool_block=False, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def post(path: str, **kwargs) -> requests.Response:
+    """
+    POSTs to a Sarvam REST path through the shared session with the configured timeouts.
+    Inside a turn, the read timeout is cut to what is left of its latency budget.
+    """
+    left = latency_budget.remaining()
+    read_timeout = READ_TIMEOUT if left is None else max(MIN_READ_TIMEOUT, min(READ_TIMEOUT, left))
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, read_timeout))
+    response = get_session().post(api_url(path), **kwargs)
+    history = getattr(getattr(response.raw, "retries", None), "history", ())
+    tracing.tag_current(retries=len(history))
+    return response
+
+
+def _on_sdk_request(request):
+    tracing.count_attempt()
+
+
+def get_sdk_http_client() -> "httpx.Client":
+    """Returns the pooled httpx.Client shared by all SarvamAI SDK clients."""
+    global _sdk_http_client
+    with _lock:
+        if _sdk_http_client is None:
+            import httpx
+
+            _sdk_http_client = httpx.Client(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+                transport=httpx.HTTPTransport(retries=MAX_RETRIES),  # Retries failed connects only
+                follow_redirects=True,
+                event_hooks={"request": [_on_sdk_request]},  # Once per attempt, so retries are traced
+            )
+    return _sdk_http_client
+
+
+def sdk_request_options() -> dict:
+    """
+    Per-request options for SDK calls. The SDK retries 429/408/409/5xx with jittered backoff
+    itself, but counts attempts starting from 2, so the budget is offset accordingly.
+    """
+    return {"max_retries": MAX_RETRIES + 2, "timeout_in_seconds": READ_TIMEOUT}
+
+
+def create_sarvam_client(api_key: str | None = SARVAM_API_KEY):
+    """Creates a SarvamAI SDK client that uses the shared connection pool and base URLs."""
+    from sarvamai import SarvamAI
+    from sarvamai.environment import SarvamAIEnvironment
+
+    return SarvamAI(
+        api_subscription_key=api_key,
+        environment=SarvamAIEnvironment(base=SARVAM_BASE_URL, production=SARVAM_WS_URL),
+        httpx_client=get_sdk_http_client(),
+    )
+
+
+def get_sarvam_client():
+    """Returns the process-wide SDK client, importing the SDK and building it on first use."""
+    global _sarvam_client
+    with _client_lock:
+        if _sarvam_client is None:
+            _sarvam_client = create_sarvam_client()
+    return _sarvam_client
+
+
+def warm_up(connections: int = WARM_UP_CONNECTIONS, audio: bool = False) -> float:
+    """
+    Builds the SDK client and opens `connections` kept-alive connections in each pool, so
+    the first real request skips the TCP+TLS handshake. With `audio`, the sound device
+    library is loaded too. Failures are only reported. Returns the seconds it took.
+    """
+    started = time.perf_counter()
+
+    def open_connection(pool):
+        try:
+            pool.head(SARVAM_BASE_URL, timeout=(CONNECT_TIMEOUT, CONNECT_TIMEOUT))
+        except Exception as e:
+            print(f"[WARNING] Connection warm-up to {SARVAM_BASE_URL} failed: {e}")
+
+    try:
+        get_sarvam_client()
+    except Exception as e:
+        print(f"[WARNING] Could not initialize the SarvamAI client during warm-up: {e}")
+    # Concurrent requests, so each one opens its own connection
+    pools = [get_session(), get_sdk_http_client()]
+    threads = [threading.Thread(target=open_connection, args=(pool,), daemon=True)
+               for pool in pools for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    if audio:
+        from audio_capture import get_sounddevice
+        try:
+            get_sounddevice()
+        except Exception as e:
+            print(f"[WARNING] Sound device unavailable: {e}")
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] Sarvam connections warmed up in {elapsed * 1000:.0f} ms.")
+    return elapsed
+
+
+def start_warm_up(audio: bool = False) -> threading.Thread | None:
+    """Runs warm_up() once per process in a background thread, unless SARVAM_WARM_UP=0."""
+    global _warm_up_thread
+    if not WARM_UP:
+        return None
+    with _lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, kwargs={"audio": audio}, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def pool_stats() -> dict:
+    """Returns connection pool usage, for sizing POOL_SIZE against concurrent calls."""
+    stats = {"pool_size": POOL_SIZE, "requests": {}, "sdk": {}}
+    if _session is not None:
+        adapter = _session.get_adapter(SARVAM_BASE_URL)
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools[key]
+            stats["requests"][f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "idle_connections": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+            }
+    if _sdk_http_client is not None:
+        # httpx does not expose pool counters publicly; read them from the transport if available
+        connections = getattr(getattr(_sdk_http_client._transport, "_pool", None), "connections", [])
+        stats["sdk"] = {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+    return stats
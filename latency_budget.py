@@ -0,0 +1,262 @@
+"""
+Per-turn latency budget for the Sarvam REST calls (chat and translate).
+
+A stalled request would otherwise keep the caller listening to dead air for the whole
+read timeout. ConversationManager runs every turn inside a budget:
+
+    with latency_budget.turn():
+        reply = latency_budget.guarded_call("llm", request_fn, *args)
+
+A guarded call sends a hedged duplicate once the first request has used up
+HEDGE_AFTER_FRACTION of the time left, returns whichever answers first, and gives up when
+the turn's budget is spent. Each endpoint has a circuit breaker: after BREAKER_FAILURES
+failures in a row it is not called for BREAKER_COOLDOWN_SECONDS, then one trial request decides
+whether it closes again. A call that gives up returns None, and the caller degrades: local
+rules instead of LLM validation, English instead of a translation. budget_report counts
+how often each of these fired.
+
+Calls outside a turn (background cache warm-ups) have no deadline and are not hedged.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import config # Loads .env before the settings below are read
+
+# --- Configuration ---
+TURN_BUDGET_SECONDS = float(os.getenv("VOICEBOT_TURN_BUDGET", "4.0")) # 0 disables the budget
+HEDGE_AFTER_FRACTION = float(os.getenv("VOICEBOT_HEDGE_AFTER", "0.4")) # 0 disables hedging
+MIN_CALL_SECONDS = 0.25 # With less time left, fall back without calling
+BREAKER_FAILURES = int(os.getenv("VOICEBOT_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("VOICEBOT_BREAKER_COOLDOWN", "15"))
+MAX_WORKERS = 16 # Concurrent guarded requests, hedges included
+
+_deadline = contextvars.ContextVar("turn_deadline", default=None)
+_executor = None
+_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one endpoint: closed, open, then half-open for one trial."""
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.times_opened = 0
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self._opened_at < self.cooldown else "half-open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; while half-open, only one trial at a time."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial_running = False
+            if ok:
+                self._consecutive_failures = 0
+                self._opened_at = None
+                return
+            self._consecutive_failures += 1
+            if self._opened_at is None and self._consecutive_failures < self.failures:
+                return
+            if self._opened_at is None:
+                self.times_opened += 1
+                print(f"[WARNING] '{self.name}' failed {self._consecutive_failures} times in a row; "
+                      f"not calling it for {self.cooldown:.0f}s.")
+            self._opened_at = time.monotonic() # A failed trial keeps it open for another cooldown
+
+
+class BudgetReport:
+    """Counts, per endpoint, hedges and give-ups, and per kind how often a fallback was used."""
+    def __init__(self):
+        self._counts = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, group: str, event: str):
+        with self._lock:
+            self._counts[group][event] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            counts = {group: dict(events) for group, events in self._counts.items()}
+        counts["breakers"] = {name: breaker.state for name, breaker in _breakers.items()}
+        return counts
+
+    def format_report(self) -> str:
+        lines = []
+        for group, events in self.report().items():
+            if events:
+                lines.append(f"{group:10s} " + ", ".join(f"{event}={count}" for event, count in sorted(events.items())))
+        return "\n".join(lines) or "no guarded calls"
+
+    def prometheus_text(self) -> str:
+        """The counters and breaker states in the Prometheus text exposition format."""
+        report = self.report()
+        breakers = report.pop("breakers")
+        lines = [
+            "# HELP voicebot_budget_events_total Guarded calls, hedges, give-ups and fallbacks.",
+            "# TYPE voicebot_budget_events_total counter",
+        ]
+        for group, events in sorted(report.items()):
+            for event, count in sorted(events.items()):
+                lines.append(f'voicebot_budget_events_total{{group="{group}",event="{event}"}} {count}')
+        lines += [
+            "# HELP voicebot_circuit_open Whether an endpoint's circuit breaker is open (1) or half-open (0.5).",
+            "# TYPE voicebot_circuit_open gauge",
+        ]
+        for name, state in sorted(breakers.items()):
+            lines.append(f'voicebot_circuit_open{{endpoint="{name}"}} {dict(closed=0, open=1).get(state, 0.5)}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+# Process-wide counters; fallbacks are recorded under the "fallback" group
+budget_report = BudgetReport()
+_breakers = {}
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+
+def record_fallback(kind: str):
+    """Counts one degraded answer, e.g. 'validation_rules' or 'untranslated'."""
+    budget_report.record("fallback", kind)
+
+
+@contextmanager
+def turn(seconds: float = TURN_BUDGET_SECONDS):
+    """Gives the calls made inside the block `seconds` in total; nested turns keep the earlier deadline."""
+    if seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current turn, or None outside a turn."""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="guarded-call")
+    return _executor
+
+
+def _attempt(breaker: CircuitBreaker, request_fn: Callable, args: tuple):
+    try:
+        result = request_fn(*args)
+    except Exception as e:
+        print(f"[ERROR] Request to '{breaker.name}' raised: {e}")
+        result = None
+    breaker.record(result is not None)
+    return result
+
+
+def _submit(breaker: CircuitBreaker, request_fn: Callable, args: tuple):
+    # The copied context carries the deadline (for the read timeout) and the trace span over
+    return _get_executor().submit(contextvars.copy_context().run, _attempt, breaker, request_fn, args)
+
+
+def guarded_call(endpoint: str, request_fn: Callable, *args, on_late_result: Callable | None = None):
+    """
+    Calls request_fn(*args), which returns None on failure, within the current turn's budget.
+    Returns the first successful result, or None if every attempt failed, the breaker is
+    open or the budget ran out. A result that arrives after giving up is passed to
+    `on_late_result`, e.g. to cache it for the next turn.
+    """
+    breaker = get_breaker(endpoint)
+    left = remaining()
+    if left is not None and left < MIN_CALL_SECONDS:
+        budget_report.record(endpoint, "no_time_left")
+        return None
+    if not breaker.allow():
+        budget_report.record(endpoint, "breaker_open")
+        return None
+    budget_report.record(endpoint, "calls")
+    if left is None:
+        return _attempt(breaker, request_fn, args)
+
+    deadline = time.monotonic() + left
+    first = _submit(breaker, request_fn, args)
+    pending = {first}
+    if HEDGE_AFTER_FRACTION > 0:
+        done, _ = wait(pending, timeout=left * HEDGE_AFTER_FRACTION)
+        if not done and breaker.state == "closed":
+            pending.add(_submit(breaker, request_fn, args))
+            budget_report.record(endpoint, "hedged")
+
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            result = future.result()
+            if result is not None:
+                if future is not first:
+                    budget_report.record(endpoint, "hedge_won")
+                return result
+
+    if pending:
+        budget_report.record(endpoint, "timed_out")
+        print(f"[WARNING] '{endpoint}' did not answer within the turn's latency budget.")
+        if on_late_result is not None:
+            _deliver_late(pending, on_late_result)
+    return None
+
+
+def _deliver_late(futures: set, on_late_result: Callable):
+    """Hands the first successful late result to `on_late_result`."""
+    delivered = []
+    lock = threading.Lock()
+
+    def deliver(future):
+        result = future.result()
+        if result is None:
+            return
+        with lock:
+            if delivered:
+                return
+            delivered.append(result)
+        on_late_result(result)
+
+    for future in futures:
+        future.add_done_callback(deliver)
@@ -1,13 +1,24 @@
+import argparse
 import time
 from stt import listen_and_transcribe
-from tts import speak_text
-from conversation_manager import ConversationManager
+from tts import speak_text, synthesize_pcm
+from conversation_manager import ConversationManager, validation_cache
+from number_parser import parser_usage
+import http_client
+from latency_budget import budget_report
+from submission_store import get_submission_store, migrate_legacy_db
+import tracing
 
-def main():
+def main(pipeline: bool = False, streaming_stt: bool = False, trace: bool = False, multi_slot: bool = False):
+    if trace:
+        tracing.enable()
+    http_client.start_warm_up(audio=True) # Builds the SDK client, opens connections and loads PortAudio meanwhile
+    migrate_legacy_db(get_submission_store()) # Imports an old db.json, once
     print("-----------------------------------------------Sarvam AI Voice Assistant Started------------------------------------------------")
 
 
-    conversation = ConversationManager()
+    # In pipeline mode the next prompt is translated and synthesized while the user is still answering
+    conversation = ConversationManager(pipeline=pipeline, synthesize_fn=synthesize_pcm if pipeline else None, multi_slot=multi_slot)
 
     # Start the conversation
     initial_prompt = conversation.start_conversation()
@@ -15,8 +26,11 @@ def main():
 
     while not conversation.is_complete:
         try:
+            conversation.prefetch_next_prompt()
+
             # Listen and Transcribe
-            user_input_response = listen_and_transcribe()
+            with conversation.trace_context():
+                user_input_response = listen_and_transcribe(streaming=streaming_stt)
             if not user_input_response:
                 print("[WARNING] STT returned no result. Listening again.")
                 continue
@@ -27,8 +41,9 @@ def main():
             # Process with Conversation Manager 
             ai_response = conversation.process_user_response(user_text)
 
-            # Speak the response (passing the CURRENT language)
-            speak_text(ai_response, conversation.user_language_code)
+            # Speak the response (passing the CURRENT language), reusing prefetched audio if it was prepared
+            with conversation.trace_context():
+                speak_text(ai_response, conversation.user_language_code, audio=conversation.take_prefetched_audio(ai_response))
 
         except KeyboardInterrupt:
             print("\n[INFO] Exiting program.")
@@ -37,10 +52,21 @@ def main():
             print(f"An unexpected error occurred in the main loop: {e}")
             break
 
+    conversation.close()
+    print(f"[INFO] Numeric fields answered without the LLM:\n{parser_usage.format_report()}")
+    print(f"[INFO] Validation cache stats: {validation_cache.stats()}")
+    print(f"[INFO] Latency budget (hedges, give-ups, fallbacks):\n{budget_report.format_report()}")
+    if tracing.is_enabled():
+        print(f"[INFO] Stage latency:\n{tracing.format_summary()}")
     print("-----------------------------------------------Conversation Finished------------------------------------------------")
 
 
 
 if __name__ == "__main__":
-    main()
-
+    parser = argparse.ArgumentParser(description="Sarvam AI voice assistant.")
+    parser.add_argument("--pipeline", action="store_true", help="Prefetch the next prompt while the user is speaking.")
+    parser.add_argument("--streaming-stt", action="store_true", help="Stream audio to STT while the user is speaking.")
+    parser.add_argument("--trace", action="store_true", help="Time every pipeline stage and print a latency summary at the end.")
+    parser.add_argument("--multi-slot", action="store_true", help="Fill every field the user mentions in one answer, not just the one asked.")
+    args = parser.parse_args()
+    main(pipeline=args.pipeline, streaming_stt=args.streaming_stt, trace=args.trace, multi_slot=args.multi_slot)
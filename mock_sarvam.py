@@ -0,0 +1,290 @@
+"""
+Local stand-ins for the Sarvam APIs, for running the pipeline offline.
+
+Start one in-process and point the clients at it through SARVAM_BASE_URL (REST: chat,
+translate, speech-to-text, text-to-speech) and SARVAM_WS_URL (streaming STT), set before
+importing http_client:
+
+    api = MockSarvamAPI(latency={"chat": 0.4}, error_rate={"chat": 0.05}).start()
+    os.environ["SARVAM_BASE_URL"] = api.url
+    api.expect_transcript("my name is Ravi") # What the next speech-to-text request returns
+
+    server = MockStreamingSTTServer(transcript="my name is Ravi").start()
+    os.environ["SARVAM_WS_URL"] = server.url
+"""
+import base64
+import io
+import json
+import random
+import threading
+import time
+import uuid
+import wave
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from websockets.sync.server import serve
+
+STREAMING_STT_PATH = "/speech-to-text-translate/ws"
+REST_ENDPOINTS = {
+    "/v1/chat/completions": "chat",
+    "/translate": "translate",
+    "/speech-to-text-translate": "stt",
+    "/speech-to-text": "stt",
+    "/text-to-speech": "tts",
+}
+TTS_SECONDS_PER_CHARACTER = 0.06 # Length of the silent audio returned for a prompt
+
+
+def _transcription_message(transcript: str, language_code: str, audio_seconds: float, latency: float) -> str:
+    return json.dumps({
+        "type": "data",
+        "data": {
+            "request_id": str(uuid.uuid4()),
+            "transcript": transcript,
+            "language_code": language_code,
+            "metrics": {"audio_duration": audio_seconds, "processing_latency": latency},
+        },
+    })
+
+
+class MockStreamingSTTServer:
+    """
+    Websocket stand-in for the streaming speech-to-text-translate endpoint.
+
+    The configured transcript is split into words; one more word is sent back as a partial
+    result for every `seconds_per_partial` of audio received, and the rest is sent as the
+    final result `final_latency` seconds after a flush. With `partial_latency`, each partial
+    is held back that long, so partials can still be on their way when the client flushes.
+    Each result's metrics.audio_duration is the audio received so far, or with
+    `cumulative_metrics=False` only the audio since the previous result (per segment).
+    """
+    def __init__(self, transcript: str = "hello", language_code: str = "en-IN", sample_rate: int = 16000,
+                 seconds_per_partial: float = 0.5, final_latency: float = 0.05, host: str = "127.0.0.1", port: int = 0,
+                 partial_latency: float = 0.0, cumulative_metrics: bool = True):
+        self.transcript = transcript
+        self.language_code = language_code
+        self.sample_rate = sample_rate
+        self.seconds_per_partial = seconds_per_partial
+        self.final_latency = final_latency
+        self.partial_latency = partial_latency
+        self.cumulative_metrics = cumulative_metrics
+        self._server = serve(self._handle, host, port)
+        self.connections = 0
+        self.bytes_received = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def _handle(self, websocket):
+        if not websocket.request.path.startswith(STREAMING_STT_PATH):
+            websocket.close(code=1008, reason="Unknown path")
+            return
+        self.connections += 1
+        words = self.transcript.split()
+        sent_words = 0
+        audio_bytes = 0
+        reported_bytes = 0 # Audio covered by earlier results, for per-segment metrics
+
+        def audio_seconds():
+            nonlocal reported_bytes
+            covered = audio_bytes if self.cumulative_metrics else audio_bytes - reported_bytes
+            reported_bytes = audio_bytes
+            return covered / (2 * self.sample_rate)
+
+        for raw_message in websocket:
+            message = json.loads(raw_message)
+            if message.get("type") == "flush":
+                time.sleep(self.final_latency)
+                websocket.send(_transcription_message(
+                    " ".join(words[sent_words:]), self.language_code, audio_seconds(), self.final_latency))
+                sent_words = len(words)
+                continue
+            if "audio" not in message:
+                continue # Config messages
+            chunk = len(base64.b64decode(message["audio"]["data"]))
+            audio_bytes += chunk
+            self.bytes_received += chunk
+            due_words = int(audio_bytes / (2 * self.sample_rate) / self.seconds_per_partial)
+            if sent_words < min(due_words, len(words) - 1):
+                time.sleep(self.partial_latency)
+                websocket.send(_transcription_message(
+                    words[sent_words], self.language_code, audio_seconds(), 0.0))
+                sent_words += 1
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+
+def _silent_wav(seconds: float, sample_rate: int) -> bytes:
+    wav = io.BytesIO()
+    with wave.open(wav, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(bytes(2 * int(seconds * sample_rate)))
+    return wav.getvalue()
+
+
+def _text_length(endpoint: str, body: bytes) -> int:
+    """Characters of text in a translate or tts request body (multipart STT uploads count as 0)."""
+    field = {"translate": "input", "tts": "text"}.get(endpoint)
+    if field is None:
+        return 0
+    try:
+        return len(json.loads(body).get(field, ""))
+    except (ValueError, AttributeError):
+        return 0
+
+
+def echo_validation(messages: list) -> str:
+    """Default chat responder: accepts whatever the user said, as the validation prompts expect."""
+    return json.dumps({"status": "true", "value": messages[-1]['content'], "reprompt": ""}, ensure_ascii=False)
+
+
+class MockSarvamAPI:
+    """
+    HTTP stand-in for the Sarvam REST APIs.
+
+    Each endpoint ("chat", "translate", "stt", "tts") answers after `latency[endpoint]`
+    seconds, plus `latency_per_character[endpoint]` for every character of text sent to
+    translate or tts, plus up to `jitter` of random extra, and fails with `error_status` for a
+    `error_rate[endpoint]` fraction of requests. A `stall_rate[endpoint]` fraction of requests
+    stalls for `stall_seconds` more before answering. With `upload_kbps`, every request also
+    waits as long as its body would take on an uplink of that speed. Speech-to-text returns the transcripts
+    queued with expect_transcript() in order, then `default_transcript`. Chat replies come
+    from `chat_responder(messages)`; translations are the input tagged with the target
+    language; speech is silence sized to the text.
+    """
+    def __init__(self, latency: dict | None = None, error_rate: dict | None = None, jitter: float = 0.0,
+                 error_status: int = 503, default_transcript: str = "hello", chat_responder=echo_validation,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0, latency_per_character: dict | None = None,
+                 stall_rate: dict | None = None, stall_seconds: float = 10.0, upload_kbps: float | None = None):
+        self.latency = dict(latency or {})
+        self.latency_per_character = dict(latency_per_character or {})
+        self.error_rate = dict(error_rate or {})
+        self.stall_rate = dict(stall_rate or {})
+        self.stall_seconds = stall_seconds
+        self.upload_kbps = upload_kbps
+        self.jitter = jitter
+        self.error_status = error_status
+        self.default_transcript = default_transcript
+        self.chat_responder = chat_responder
+        self.calls = {endpoint: 0 for endpoint in set(REST_ENDPOINTS.values())}
+        self.errors = dict(self.calls)
+        self.stalls = dict(self.calls)
+        self.bytes_received = dict(self.calls)
+        self._transcripts = deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def expect_transcript(self, transcript: str):
+        with self._lock:
+            self._transcripts.append(transcript)
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_counters(self):
+        with self._lock:
+            for endpoint in self.calls:
+                self.calls[endpoint] = 0
+                self.errors[endpoint] = 0
+                self.stalls[endpoint] = 0
+                self.bytes_received[endpoint] = 0
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _admit(self, endpoint: str, characters: int = 0, body_bytes: int = 0) -> bool:
+        """Counts the call, sleeps for its latency and decides whether to inject an error."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.bytes_received[endpoint] += body_bytes
+            delay = (self.latency.get(endpoint, 0.0) + characters * self.latency_per_character.get(endpoint, 0.0)
+                     + self._random.uniform(0.0, self.jitter))
+            if self.upload_kbps:
+                delay += body_bytes * 8 / (self.upload_kbps * 1000)
+            failed = self._random.random() < self.error_rate.get(endpoint, 0.0)
+            if failed:
+                self.errors[endpoint] += 1
+            if self._random.random() < self.stall_rate.get(endpoint, 0.0):
+                self.stalls[endpoint] += 1
+                delay += self.stall_seconds
+        if delay > 0:
+            time.sleep(delay)
+        return not failed
+
+    def _respond(self, endpoint: str, body: bytes) -> dict:
+        if endpoint == "chat":
+            messages = json.loads(body)["messages"]
+            return {"choices": [{"index": 0, "message": {"role": "assistant", "content": self.chat_responder(messages)}}]}
+        if endpoint == "translate":
+            request = json.loads(body)
+            return {"request_id": str(uuid.uuid4()),
+                    "translated_text": f"[{request['target_language_code']}] {request['input']}",
+                    "source_language_code": request.get("source_language_code")}
+        if endpoint == "stt":
+            with self._lock:
+                transcript = self._transcripts.popleft() if self._transcripts else self.default_transcript
+            return {"request_id": str(uuid.uuid4()), "transcript": transcript, "language_code": "en-IN"}
+        request = json.loads(body)
+        sample_rate = int(request.get("speech_sample_rate") or 22050)
+        audio = _silent_wav(TTS_SECONDS_PER_CHARACTER * len(request.get("text", "")), sample_rate)
+        return {"request_id": str(uuid.uuid4()), "audios": [base64.b64encode(audio).decode("ascii")]}
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real endpoints
+
+            def do_POST(self):
+                endpoint = REST_ENDPOINTS.get(self.path.split("?")[0].rstrip("/"))
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if endpoint is None:
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                elif not api._admit(endpoint, _text_length(endpoint, body), len(body)):
+                    self._send(api.error_status, {"error": {"message": "Injected failure"}})
+                else:
+                    self._send(200, api._respond(endpoint, body))
+
+            def do_HEAD(self):
+                self.send_response(200) # Connection warm-up; keeps the connection open
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True # The client timed out and hung up
+
+            def log_message(self, format, *args):
+                pass # Keep benchmark output readable
+
+        return Handler
@@ -0,0 +1,301 @@
+"""
+Deterministic number extraction for spoken answers (age, pincode, experience, salary).
+
+Understands digits (including Indian grouping like 1,20,000 and shorthand like 50k or
+1.5 lakh), English number words and romanized Hindi, Tamil, Telugu and Kannada number
+words with thousand/lakh/crore multipliers. It only answers when the utterance contains
+exactly one unambiguous whole number; anything else is reported as unsure so the caller
+can fall back to the LLM. That includes "and a half" and, given the field, a time unit
+the field is not counted in ("six months" of experience).
+"""
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+
+def phonetic_key(word: str) -> str:
+    """Collapses common romanization variants: 'pachaas'/'pachas', 'hazaar'/'hazar', 'paththu'/'pathu'."""
+    word = word.lower()
+    word = word.replace("ee", "i").replace("oo", "u").replace("w", "v").replace("thth", "th").replace("zh", "l")
+    return re.sub(r"(.)\1+", r"\1", word)
+
+
+# Word -> value for numbers below 100 (and a few larger single words).
+_ENGLISH_UNITS = {
+    "zero": 0, "oh": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+    "thirty": 30, "forty": 40, "fourty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_HINDI_UNITS = {
+    "shunya": 0, "ek": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4, "paanch": 5, "panch": 5, "chhe": 6,
+    "chhah": 6, "chah": 6, "che": 6, "saat": 7, "aath": 8, "nau": 9, "das": 10, "gyarah": 11, "gyara": 11,
+    "barah": 12, "bara": 12, "terah": 13, "tera": 13, "chaudah": 14, "chauda": 14, "pandrah": 15,
+    "pandra": 15, "solah": 16, "sola": 16, "satrah": 17, "satra": 17, "atharah": 18, "athara": 18,
+    "unnis": 19, "unees": 19, "bees": 20, "bis": 20, "ikkis": 21, "ikkees": 21, "bais": 22, "baees": 22,
+    "teis": 23, "tees": 30, "chaubis": 24, "chaubees": 24, "pachis": 25, "pachchis": 25, "pachchees": 25,
+    "chhabbis": 26, "chabbis": 26, "sattais": 27, "sattaees": 27, "atthais": 28, "atthaees": 28,
+    "untis": 29, "untees": 29, "iktis": 31, "battis": 32, "taintis": 33, "chauntis": 34, "paintis": 35,
+    "chhattis": 36, "saintis": 37, "adtis": 38, "artis": 38, "untalis": 39, "chalis": 40, "chaalis": 40,
+    "iktalis": 41, "byalis": 42, "bayalis": 42, "taintalis": 43, "chavalis": 44, "chauvalis": 44,
+    "paintalis": 45, "chhiyalis": 46, "saintalis": 47, "adtalis": 48, "artalis": 48, "unchas": 49,
+    "pachas": 50, "pachaas": 50, "ikyavan": 51, "bavan": 52, "tirpan": 53, "chauvan": 54, "pachpan": 55,
+    "chhappan": 56, "sattavan": 57, "atthavan": 58, "unsath": 59, "saath": 60, "iksath": 61, "basath": 62,
+    "tirsath": 63, "chaunsath": 64, "painsath": 65, "chhiyasath": 66, "sarsath": 67, "adsath": 68,
+    "unhattar": 69, "sattar": 70, "ikhattar": 71, "bahattar": 72, "tihattar": 73, "chauhattar": 74,
+    "pachhattar": 75, "chhihattar": 76, "satattar": 77, "athhattar": 78, "unasi": 79, "assi": 80,
+    "nabbe": 90, "nabe": 90,
+}
+_TAMIL_UNITS = {
+    "onru": 1, "ondru": 1, "onnu": 1, "irandu": 2, "rendu": 2, "munru": 3, "moonu": 3, "munu": 3,
+    "nangu": 4, "naangu": 4, "naalu": 4, "nalu": 4, "ainthu": 5, "aindhu": 5, "anju": 5, "aaru": 6,
+    "ezhu": 7, "ettu": 8, "onbathu": 9, "onpathu": 9, "pathu": 10, "paththu": 10, "iruvathu": 20,
+    "irupathu": 20, "irubathu": 20, "iruvathi": 20, "irupathi": 20, "muppathu": 30, "muppathi": 30,
+    "narpathu": 40, "naarpathu": 40, "narpathi": 40, "aimbathu": 50, "aimpathu": 50, "aimbathi": 50,
+    "arupathu": 60, "aruvathu": 60, "arupathi": 60, "ezhupathu": 70, "elupathu": 70, "embathu": 80,
+    "enpathu": 80, "thonnuru": 90, "thonnooru": 90,
+}
+_TELUGU_UNITS = {
+    "okati": 1, "okka": 1, "moodu": 3, "mudu": 3, "nalugu": 4, "naalugu": 4, "aidu": 5, "edu": 7,
+    "enimidi": 8, "tommidi": 9, "thommidi": 9, "padi": 10, "iravai": 20, "muppai": 30, "nalabhai": 40,
+    "nalabai": 40, "yabhai": 50, "yabai": 50, "aravai": 60, "debbai": 70, "enabhai": 80, "enabai": 80,
+    "tombhai": 90, "thombhai": 90,
+}
+_KANNADA_UNITS = {
+    "ondu": 1, "eradu": 2, "mooru": 3, "naalku": 4, "nalku": 4, "elu": 7, "entu": 8, "ombattu": 9,
+    "hattu": 10, "ippattu": 20, "moovattu": 30, "muvattu": 30, "nalavattu": 40, "aivattu": 50,
+    "aravattu": 60, "eppattu": 70, "embattu": 80, "tombattu": 90,
+}
+
+# Multipliers: hundreds combine with the number before them, the rest close a group.
+_HUNDRED_WORDS = {"hundred": 100, "sau": 100, "nuru": 100, "nooru": 100, "vanda": 100, "vandha": 100}
+_SCALE_WORDS = {
+    "thousand": 1_000, "k": 1_000, "hazaar": 1_000, "hazar": 1_000, "hajar": 1_000, "hajaar": 1_000,
+    "aayiram": 1_000, "ayiram": 1_000, "veyyi": 1_000, "vela": 1_000, "saavira": 1_000, "savira": 1_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000, "laksha": 100_000, "latcham": 100_000,
+    "million": 1_000_000,
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000, "karod": 10_000_000, "karor": 10_000_000, "koti": 10_000_000,
+}
+# Words that are numbers in one language but common words in another; alone they are not trusted.
+# ("saath" is also Hindi "with", "tera" "your", "bara" "big"; "teen" is also English.)
+_AMBIGUOUS_WORDS = {"do", "oh", "che", "edu", "padi", "saath", "tera", "bara", "teen"}
+# Hindi fractions: "dedh lakh" = 1.5 lakh, "saade teen hazaar" = 3.5 thousand.
+_FRACTION_WORDS = {"dedh": 1.5, "dhai": 2.5, "dhaai": 2.5, "adhai": 2.5}
+_FRACTION_PREFIXES = {"sadhe": 0.5, "saade": 0.5, "sade": 0.5, "sava": 0.25, "sawa": 0.25, "paune": -0.25}
+# Fillers allowed inside a spoken number ("two hundred and fifty", "ek lakh aur bees hazaar").
+_CONNECTORS = {"and", "aur", "or"}
+# A number right after one of these is not the answer ("no one", "nahi do").
+_NEGATIONS = {"no", "not", "nahi", "nahin"}
+# Fractions said as a separate word ("four and a half", "dedh" aside); the whole number alone would be wrong.
+_FRACTION_TAILS = {"half", "quarter", "aadha", "adha", "aadhe", "adhe"}
+# Time units, and the fields counted in them; any other unit makes the number unsure.
+_TIME_UNITS = {
+    "year": "year", "years": "year", "yr": "year", "yrs": "year", "saal": "year", "sal": "year", "varsh": "year", "baras": "year",
+    "month": "month", "months": "month", "mahina": "month", "mahine": "month", "mahino": "month",
+    "week": "week", "weeks": "week", "hafta": "week", "hafte": "week",
+    "day": "day", "days": "day", "din": "day",
+}
+FIELD_TIME_UNITS = {
+    "askAge": {"year"}, "askExperience": {"year"},
+    "askLastSalary": {"month"}, "askExpectedSalary": {"month"}, # Monthly salaries
+    "askPincode": set(),
+}
+DEFAULT_TIME_UNITS = {"year"} # For other fields, and when the field is not given
+
+_UNITS = {}
+for _table in (_ENGLISH_UNITS, _HINDI_UNITS, _TAMIL_UNITS, _TELUGU_UNITS, _KANNADA_UNITS):
+    for _word, _value in _table.items():
+        _UNITS[phonetic_key(_word)] = _value
+for _word, _value in _FRACTION_WORDS.items():
+    _UNITS[phonetic_key(_word)] = _value
+_FRACTION_PREFIX_KEYS = {phonetic_key(word): value for word, value in _FRACTION_PREFIXES.items()}
+_HUNDREDS = {phonetic_key(word): value for word, value in _HUNDRED_WORDS.items()}
+_SCALES = {phonetic_key(word): value for word, value in _SCALE_WORDS.items()}
+_AMBIGUOUS = {phonetic_key(word) for word in _AMBIGUOUS_WORDS}
+_CONNECTOR_KEYS = {phonetic_key(word) for word in _CONNECTORS}
+_NEGATION_KEYS = {phonetic_key(word) for word in _NEGATIONS}
+_FRACTION_TAIL_KEYS = {phonetic_key(word) for word in _FRACTION_TAILS}
+_TIME_UNIT_KEYS = {phonetic_key(word): unit for word, unit in _TIME_UNITS.items()}
+
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]+")
+_GROUPED_DIGITS = re.compile(r"(?<=\d),(?=\d)")
+
+
+@dataclass
+class NumberParse:
+    """Result of parse_number. `value` is only set when the parser is confident."""
+    value: int | None
+    confident: bool
+    reason: str = ""
+
+
+def _tokens(text: str) -> list:
+    text = _GROUPED_DIGITS.sub("", text.lower()) # 1,20,000 -> 120000
+    tokens = []
+    # Shorthand such as "50k" or "2lakh" comes out as two tokens
+    for token in _TOKEN_PATTERN.findall(text):
+        if token[0].isdigit():
+            tokens.append(("num", float(token) if "." in token else int(token), token))
+            continue
+        key = phonetic_key(token)
+        if key in _UNITS:
+            tokens.append(("unit", _UNITS[key], key))
+        elif key in _FRACTION_PREFIX_KEYS:
+            tokens.append(("prefix", _FRACTION_PREFIX_KEYS[key], key))
+        elif key in _HUNDREDS:
+            tokens.append(("hundred", _HUNDREDS[key], key))
+        elif key in _SCALES:
+            tokens.append(("scale", _SCALES[key], key))
+        elif key in _CONNECTOR_KEYS:
+            tokens.append(("connector", None, key))
+        elif key in _NEGATION_KEYS:
+            tokens.append(("negation", None, key))
+        else:
+            tokens.append(("word", None, key))
+    return tokens
+
+
+def _spans(tokens: list) -> list:
+    """Groups consecutive number tokens into spans, dropping leading/trailing connectors."""
+    spans, current = [], []
+    for token in tokens:
+        if token[0] in ("word", "negation"):
+            if current:
+                spans.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        spans.append(current)
+    cleaned = []
+    for span in spans:
+        while span and span[0][0] == "connector":
+            span = span[1:]
+        while span and span[-1][0] == "connector":
+            span = span[:-1]
+        if span:
+            cleaned.append(span)
+    return cleaned
+
+
+def _evaluate(span: list):
+    """Evaluates one span of number tokens. Returns a number, or None if it does not add up."""
+    values = [token for token in span if token[0] != "connector"]
+    # Digit-by-digit readings such as "five six zero zero zero one" (pincodes, phone numbers)
+    if len(values) >= 3 and all(kind in ("unit", "num") and isinstance(value, int) and 0 <= value <= 9 for kind, value, _ in values):
+        return int("".join(str(value) for _, value, _ in values))
+
+    total, current = 0, None
+    last_kind = None
+    adjustment = None # A fraction prefix ("sava", "paune") waiting for the number it changes
+    for kind, value, _ in values:
+        if kind == "prefix":
+            if adjustment is not None:
+                return None
+            adjustment = value
+            last_kind = kind
+            continue
+        if kind in ("hundred", "scale") and adjustment is not None:
+            if current is not None:
+                return None
+            current, adjustment = 1 + adjustment, None # "sava lakh" is 1.25 lakh
+        if kind in ("unit", "num"):
+            if adjustment is not None:
+                value, adjustment = value + adjustment, None
+            if current is not None:
+                # "twenty five" / "one hundred twenty five": a tens word followed by a smaller unit
+                if last_kind == "unit" and kind == "unit" and current % 10 == 0 and current % 100 >= 10 and value < 10:
+                    current += value
+                # "three hundred fifty" / "dedh sau bees"
+                elif last_kind == "hundred" and value < 100:
+                    current += value
+                else:
+                    return None # Two separate numbers, e.g. "20 25"
+            else:
+                current = value
+        elif kind == "hundred":
+            current = (current if current is not None else 1) * value
+        elif kind == "scale":
+            total += (current if current is not None else 1) * value
+            current = None
+        last_kind = kind
+    if adjustment is not None:
+        return None # "sava" with nothing after it
+    if current is not None:
+        total += current
+    return total
+
+
+def parse_number(text: str, field: str | None = None) -> NumberParse:
+    """
+    Extracts a single whole number from an utterance, or reports that it is unsure. A time
+    unit that `field` (a step key such as "askExperience") is not counted in also makes it
+    unsure; without a field, only years are accepted.
+    """
+    if not text or not text.strip():
+        return NumberParse(None, False, "empty")
+    tokens = _tokens(text)
+    spans = _spans(tokens)
+    if not spans:
+        return NumberParse(None, False, "no number")
+    if any(token[0] == "negation" and following[0] not in ("word", "negation")
+           for token, following in zip(tokens, tokens[1:])):
+        return NumberParse(None, False, "negated")
+    if any(key in _FRACTION_TAIL_KEYS for _, _, key in tokens):
+        return NumberParse(None, False, "fraction")
+    units = {_TIME_UNIT_KEYS[key] for kind, _, key in tokens if kind == "word" and key in _TIME_UNIT_KEYS}
+    if units - FIELD_TIME_UNITS.get(field, DEFAULT_TIME_UNITS):
+        return NumberParse(None, False, "other time unit")
+
+    # Spans made only of words like "do" ("I do have 2 years") don't count when there is a real number
+    ambiguous = [span for span in spans if all(key in _AMBIGUOUS for _, _, key in span)]
+    if ambiguous and len(ambiguous) < len(spans):
+        spans = [span for span in spans if span not in ambiguous]
+    if len(spans) > 1:
+        return NumberParse(None, False, "several numbers")
+
+    span = spans[0]
+    if span in ambiguous:
+        return NumberParse(None, False, "ambiguous word")
+    if span[0][0] == "scale" and span[0][2] == "k":
+        return NumberParse(None, False, "ambiguous word") # A stray "k", not "50k"
+
+    value = _evaluate(span)
+    if value is None:
+        return NumberParse(None, False, "does not add up")
+    if value != int(value):
+        return NumberParse(None, False, "not a whole number")
+    return NumberParse(int(value), True)
+
+
+class ParserUsageReport:
+    """Counts, per field, how often the parser answered and how often the LLM was still needed."""
+    def __init__(self):
+        self._counts = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, field: str, skipped_llm: bool):
+        with self._lock:
+            self._counts[field]["parser" if skipped_llm else "llm"] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                field: {
+                    "parser": counts["parser"],
+                    "llm": counts["llm"],
+                    "llm_skipped_rate": counts["parser"] / (counts["parser"] + counts["llm"]),
+                }
+                for field, counts in self._counts.items()
+            }
+
+    def format_report(self) -> str:
+        lines = [f"{'field':20s} {'parser':>7s} {'llm':>5s} {'skipped':>8s}"]
+        for field, row in self.report().items():
+            lines.append(f"{field:20s} {row['parser']:7d} {row['llm']:5d} {row['llm_skipped_rate']:8.0%}")
+        return "\n".join(lines)
+
+
+# Process-wide usage counters, filled in by ConversationManager
+parser_usage = ParserUsageReport()
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+
+class PromptPrefetcher:
+    """
+    Speculatively prepares the next prompt (translated text plus synthesized audio) in a
+    background thread while the caller is still answering the current one.
+
+    Only one prompt is prefetched at a time. `take` hands it over if it is the prompt the
+    conversation actually needs; anything else is discarded.
+    """
+    def __init__(self, localize_fn: Callable[[str, str], Optional[str]],
+                 synthesize_fn: Optional[Callable[[str, str], Any]] = None):
+        self.localize_fn = localize_fn      # (key, language_code) -> text
+        self.synthesize_fn = synthesize_fn  # (text, language_code) -> audio, or None to skip
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prompt-prefetch")
+        self._lock = threading.Lock()
+        self._pending = None  # (key, language_code, future)
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _prepare(self, key: str, language_code: str) -> Tuple[Optional[str], Any]:
+        text = self.localize_fn(key, language_code)
+        audio = None
+        if text and self.synthesize_fn:
+            audio = self.synthesize_fn(text, language_code)
+        return text, audio
+
+    def start(self, key: str, language_code: str):
+        """Starts preparing a prompt unless the same prompt is already pending."""
+        with self._lock:
+            if self._pending and self._pending[:2] == (key, language_code):
+                return
+            self._discard_locked()
+            self._pending = (key, language_code, self._executor.submit(self._prepare, key, language_code))
+
+    def take(self, key: str, language_code: str, timeout: Optional[float] = None):
+        """
+        Returns (text, audio) if the pending prefetch is for this prompt, waiting for it to
+        finish if needed, or None if nothing usable was prefetched.
+        """
+        with self._lock:
+            pending = self._pending
+            if not pending or pending[:2] != (key, language_code):
+                self.misses += 1
+                self._discard_locked()
+                return None
+            self._pending = None
+
+        try:
+            text, audio = pending[2].result(timeout=timeout)
+        except (CancelledError, TimeoutError) as e:
+            print(f"[WARNING] Prefetch of '{key}' not ready, preparing it now: {e!r}")
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[WARNING] Prefetch of '{key}' failed: {e}")
+            self.misses += 1
+            return None
+        if not text:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text, audio
+
+    def discard(self):
+        """Throws away any pending prefetch."""
+        with self._lock:
+            self._discard_locked()
+
+    def _discard_locked(self):
+        if self._pending:
+            self._pending[2].cancel() # A prefetch that is already running simply finishes unused
+            self._pending = None
+            self.discarded += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "discarded": self.discarded}
+
+    def shutdown(self):
+        self.discard()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+"""
+Offline prompt bundle: pre-translated text and pre-synthesized PCM audio for every
+static prompt in conversation_flow.json.
+
+Build it once per flow/language change:
+
+    python prompt_bundle.py --languages en-IN hi-IN ta-IN te-IN kn-IN
+
+A bundle is a directory with an `index.json` and a single `audio.pcm` blob holding
+16-bit mono PCM clips back to back. The index stores, per language and prompt key, the
+translated text and the clip's byte offset/length, so the blob can be memory-mapped and
+clips are only paged in when played.
+"""
+import argparse
+import json
+import mmap
+import os
+import threading
+
+import config # Loads .env before the settings below are read
+
+# --- Configuration ---
+BUNDLE_DIR = os.getenv("PROMPT_BUNDLE_DIR", "prompt_bundle")
+INDEX_FILE = "index.json"
+AUDIO_FILE = "audio.pcm"
+BUNDLE_VERSION = 1
+BUNDLE_SAMPLE_RATE = 22050
+DEFAULT_LANGUAGE_CODE = "en-IN"
+START_PROMPT_KEY = "start" # welcome + first question, as spoken by start_conversation
+
+
+def flow_prompts(script: dict, first_key: str = "askLanguage") -> dict:
+    """Returns every static prompt of a flow script, including the combined start prompt."""
+    prompts = {key: text for key, text in script.items() if isinstance(text, str) and text}
+    prompts[START_PROMPT_KEY] = f"{script.get('welcome', 'Welcome!')} {script[first_key]}"
+    return prompts
+
+
+class PromptBundle:
+    """Read-only view over a compiled prompt bundle."""
+    def __init__(self, bundle_dir: str = BUNDLE_DIR):
+        with open(os.path.join(bundle_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported prompt bundle version: {index.get('version')}")
+
+        self.sample_rate = index["sample_rate"]
+        self.entries = index["entries"] # language -> key -> {text, offset, length}
+        self._by_text = {
+            (language, entry["text"]): entry
+            for language, prompts in self.entries.items()
+            for entry in prompts.values()
+        }
+
+        self._audio_file = open(os.path.join(bundle_dir, AUDIO_FILE), 'rb')
+        size = os.fstat(self._audio_file.fileno()).st_size
+        self._audio = memoryview(mmap.mmap(self._audio_file.fileno(), 0, access=mmap.ACCESS_READ)) if size else memoryview(b"")
+
+    @property
+    def languages(self) -> list:
+        return list(self.entries)
+
+    def get_text(self, language_code: str, key: str) -> str | None:
+        entry = self.entries.get(language_code, {}).get(key)
+        return entry["text"] if entry else None
+
+    def _clip(self, entry):
+        return self._audio[entry["offset"]:entry["offset"] + entry["length"]], self.sample_rate
+
+    def get_audio(self, language_code: str, key: str):
+        """Returns (PCM memoryview, sample rate) for a prompt key, or None."""
+        entry = self.entries.get(language_code, {}).get(key)
+        return self._clip(entry) if entry else None
+
+    def find_audio(self, language_code: str, text: str):
+        """Returns (PCM memoryview, sample rate) for an exact prompt text, or None."""
+        entry = self._by_text.get((language_code, text))
+        return self._clip(entry) if entry else None
+
+
+_bundle = None
+_bundle_loaded = False
+_bundle_lock = threading.Lock()
+
+def load_prompt_bundle(bundle_dir: str = BUNDLE_DIR) -> PromptBundle | None:
+    """Loads the process-wide prompt bundle once. Returns None if no bundle was built."""
+    global _bundle, _bundle_loaded
+    with _bundle_lock:
+        if not _bundle_loaded:
+            _bundle_loaded = True
+            if os.path.exists(os.path.join(bundle_dir, INDEX_FILE)):
+                try:
+                    _bundle = PromptBundle(bundle_dir)
+                    print(f"[INFO] Prompt bundle loaded for languages: {', '.join(_bundle.languages)}")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[WARNING] Could not load prompt bundle, using live translation and TTS: {e}")
+    return _bundle
+
+
+def build_bundle(flow_script_path: str, languages: list, out_dir: str = BUNDLE_DIR, sample_rate: int = BUNDLE_SAMPLE_RATE):
+    """Translates and synthesizes every flow prompt for each language and writes the bundle."""
+    from translate import translate_text
+    from tts import synthesize_pcm
+
+    with open(flow_script_path, 'r') as f:
+        prompts = flow_prompts(json.load(f))
+
+    os.makedirs(out_dir, exist_ok=True)
+    entries = {}
+    offset = 0
+    # Write to temporary files first so a running process never sees a half-written bundle
+    audio_tmp = os.path.join(out_dir, AUDIO_FILE + ".tmp")
+    with open(audio_tmp, 'wb') as audio_out:
+        for language in languages:
+            entries[language] = {}
+            for key, text in prompts.items():
+                if key == START_PROMPT_KEY and language != DEFAULT_LANGUAGE_CODE:
+                    continue # The start prompt is always spoken before a language is chosen
+                localized = text if language == DEFAULT_LANGUAGE_CODE else translate_text(text, language)
+                if language != DEFAULT_LANGUAGE_CODE and localized == text:
+                    raise RuntimeError(f"Translation of '{key}' into {language} failed.")
+
+                synthesized = synthesize_pcm(localized, language, sample_rate)
+                if synthesized is None:
+                    raise RuntimeError(f"Speech synthesis of '{key}' in {language} failed.")
+                pcm, actual_rate = synthesized
+                if actual_rate != sample_rate:
+                    raise RuntimeError(f"TTS returned {actual_rate} Hz audio, expected {sample_rate} Hz.")
+
+                audio_out.write(pcm)
+                entries[language][key] = {"text": localized, "offset": offset, "length": len(pcm)}
+                offset += len(pcm)
+                print(f"[INFO] Bundled {language}/{key} ({len(pcm)} bytes)")
+
+    index_tmp = os.path.join(out_dir, INDEX_FILE + ".tmp")
+    with open(index_tmp, 'w', encoding='utf-8') as f:
+        json.dump({"version": BUNDLE_VERSION, "sample_rate": sample_rate, "entries": entries}, f, ensure_ascii=False)
+    os.replace(audio_tmp, os.path.join(out_dir, AUDIO_FILE))
+    os.replace(index_tmp, os.path.join(out_dir, INDEX_FILE))
+    print(f"[INFO] Prompt bundle written to {out_dir}: {offset} bytes of audio for {len(languages)} languages.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the static flow prompts into a prompt bundle.")
+    parser.add_argument("--flow", default="conversation_flow.json", help="Path to the conversation flow script.")
+    parser.add_argument("--languages", nargs="+", default=[DEFAULT_LANGUAGE_CODE], help="Language codes, e.g. en-IN hi-IN.")
+    parser.add_argument("--out", default=BUNDLE_DIR, help="Output directory for the bundle.")
+    parser.add_argument("--sample-rate", type=int, default=BUNDLE_SAMPLE_RATE)
+    args = parser.parse_args()
+    build_bundle(args.flow, args.languages, args.out, args.sample_rate)
@@ -1,120 +1,184 @@
-import os
-import sounddevice as sd
-import numpy as np
-import wave
-import dotenv
-from sarvamai import SarvamAI
+import contextvars
 import threading
 import queue
 
-# --- Configuration ---
-dotenv.load_dotenv()
-SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
-
-# Initialize the Sarvam AI client for STT
-sarvam_client = SarvamAI(api_subscription_key=SARVAM_API_KEY)
+import http_client
+import tracing
+from audio_capture import CaptureBuffer, get_sounddevice
+from audio_encoding import STT_TRIM_SILENCE, STT_UPLOAD_CODEC, encode_for_stt
+from stt_streaming import StreamingTranscriber
+from vad import AdaptiveVAD
 
+# --- Configuration ---
 # Audio settings
 SAMPLE_RATE = 16000
 CHANNELS = 1
-BLOCK_SIZE = 8000
+BLOCK_SIZE = 320 # 20 ms blocks, so endpointing reacts at 20 ms granularity
 DTYPE = 'int16'
 
-# Transcription logic settings
-PAUSE_DURATION_SECONDS = 1.0
-SILENCE_THRESHOLD = 2000  # Adjust this based on your microphone's sensitivity
-TEMP_AUDIO_FILE = "temp_input.wav"
-
-# --- Global State ---
-audio_buffer = []
-is_speaking = False
-silent_chunks_count = 0
-stt_result_queue = queue.Queue() # Thread-safe queue to hold transcription result
-stop_listening_event = threading.Event() # Event to stop the audio stream
-
-def transcribe_and_queue(filename):
-    """Sends audio for transcription and puts the result in a queue."""
-    print("\n[INFO] Pause detected. Transcribing speech...")
-    try:
-        with open(filename, "rb") as f:
-            response = sarvam_client.speech_to_text.translate(file=f, model="saaras:v2.5")
-        stt_result_queue.put(response) # Put the successful transcription in the queue
-    except Exception as e:
-        print(f"[ERROR] Could not transcribe: {e}")
-        stt_result_queue.put(None) # Put None to signal an error
-
-def save_and_transcribe():
-    """Saves buffered audio and starts the transcription thread."""
-    global audio_buffer
-    if not audio_buffer:
-        stt_result_queue.put(None)
-        return
-
-    full_audio_data = np.concatenate(audio_buffer, axis=0)
-    audio_buffer = []
-
-    with wave.open(TEMP_AUDIO_FILE, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(full_audio_data.tobytes())
-
-    threading.Thread(target=transcribe_and_queue, args=(TEMP_AUDIO_FILE,)).start()
-
-def audio_callback(indata, frames, time, status):
-    """Callback function for the audio stream to detect voice activity."""
-    global audio_buffer, is_speaking, silent_chunks_count
-
-    if status:
-        print(f"[WARNING] Audio status error: {status}")
-
-    volume_rms = np.sqrt(np.mean(indata.astype(np.float64)**2))
-    is_sound = volume_rms > SILENCE_THRESHOLD
-
-    if is_sound:
-        if not is_speaking:
-            print("[INFO] Speaking detected...", end="", flush=True)
-            is_speaking = True
-        silent_chunks_count = 0
-        audio_buffer.append(indata.copy())
-    elif is_speaking:
-        print(".", end="", flush=True)
-        silent_chunks_count += 1
-        num_pause_blocks = int((PAUSE_DURATION_SECONDS * SAMPLE_RATE) / BLOCK_SIZE)
-
-        if silent_chunks_count > num_pause_blocks:
-            is_speaking = False
-            silent_chunks_count = 0
-            save_and_transcribe()
-            stop_listening_event.set() # Signal the main loop to stop listening
-
-def listen_and_transcribe():
+# Transcription logic settings (voice activity detection, see vad.py)
+START_SPEECH_SECONDS = 0.06 # Voiced audio needed before speech is considered started
+PAUSE_DURATION_SECONDS = 0.6 # Silence needed after speech before transcribing
+PRE_ROLL_SECONDS = 0.2 # Audio kept from just before speech started
+HANGOVER_SECONDS = 0.15 # Audio kept after the last voiced frame
+MAX_UTTERANCE_SECONDS = 30.0 # Longer utterances are cut off and transcribed
+REJECTED_FORMAT_STATUS_CODES = (400, 415, 422) # The API's answer to an upload format it does not take
+
+_upload_codec = STT_UPLOAD_CODEC # Switched to "wav" for the process if the API rejects the codec
+
+def create_vad(sample_rate: int = SAMPLE_RATE):
+    """Builds the voice activity detector for a listening session. Replace to plug in another VAD."""
+    return AdaptiveVAD(
+        sample_rate,
+        start_ms=int(START_SPEECH_SECONDS * 1000),
+        end_ms=int(PAUSE_DURATION_SECONDS * 1000),
+        pre_roll_ms=int(PRE_ROLL_SECONDS * 1000),
+        hangover_ms=int(HANGOVER_SECONDS * 1000),
+    )
+
+def _request_transcription(audio_file):
+    # The shared SDK client is built on the first transcription (or by the startup warm-up)
+    return http_client.get_sarvam_client().speech_to_text.translate(
+        file=audio_file, model="saaras:v2.5", request_options=http_client.sdk_request_options()
+    )
+
+def transcribe_audio(wav_file):
+    """Sends a WAV file object (on disk or in memory) for transcription. Returns None on error."""
+    with tracing.span("stt") as span:
+        try:
+            return _request_transcription(wav_file)
+        except Exception as e:
+            span.tag(status="error")
+            print(f"[ERROR] Could not transcribe: {e}")
+            return None
+
+def transcribe_samples(samples, sample_rate: int = SAMPLE_RATE, trim: bool = STT_TRIM_SILENCE):
+    """
+    Encodes an int16 utterance for upload (trimmed, downsampled and compressed, see
+    audio_encoding.py) and transcribes it. Pass trim=False for audio the VAD already cut.
+    Returns None on error.
+    """
+    global _upload_codec
+    with tracing.span("stt_encode"):
+        upload = encode_for_stt(samples, sample_rate, codec=_upload_codec, trim=trim)
+    print(f"[INFO] Uploading {upload.describe()}.")
+    with tracing.span("stt", codec=upload.codec) as span:
+        span.tag(upload_bytes=upload.nbytes, wav_bytes=upload.wav_bytes)
+        try:
+            return _request_transcription(upload.file)
+        except Exception as e:
+            if upload.codec != "wav" and getattr(e, "status_code", None) in REJECTED_FORMAT_STATUS_CODES:
+                print(f"[WARNING] STT rejected {upload.codec} uploads ({e}); sending WAV from now on.")
+                _upload_codec = "wav"
+            else:
+                span.tag(status="error")
+                print(f"[ERROR] Could not transcribe: {e}")
+                return None
+    return transcribe_samples(samples, sample_rate, trim)
+
+class ListeningSession:
+    """
+    Capture, voice activity detection and transcription state for one listener.
+    Each session owns its buffers, so several sessions can run side by side.
+    """
+    def __init__(self, streaming: bool = False):
+        self.voice_detector = create_vad()
+        self.capture = CaptureBuffer(SAMPLE_RATE, MAX_UTTERANCE_SECONDS, self.voice_detector.lookback_samples)
+        self.streaming = streaming
+        self.streaming_transcriber = None # Set while an utterance is streamed over the websocket
+        self.is_speaking = False
+        self.result_queue = queue.Queue() # Thread-safe queue to hold the transcription result
+        self.stop_listening_event = threading.Event() # Event to stop the audio stream
+        # Trace tags bound by the caller, for spans recorded on the audio and transcription threads
+        self.trace_context = contextvars.copy_context()
+
+    def transcribe_and_queue(self):
+        """Sends the captured utterance for transcription and puts the result in the queue."""
+        print("\n[INFO] Pause detected. Transcribing speech...")
+        # The VAD already cut the utterance from the pre-roll to the hangover
+        self.result_queue.put(transcribe_samples(self.capture.utterance_samples(), SAMPLE_RATE, trim=False))
+
+    def finish_stream_and_queue(self):
+        """Waits for the final streamed transcript and puts it in the queue."""
+        print("\n[INFO] Pause detected. Finalizing streamed transcript...")
+        with tracing.span("stt_stream_final"):
+            result = self.streaming_transcriber.finish()
+        if result is not None and result.final_latency_seconds is not None:
+            print(f"[INFO] Final transcript {result.final_latency_seconds * 1000:.0f} ms after endpoint.")
+        self.result_queue.put(result)
+
+    def _end_utterance(self, sample: int | None = None):
+        self.is_speaking = False
+        self.capture.end_utterance(sample)
+        if len(self.capture.utterance_samples()) == 0:
+            self.result_queue.put(None)
+        elif self.streaming_transcriber:
+            threading.Thread(target=self.trace_context.copy().run, args=(self.finish_stream_and_queue,)).start()
+        else:
+            threading.Thread(target=self.trace_context.copy().run, args=(self.transcribe_and_queue,)).start()
+        self.stop_listening_event.set() # Signal the listener to stop
+
+    def audio_callback(self, indata, frames, time, status):
+        """Callback function for the audio stream to detect voice activity."""
+        if status:
+            print(f"[WARNING] Audio status error: {status}")
+        if self.stop_listening_event.is_set():
+            return # The utterance is complete; ignore blocks delivered before the stream closes
+
+        block = indata[:, 0]
+        self.capture.write(block)
+        if self.is_speaking and self.streaming_transcriber:
+            self.streaming_transcriber.send_frame(block)
+
+        for event in self.voice_detector.process(block):
+            if event.kind == "speech_start" and not self.is_speaking:
+                print("[INFO] Speaking detected...", end="", flush=True)
+                self.is_speaking = True
+                self.capture.start_utterance(event.sample)
+                if self.streaming_transcriber:
+                    self.streaming_transcriber.send_frame(self.capture.utterance_samples()) # Pre-roll so far
+            elif event.kind == "speech_end" and self.is_speaking:
+                # Endpointing delay: from the last voiced frame until the pause was confirmed
+                endpoint_delay = (event.detected_at - event.sample + self.voice_detector.hangover_samples) / SAMPLE_RATE
+                self.trace_context.copy().run(tracing.record, "vad_endpoint", endpoint_delay)
+                self._end_utterance(event.sample) # Trailing silence past the hangover is dropped
+                return
+
+        if self.capture.is_full:
+            print(f"\n[WARNING] Utterance reached {MAX_UTTERANCE_SECONDS:.0f}s, transcribing what was captured.")
+            self._end_utterance()
+
+    def listen(self):
+        """Starts listening to the microphone and blocks until a transcription is returned."""
+        if self.streaming:
+            try:
+                self.streaming_transcriber = StreamingTranscriber(
+                    http_client.get_sarvam_client(), SAMPLE_RATE, on_partial=lambda text: print(f"\n[INFO] Partial: {text}", end="", flush=True)
+                ).start()
+            except Exception as e:
+                print(f"[WARNING] Could not open streaming STT, falling back to upload after pause: {e}")
+
+        sd = get_sounddevice() # Only microphone sessions need PortAudio; the telephony server does not
+
+        print("\n" + "="*50)
+        print("[INFO] Listening... Speak when you're ready.")
+
+        with sd.InputStream(
+            samplerate=SAMPLE_RATE,
+            blocksize=BLOCK_SIZE,
+            channels=CHANNELS,
+            dtype=DTYPE,
+            callback=self.audio_callback
+        ):
+            self.stop_listening_event.wait() # Wait until the callback signals to stop
+
+        # Block until the transcription thread puts a result in the queue
+        return self.result_queue.get()
+
+def listen_and_transcribe(streaming: bool = False):
     """
     Starts listening to the microphone and blocks until a transcription is returned.
+    With `streaming`, audio is sent over the websocket while the user speaks, instead of
+    being uploaded after the pause.
     """
-    global audio_buffer, is_speaking, silent_chunks_count
-    # Reset state for the new listening session
-    audio_buffer = []
-    is_speaking = False
-    silent_chunks_count = 0
-    stop_listening_event.clear()
-    
-    # Clear the queue in case there are old results
-    while not stt_result_queue.empty():
-        stt_result_queue.get()
-
-    print("\n" + "="*50)
-    print("[INFO] Listening... Speak when you're ready.")
-    
-    with sd.InputStream(
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCK_SIZE,
-        channels=CHANNELS,
-        dtype=DTYPE,
-        callback=audio_callback
-    ):
-        stop_listening_event.wait() # Wait until the callback signals to stop
-
-    # Block until the transcription thread puts a result in the queue
-    transcription = stt_result_queue.get()
-    return transcription
+    return ListeningSession(streaming=streaming).listen()
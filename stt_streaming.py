@@ -0,0 +1,191 @@
+"""
+Streaming speech-to-text over Sarvam's speech-to-text-translate websocket.
+
+Audio frames are sent while the caller is still talking, so by the time the pause is
+detected most of the utterance has already been transcribed and only a flush is left.
+
+The API marks no transcript as the answer to the flush, and partials already on their way
+may arrive after it. So once the server starts answering, the utterance ends when nothing
+more has arrived for FINAL_GRACE_SECONDS (or at once, if a message carries a final flag).
+Point SARVAM_WS_URL at a local stand-in (see mock_sarvam.py) to run it offline.
+"""
+import base64
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import http_client
+
+# --- Configuration ---
+STT_MODEL = "saaras:v2.5"
+INPUT_AUDIO_CODEC = "pcm_s16le"  # Raw 16-bit frames straight from the audio callback
+FINAL_TIMEOUT_SECONDS = 2.0      # Max wait for the final transcript after flushing
+FINAL_GRACE_SECONDS = 0.2        # Quiet time after the last message that follows the flush
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+@dataclass
+class StreamingTranscript:
+    """Result of a streamed utterance; `transcript` matches the REST response attribute."""
+    transcript: str
+    language_code: str | None = None
+    partials: list = field(default_factory=list)
+    final_latency_seconds: float | None = None  # From flush to final transcript
+
+
+class StreamingTranscriber:
+    """
+    One streamed utterance. Call start(), feed frames with send_frame() from the audio
+    callback (non-blocking), then finish() once endpointing decides the caller stopped.
+    """
+    def __init__(self, client=None, sample_rate: int = 16000, on_partial=None):
+        self.client = client or http_client.get_sarvam_client()
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial  # Called with each partial transcript string
+        self._outgoing = queue.Queue()
+        self._segments = []
+        self._partials = []
+        self._language_code = None
+        self._segments_lock = threading.Lock()
+        self._final_event = threading.Event()
+        self._reply_event = threading.Event() # Set for every message after the flush
+        self._flushed_at = None
+        self._final_at = None
+        self._socket = None
+        self._connection = None
+        self._threads = []
+        self.error = None
+
+    def start(self):
+        """Opens the websocket and starts the sender/receiver threads."""
+        self._connection = self.client.speech_to_text_translate_streaming.connect(
+            model=STT_MODEL,
+            input_audio_codec=INPUT_AUDIO_CODEC,
+            sample_rate=str(self.sample_rate),
+            flush_signal="true",
+        )
+        self._socket = self._connection.__enter__()
+        self._threads = [
+            threading.Thread(target=self._send_loop, daemon=True),
+            threading.Thread(target=self._receive_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def send_frame(self, frame):
+        """Queues one block of int16 audio (NumPy array or bytes). Safe to call from the audio callback."""
+        self._outgoing.put(frame.tobytes() if hasattr(frame, "tobytes") else bytes(frame))
+
+    def _send_loop(self):
+        try:
+            while True:
+                item = self._outgoing.get()
+                if item is _CLOSE:
+                    return
+                if item is _FLUSH:
+                    self._flushed_at = time.perf_counter()
+                    self._socket.flush()
+                    continue
+                self._socket.translate(
+                    audio=base64.b64encode(item).decode("ascii"),
+                    encoding="audio/wav", # Only value the API accepts; the PCM codec is set on connect
+                    sample_rate=self.sample_rate,
+                )
+        except Exception as e:
+            self.error = e
+            self._end_wait()
+
+    def _receive_loop(self):
+        try:
+            while True:
+                message = self._socket.recv()
+                if message.type == "error":
+                    self.error = RuntimeError(f"Streaming STT error: {getattr(message.data, 'error', message.data)}")
+                    self._end_wait()
+                    return
+                if message.type != "data":
+                    continue # VAD events
+                transcript = (getattr(message.data, "transcript", "") or "").strip()
+                with self._segments_lock:
+                    if transcript:
+                        self._segments.append(transcript)
+                    self._language_code = getattr(message.data, "language_code", None) or self._language_code
+                if self._flushed_at is not None:
+                    self._final_at = time.perf_counter()
+                    if self._is_final(message.data):
+                        self._end_wait()
+                        return
+                    self._reply_event.set()
+                    continue
+                if transcript:
+                    partial = " ".join(self._segments)
+                    self._partials.append(partial)
+                    if self.on_partial:
+                        self.on_partial(partial)
+        except Exception as e:
+            if not self._final_event.is_set():
+                self.error = e
+                self._end_wait()
+
+    def _end_wait(self):
+        """Stops finish() waiting: the final transcript arrived or the stream failed."""
+        self._final_event.set()
+        self._reply_event.set()
+
+    @staticmethod
+    def _is_final(data) -> bool:
+        """Whether the server flagged a transcript as final; the API documents no such flag, so usually not."""
+        for marker in ("is_final", "final"):
+            final = getattr(data, marker, None)
+            if final is not None:
+                return str(final).lower() == "true"
+        return False
+
+    def _wait_for_final(self, timeout: float) -> bool:
+        """Waits for the replies to the flush until they go quiet. False if none came in time."""
+        deadline = time.perf_counter() + timeout
+        replied = False
+        while not self._final_event.is_set():
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                return replied
+            if self._reply_event.wait(min(left, FINAL_GRACE_SECONDS) if replied else left):
+                self._reply_event.clear()
+                replied = True
+            elif replied:
+                return True # Quiet for the grace window: the last reply was the final one
+        return True
+
+    def finish(self, timeout: float = FINAL_TIMEOUT_SECONDS) -> StreamingTranscript | None:
+        """Flushes the stream, waits for the final transcript and closes the connection."""
+        self._outgoing.put(_FLUSH)
+        if not self._wait_for_final(timeout):
+            print("[WARNING] Streaming STT did not answer the flush in time; using transcripts received so far.")
+        self.close()
+
+        with self._segments_lock:
+            segments = list(self._segments)
+        if not segments:
+            if self.error:
+                print(f"[ERROR] Streaming transcription failed: {self.error}")
+            return None
+        latency = self._final_at - self._flushed_at if self._final_at and self._flushed_at else None
+        return StreamingTranscript(
+            transcript=" ".join(segments),
+            language_code=self._language_code,
+            partials=list(self._partials),
+            final_latency_seconds=latency,
+        )
+
+    def close(self):
+        self._outgoing.put(_CLOSE)
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except Exception:
+                pass # The connection is going away either way
+            self._connection = None
@@ -0,0 +1,319 @@
+"""
+Append-only storage for completed candidate submissions.
+
+Every backend appends: saving one record costs the same no matter how many are stored,
+unlike rewriting a whole JSON array. Writes go through a single writer thread that
+commits whatever is queued in one batch (group commit), so concurrent conversations
+finishing together share one flush/fsync and no record is lost.
+
+    store = get_submission_store()
+    store.append({"name": "Ravi", ...})   # returns once the record is on disk
+    for record in store.records(): ...
+
+Backends: "jsonl" (one JSON object per line, default) and "sqlite" (WAL mode).
+
+Records from the old db.json array are imported at startup by main.py and app.py, or by hand:
+
+    python submission_store.py --migrate
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+import config # Loads .env before the settings below are read
+
+try:
+    import fcntl # Advisory lock so several processes can append to the same file
+except ImportError:
+    fcntl = None
+
+# --- Configuration ---
+SUBMISSION_STORE_BACKEND = os.getenv("SUBMISSION_STORE", "jsonl")
+SUBMISSION_STORE_FILE = os.getenv("SUBMISSION_STORE_FILE")  # Default: submissions.<backend extension>
+LEGACY_DB_FILE = "db.json"
+MAX_BATCH_SIZE = 256  # Records committed together at most
+FSYNC = os.getenv("SUBMISSION_STORE_FSYNC", "1") != "0"
+
+
+class _PendingWrite:
+    __slots__ = ("record", "done", "error")
+
+    def __init__(self, record: Optional[dict]):
+        self.record = record # None marks a flush barrier
+        self.done = threading.Event()
+        self.error = None
+
+
+class SubmissionStore:
+    """
+    Base class for the append-only backends. Subclasses implement _open_writer(),
+    _write_batch(), _close_writer() (called on the writer thread) and records().
+    """
+    def __init__(self, path: str, max_batch_size: int = MAX_BATCH_SIZE):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self.saved = 0
+        self.commits = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict, wait: bool = True) -> bool:
+        """
+        Queues a record for the next group commit. With `wait`, blocks until it is on disk
+        and returns False if the write failed.
+        """
+        if self._closed:
+            raise RuntimeError("Submission store is closed")
+        pending = _PendingWrite(dict(record))
+        self._queue.put(pending)
+        if not wait:
+            return True
+        pending.done.wait()
+        return pending.error is None
+
+    def append_many(self, records: list) -> list:
+        """Queues records together, waits until they are committed, and returns the ones that failed."""
+        pending = [_PendingWrite(dict(record)) for record in records]
+        if self._closed:
+            raise RuntimeError("Submission store is closed")
+        for write in pending:
+            self._queue.put(write)
+        for write in pending:
+            write.done.wait()
+        return [record for record, write in zip(records, pending) if write.error is not None]
+
+    def flush(self):
+        """Blocks until every record queued so far is committed."""
+        if self._closed:
+            return
+        barrier = _PendingWrite(None)
+        self._queue.put(barrier)
+        barrier.done.wait()
+
+    def close(self):
+        """Commits pending records and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def count(self) -> int:
+        return sum(1 for _ in self.records())
+
+    def stats(self) -> dict:
+        return {
+            "saved": self.saved,
+            "commits": self.commits,
+            "records_per_commit": self.saved / self.commits if self.commits else 0.0,
+        }
+
+    def records(self) -> Iterator[dict]:
+        raise NotImplementedError
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def _write_batch(self, records: list):
+        raise NotImplementedError
+
+    def _close_writer(self):
+        raise NotImplementedError
+
+    def _run(self):
+        try:
+            self._open_writer()
+            open_error = None
+        except (OSError, sqlite3.Error) as e:
+            print(f"[ERROR] Could not open submission store {self.path}: {e}")
+            open_error = e
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Group commit: everything that queued up during the previous write goes in this one
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            records = [pending.record for pending in batch if pending.record is not None]
+            error = open_error
+            if records and open_error is None:
+                try:
+                    self._write_batch(records)
+                    self.saved += len(records)
+                    self.commits += 1
+                except (OSError, sqlite3.Error) as e:
+                    print(f"[ERROR] Failed to save {len(records)} submission(s) to {self.path}: {e}")
+                    error = e
+            for pending in batch:
+                pending.error = error
+                pending.done.set()
+        if open_error is None:
+            self._close_writer()
+
+
+class JsonlSubmissionStore(SubmissionStore):
+    """One JSON object per line, appended under an exclusive file lock."""
+    def _open_writer(self):
+        self._file = open(self.path, 'ab')
+
+    def _write_batch(self, records: list):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            self._file.write(data)
+            self._file.flush()
+            if FSYNC:
+                os.fsync(self._file.fileno())
+        finally:
+            if fcntl:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _close_writer(self):
+        self._file.close()
+
+    def records(self) -> Iterator[dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn line can only come from a crash mid-write; the other records are intact
+                    print(f"[WARNING] Skipping unreadable line {line_number} in {self.path}")
+
+
+class SqliteSubmissionStore(SubmissionStore):
+    """Rows in an SQLite table in WAL mode, so reads never block the writer."""
+    def __init__(self, path: str, max_batch_size: int = MAX_BATCH_SIZE):
+        db = sqlite3.connect(path)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)"
+            )
+            db.commit()
+        finally:
+            db.close()
+        super().__init__(path, max_batch_size)
+
+    def _open_writer(self):
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute(f"PRAGMA synchronous={'FULL' if FSYNC else 'OFF'}")
+
+    def _write_batch(self, records: list):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO submissions (data) VALUES (?)",
+                [(json.dumps(record, ensure_ascii=False),) for record in records]
+            )
+
+    def _close_writer(self):
+        self._db.close()
+
+    def count(self) -> int:
+        db = sqlite3.connect(self.path)
+        try:
+            return db.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+        finally:
+            db.close()
+
+    def records(self) -> Iterator[dict]:
+        db = sqlite3.connect(self.path)
+        try:
+            for (data,) in db.execute("SELECT data FROM submissions ORDER BY id"):
+                yield json.loads(data)
+        finally:
+            db.close()
+
+
+BACKENDS = {
+    "jsonl": (JsonlSubmissionStore, "submissions.jsonl"),
+    "sqlite": (SqliteSubmissionStore, "submissions.sqlite3"),
+}
+
+
+def open_submission_store(backend: str = SUBMISSION_STORE_BACKEND, path: Optional[str] = SUBMISSION_STORE_FILE) -> SubmissionStore:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown submission store backend '{backend}', expected one of {sorted(BACKENDS)}")
+    store_class, default_path = BACKENDS[backend]
+    return store_class(path or default_path)
+
+
+def migrate_legacy_db(store: SubmissionStore, legacy_path: str = LEGACY_DB_FILE) -> int:
+    """
+    Moves the records of the old db.json array into the store, once. The old file is
+    renamed to <name>.migrated only when every record was saved; otherwise it is rewritten
+    with just the records that failed, so the next run retries those without duplicates.
+    Returns the number of records migrated.
+    """
+    if not os.path.exists(legacy_path) or os.path.getsize(legacy_path) == 0:
+        return 0
+    try:
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] Could not read {legacy_path} for migration, leaving it in place: {e}")
+        return 0
+    if not isinstance(records, list) or not records:
+        return 0
+
+    failed = store.append_many(records)
+    migrated = len(records) - len(failed)
+    if failed:
+        temp_path = legacy_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(failed, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, legacy_path)
+        print(f"[ERROR] {len(failed)} submission(s) from {legacy_path} could not be saved to {store.path}; "
+              f"they were left in {legacy_path} for the next run.")
+    else:
+        os.replace(legacy_path, legacy_path + ".migrated")
+    if migrated:
+        print(f"[INFO] Migrated {migrated} submission(s) from {legacy_path} to {store.path}.")
+    return migrated
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_submission_store() -> SubmissionStore:
+    """Returns the process-wide store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = open_submission_store()
+            atexit.register(_store.close)
+    return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the submission store.")
+    parser.add_argument("--migrate", action="store_true", help="Import the records of an old db.json array.")
+    parser.add_argument("--from", dest="legacy_path", default=LEGACY_DB_FILE, help="Legacy file to import.")
+    args = parser.parse_args()
+    if not args.migrate:
+        parser.error("nothing to do; pass --migrate")
+    store = get_submission_store()
+    print(f"[INFO] {migrate_legacy_db(store, args.legacy_path)} submission(s) migrated, {store.count()} stored in {store.path}.")
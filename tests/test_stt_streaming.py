@@ -0,0 +1,55 @@
+"""Streaming STT against the local websocket stand-in (mock_sarvam.MockStreamingSTTServer)."""
+import time
+
+import numpy as np
+import pytest
+
+import http_client
+from mock_sarvam import MockStreamingSTTServer
+from stt_streaming import FINAL_GRACE_SECONDS, FINAL_TIMEOUT_SECONDS, StreamingTranscriber
+
+SAMPLE_RATE = 16000
+BLOCK = np.zeros(SAMPLE_RATE // 50, dtype=np.int16) # 20 ms of audio, as the capture callback delivers it
+TRANSCRIPT = "my name is Ravi Kumar"
+
+
+def stream(server, seconds: float, **kwargs):
+    client = http_client.create_sarvam_client(api_key="mock-key")
+    transcriber = StreamingTranscriber(client=client, sample_rate=SAMPLE_RATE, **kwargs).start()
+    for _ in range(int(seconds * 50)):
+        transcriber.send_frame(BLOCK)
+    return transcriber.finish(timeout=5.0)
+
+
+@pytest.fixture
+def server(monkeypatch, request):
+    server = MockStreamingSTTServer(transcript=TRANSCRIPT, sample_rate=SAMPLE_RATE, **getattr(request, "param", {})).start()
+    monkeypatch.setattr(http_client, "SARVAM_WS_URL", server.url)
+    yield server
+    server.stop()
+
+
+def test_final_transcript_after_flush(server):
+    result = stream(server, 0.4)
+    assert result.transcript == TRANSCRIPT
+    assert result.final_latency_seconds is not None
+    assert server.bytes_received == int(0.4 * 50) * BLOCK.nbytes
+
+
+@pytest.mark.parametrize("server", [{"seconds_per_partial": 0.1, "partial_latency": 0.1}], indirect=True)
+def test_partials_in_flight_at_flush_do_not_end_the_utterance(server):
+    # The frames go out faster than the partials come back, so partials arrive after the flush
+    partials = []
+    result = stream(server, 0.5, on_partial=partials.append)
+    assert result.transcript == TRANSCRIPT
+    assert result.partials == partials
+    assert TRANSCRIPT not in partials # Replies after the flush are not reported as partials
+
+
+@pytest.mark.parametrize("server", [{"seconds_per_partial": 0.1, "cumulative_metrics": False}], indirect=True)
+def test_per_segment_metrics_do_not_hold_up_the_final_transcript(server):
+    started = time.perf_counter()
+    result = stream(server, 0.5)
+    assert result.transcript == TRANSCRIPT
+    # Final latency plus the grace window, well short of the timeout
+    assert time.perf_counter() - started < FINAL_GRACE_SECONDS + 0.5 < FINAL_TIMEOUT_SECONDS
@@ -0,0 +1,30 @@
+"""Noise floor tracking and endpointing of vad.AdaptiveVAD."""
+import numpy as np
+import pytest
+
+from vad import AdaptiveVAD
+
+SAMPLE_RATE = 16000
+
+
+def noisy_speech(seconds_noise: float, seconds_speech: float, noise_rms: float = 300.0, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n_noise, n_speech = int(seconds_noise * SAMPLE_RATE), int(seconds_speech * SAMPLE_RATE)
+    t = np.arange(n_speech) / SAMPLE_RATE
+    voiced = 6000 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)) # Syllable-rate envelope
+    samples = rng.normal(0, noise_rms, n_noise + n_speech)
+    samples[n_noise:] += voiced
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+@pytest.mark.parametrize("block", [320, 1024, 8000])
+def test_noise_floor_does_not_follow_continuous_speech(block):
+    detector = AdaptiveVAD(sample_rate=SAMPLE_RATE)
+    samples = noisy_speech(1.0, 4.0)
+    for offset in range(0, SAMPLE_RATE, block):
+        detector.process(samples[offset:offset + block])
+    learned_db = detector.noise_db
+    for offset in range(SAMPLE_RATE, samples.size, block):
+        detector.process(samples[offset:offset + block])
+    assert detector.in_speech
+    assert detector.noise_db < learned_db + 3.0
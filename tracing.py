@@ -0,0 +1,310 @@
+"""
+Lightweight tracing for the voice pipeline.
+
+Each stage (VAD endpointing, STT, LLM validation, translation, TTS, playback) runs in a span:
+
+    with tracing.span("stt") as span:
+        ...
+        span.tag(status="error")
+
+Spans pick up the tags bound with tracing.context() (session id, step key, language) and
+count the HTTP attempts made inside them, so retries are visible per stage. Finished spans
+feed in-process latency histograms, exported as Prometheus text (prometheus_text()) or
+JSON lines (write_histograms()), and are appended to VOICEBOT_TRACE_FILE if set.
+
+Tracing is off unless VOICEBOT_TRACING=1 or enable() is called. While it is off, span()
+and context() return shared no-op objects, so instrumented code pays one flag check.
+"""
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+
+import config # Loads .env before the settings below are read
+
+# --- Configuration ---
+TRACING_ENABLED = os.getenv("VOICEBOT_TRACING", "0") == "1"
+TRACE_FILE = os.getenv("VOICEBOT_TRACE_FILE") # One JSON line per finished span
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0) # Seconds
+HISTOGRAM_LABELS = ("step", "language") # Tags that split histograms; session ids would explode the series count
+METRIC_NAME = "voicebot_stage_duration_seconds"
+
+_enabled = False
+_trace_file = None
+_lock = threading.Lock()
+_histograms = {} # (stage, label values) -> LatencyHistogram
+_context_tags = contextvars.ContextVar("tracing_context", default=None)
+_current_span = contextvars.ContextVar("tracing_span", default=None)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with retry and error counts."""
+    def __init__(self, buckets: tuple = HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.retries = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, retries: int = 0, error: bool = False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.retries += retries
+        self.errors += error
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.retries += other.retries
+        self.errors += other.errors
+
+    def quantile(self, q: float) -> float:
+        """Estimated quantile, interpolated linearly inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class Span:
+    __slots__ = ("name", "tags", "attempts", "started", "duration", "_token")
+
+    def __init__(self, name: str, tags: dict):
+        bound = _context_tags.get()
+        self.name = name
+        self.tags = {**bound, **tags} if bound else tags
+        self.attempts = 0
+        self.duration = None
+
+    def tag(self, **tags) -> "Span":
+        self.tags.update(tags)
+        return self
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.duration = time.perf_counter() - self.started
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.tags.setdefault("status", "error")
+            self.tags.setdefault("error", exc_type.__name__)
+        _finish(self.name, self.duration, self.tags, self.attempts)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def tag(self, **tags):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+class _Context:
+    __slots__ = ("tags", "_token")
+
+    def __init__(self, tags: dict):
+        self.tags = tags
+
+    def __enter__(self):
+        bound = _context_tags.get()
+        self._token = _context_tags.set({**bound, **self.tags} if bound else self.tags)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _context_tags.reset(self._token)
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = _NoopSpan()
+
+
+def span(name: str, **tags):
+    """Times the enclosed block as stage `name`."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, tags)
+
+
+def context(**tags):
+    """Binds tags (session, step, language, ...) to every span started inside the block."""
+    if not _enabled:
+        return _NOOP_CONTEXT
+    return _Context(tags)
+
+
+def record(name: str, seconds: float, **tags):
+    """Records a duration measured some other way, e.g. the VAD endpointing delay."""
+    if not _enabled:
+        return
+    bound = _context_tags.get()
+    _finish(name, seconds, {**bound, **tags} if bound else tags, 0)
+
+
+def count_attempt():
+    """Counts one HTTP attempt against the innermost open span (called by http_client)."""
+    if not _enabled:
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.attempts += 1
+
+
+def tag_current(**tags):
+    """Adds tags to the innermost open span, if any."""
+    if not _enabled:
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.tags.update(tags)
+
+
+def _finish(name: str, seconds: float, tags: dict, attempts: int):
+    retries = tags.get("retries", max(0, attempts - 1))
+    error = tags.get("status") == "error"
+    key = (name, tuple(str(tags.get(label, "")) for label in HISTOGRAM_LABELS))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        histogram.observe(seconds, retries, error)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps({
+                "ts": time.time(), "span": name, "duration_ms": round(seconds * 1000, 3),
+                "retries": retries, **tags,
+            }, default=str) + "\n")
+
+
+def enable(trace_file: str | None = TRACE_FILE):
+    """Turns tracing on; finished spans are also appended to `trace_file` if given."""
+    global _enabled, _trace_file
+    with _lock:
+        if trace_file and _trace_file is None:
+            _trace_file = open(trace_file, 'a', encoding='utf-8', buffering=1)
+        _enabled = True
+
+
+def disable():
+    global _enabled, _trace_file
+    with _lock:
+        _enabled = False
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drops all recorded histograms."""
+    with _lock:
+        _histograms.clear()
+
+
+def histograms(by_labels: bool = True) -> list:
+    """Snapshot of the histograms as dicts, split by HISTOGRAM_LABELS or merged per stage."""
+    with _lock:
+        merged = {}
+        for (name, labels), histogram in _histograms.items():
+            key = (name, labels) if by_labels else (name, ())
+            if key not in merged:
+                merged[key] = LatencyHistogram(histogram.buckets)
+            merged[key].merge(histogram)
+    rows = []
+    for (name, labels), histogram in sorted(merged.items()):
+        rows.append({
+            "stage": name,
+            **dict(zip(HISTOGRAM_LABELS, labels)),
+            "count": histogram.count,
+            "sum_seconds": round(histogram.total, 6),
+            "p50_ms": round(histogram.quantile(0.50) * 1000, 1),
+            "p95_ms": round(histogram.quantile(0.95) * 1000, 1),
+            "p99_ms": round(histogram.quantile(0.99) * 1000, 1),
+            "max_ms": round(histogram.max * 1000, 1),
+            "retries": histogram.retries,
+            "errors": histogram.errors,
+            "buckets": dict(zip([*map(str, histogram.buckets), "+Inf"], histogram.counts)),
+        })
+    return rows
+
+
+def write_histograms(path: str, by_labels: bool = True):
+    """Appends the current histograms to `path`, one JSON line each."""
+    timestamp = time.time()
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in histograms(by_labels):
+            f.write(json.dumps({"ts": timestamp, **row}) + "\n")
+
+
+def _label_string(name: str, labels: tuple, extra: str = "") -> str:
+    pairs = [f'stage="{name}"'] + [f'{label}="{value}"' for label, value in zip(HISTOGRAM_LABELS, labels) if value]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def prometheus_text() -> str:
+    """The histograms in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted((key, histogram) for key, histogram in _histograms.items())
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of voice pipeline stages.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for (name, labels), histogram in items:
+            cumulative = 0
+            for bound, count in zip([*map(str, histogram.buckets), "+Inf"], histogram.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{METRIC_NAME}_bucket{_label_string(name, labels, le)} {cumulative}")
+            lines.append(f"{METRIC_NAME}_sum{_label_string(name, labels)} {histogram.total:.6f}")
+            lines.append(f"{METRIC_NAME}_count{_label_string(name, labels)} {histogram.count}")
+        for metric, attribute, help_text in (("voicebot_stage_retries_total", "retries", "HTTP retries made inside stages."),
+                                             ("voicebot_stage_errors_total", "errors", "Stages that failed.")):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), histogram in items:
+                lines.append(f"{metric}{_label_string(name, labels)} {getattr(histogram, attribute)}")
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """Per-stage latency table for the end of a run."""
+    rows = histograms(by_labels=False)
+    if not rows:
+        return "  (no spans recorded)"
+    lines = [f"  {'stage':14s} {'count':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s} {'retries':>8s} {'errors':>7s}"]
+    for row in rows:
+        lines.append(f"  {row['stage']:14s} {row['count']:6d} {row['p50_ms']:8.0f} {row['p95_ms']:8.0f} "
+                     f"{row['max_ms']:8.0f} {row['retries']:8d} {row['errors']:7d}")
+    return "\n".join(lines)
+
+
+if TRACING_ENABLED:
+    enable()
@@ -1,26 +1,23 @@
-import os
 import requests
-import dotenv
 
-# Load environment variables
-dotenv.load_dotenv()
-API_KEY = os.getenv("SARVAM_API_KEY")
-API_URL = "https://api.sarvam.ai/translate"
+import config
+import http_client
+import latency_budget
+import tracing
+from translation_cache import TranslationCache
 
-def translate_text(text: str, target_language_code: str) -> str:
-    """
-    Translates the given text to the target language using Sarvam AI.
+API_KEY = config.SARVAM_API_KEY
+API_PATH = "/translate"
+SOURCE_LANGUAGE_CODE = "en-IN" # our source text is always English
 
-    Args:
-        text: The text to be translated.
-        target_language_code: The language code to translate to (e.g., 'hi-IN').
+# Shared by every conversation in this process, backed by a file that survives restarts
+translation_cache = TranslationCache()
 
-    Returns:
-        The translated text, or the original text if translation fails.
-    """
+def _request_translation(text: str, target_language_code: str, source_language_code: str = SOURCE_LANGUAGE_CODE) -> str | None:
+    """Calls the Sarvam translate API. Returns None if the translation failed."""
     if not API_KEY:
         print("[ERROR] SARVAM_API_KEY not set for translation.")
-        return text
+        return None
 
     headers = {
         "api-subscription-key": API_KEY,
@@ -28,28 +25,66 @@ def translate_text(text: str, target_language_code: str) -> str:
 
     json = {
         "input": text,
-        "source_language_code": "en-IN", # our source text is always English
+        "source_language_code": source_language_code,
         "target_language_code": target_language_code
     }
 
     try:
-        response = requests.post(API_URL, headers=headers, json=json, timeout=20)
+        response = http_client.post(API_PATH, headers=headers, json=json)
         response.raise_for_status()
         response_data = response.json()
         # print(f"[DEBUG] Translation response data: {response_data}")
-        
+
         translated_text = response_data.get('translated_text')
         if translated_text:
             print(f"[INFO] Translation successful: '{text}' -> '{translated_text}'")
             return translated_text
         else:
             print(f"[WARNING] Translation response did not contain output.")
-            return text # Fallback to original text
+            return None
 
     except requests.exceptions.RequestException as e:
         print(f"[ERROR] Translation API call failed: {e}")
-        return text # Fallback to original text
+        return None
+
+def translate_text(text: str, target_language_code: str) -> str:
+    """
+    Translates the given text to the target language using Sarvam AI.
+    Results are served from the translation cache when available.
+
+    Args:
+        text: The text to be translated.
+        target_language_code: The language code to translate to (e.g., 'hi-IN').
+
+    Returns:
+        The translated text, or the original text if translation fails or the turn's
+        latency budget runs out.
+    """
+    with tracing.span("translate", target=target_language_code) as span:
+        cached = translation_cache.get(text, SOURCE_LANGUAGE_CODE, target_language_code)
+        if cached is not None:
+            span.tag(cache="hit")
+            return cached
+
+        span.tag(cache="miss")
+        # A translation that arrives after the turn's budget ran out is still cached for next time
+        remember = lambda late_text: translation_cache.put(text, SOURCE_LANGUAGE_CODE, target_language_code, late_text)
+        translated_text = latency_budget.guarded_call("translate", _request_translation, text, target_language_code,
+                                                      on_late_result=remember)
+        if translated_text is None:
+            span.tag(status="error")
+            latency_budget.record_fallback("untranslated")
+            return text # Fallback to original text, never cached
+
+        translation_cache.put(text, SOURCE_LANGUAGE_CODE, target_language_code, translated_text)
+        return translated_text
+
+def warm_translations(texts, target_language_code: str) -> int:
+    """Pre-translates the given texts into the cache. Returns how many new entries were added."""
+    warmed = translation_cache.warm(texts, target_language_code, _request_translation, SOURCE_LANGUAGE_CODE)
+    print(f"[INFO] Translation cache warmed for {target_language_code}: {warmed} new entries, stats={translation_cache.stats()}")
+    return warmed
 
 # Example usage:
 # translated = translate_text("Hello, how are you?", "hi-IN")
-# print(translated)
\ No newline at end of file
+# print(translated)
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import config # Loads .env before the settings below are read
+
+# --- Configuration ---
+CACHE_DB_FILE = os.getenv("TRANSLATION_CACHE_FILE", "translation_cache.sqlite3")
+MAX_MEMORY_ENTRIES = 512
+MAX_DISK_ENTRIES = 20000
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60  # Translations of fixed prompts rarely change
+
+
+class TranslationCache:
+    """
+    Two-level cache for translations keyed on (source text, source language, target language).
+
+    Lookups go to an in-process LRU first and then to an SQLite file that survives restarts.
+    Entries older than the TTL are treated as misses, and both levels are trimmed to their
+    size limits (least recently used in memory, oldest first on disk).
+    """
+    def __init__(self, db_path: Optional[str] = CACHE_DB_FILE, max_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (translated_text, created_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, source_text TEXT NOT NULL,"
+                    " translated_text TEXT NOT NULL, created_at REAL NOT NULL,"
+                    " PRIMARY KEY (source_lang, target_lang, source_text))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARNING] Translation cache disk store unavailable, using memory only: {e}")
+                self._db = None
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, text: str, source_language_code: str, target_language_code: str) -> Optional[str]:
+        """Returns the cached translation, or None on a miss."""
+        key = (text, source_language_code, target_language_code)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translated_text, created_at = entry
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return translated_text
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translated_text, created_at FROM translations"
+                    " WHERE source_lang = ? AND target_lang = ? AND source_text = ?",
+                    (source_language_code, target_language_code, text)
+                ).fetchone()
+                if row and not self._is_expired(row[1]):
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, source_language_code: str, target_language_code: str, translated_text: str):
+        """Stores a successful translation in memory and on disk."""
+        key = (text, source_language_code, target_language_code)
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, translated_text, created_at)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    (source_language_code, target_language_code, text, translated_text, created_at)
+                )
+                self._trim_disk()
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARNING] Could not persist translation to cache: {e}")
+
+    def _remember(self, key, translated_text: str, created_at: float):
+        self._memory[key] = (translated_text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _trim_disk(self):
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()
+        if count > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY created_at LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
+
+    def warm(self, texts: Iterable[str], target_language_code: str, translate_fn: Callable[[str, str], Optional[str]],
+             source_language_code: str = "en-IN") -> int:
+        """
+        Translates every text that is not cached yet for the target language.
+
+        `translate_fn(text, target_language_code)` must return the translation, or None on failure
+        so that failures are not cached. Returns the number of newly cached entries.
+        """
+        warmed = 0
+        for text in dict.fromkeys(texts):  # de-duplicate, keep order
+            if not text or self.get(text, source_language_code, target_language_code) is not None:
+                continue
+            translated_text = translate_fn(text, target_language_code)
+            if translated_text:
+                self.put(text, source_language_code, target_language_code, translated_text)
+                warmed += 1
+        return warmed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
@@ -1,50 +1,185 @@
-import tempfile
-from sarvamai import SarvamAI
-import os
-import dotenv
+import io
+import re
+import time
+import wave
+import contextvars
 import base64
-from pydub import AudioSegment
-from pydub.playback import play
+from concurrent.futures import ThreadPoolExecutor
 
-dotenv.load_dotenv()
+import http_client
+import tracing
+from audio_capture import get_sounddevice
+from prompt_bundle import load_prompt_bundle
 
-# Initialize the client once
-try:
-    client = SarvamAI(api_subscription_key=os.getenv("SARVAM_API_KEY"))
-except Exception as e:
-    client = None
-    print(f"[ERROR] Failed to initialize SarvamAI client: {e}")
+TTS_MODEL = 'bulbul:v2'
+TTS_SPEAKER = 'anushka'
+TTS_SAMPLE_RATE = 22050 # Every sentence is requested at one rate so they play through one output stream
+SENTENCE_MIN_CHARS = 20 # Shorter sentences are joined to the next: fewer requests, steadier prosody
+SYNTHESIS_LOOKAHEAD = 2 # Sentences synthesized concurrently while earlier ones play
+PLAYBACK_BLOCK_MS = 100 # PCM handed to the output stream per write
 
-def speak_text(text: str, language_code: str = 'en-IN'):
+SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
+
+def _get_client():
+    """The shared SDK client, built on first use (or by the startup warm-up); None if it cannot be."""
+    try:
+        return http_client.get_sarvam_client()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize SarvamAI client: {e}")
+        return None
+
+def synthesize_pcm(text: str, language_code: str = 'en-IN', sample_rate: int | None = None) -> tuple[bytes, int] | None:
     """
-    Converts text to speech for a given language and plays it.
+    Synthesizes text and returns (16-bit mono PCM bytes, sample rate), or None on failure.
     """
+    client = _get_client()
     if not client:
-        print("[ERROR] TTS client not initialized. Cannot speak.")
+        print("[ERROR] TTS client not initialized. Cannot synthesize.")
+        return None
+
+    options = {"speech_sample_rate": sample_rate} if sample_rate else {}
+    with tracing.span("tts", characters=len(text)) as span:
+        try:
+            response = client.text_to_speech.convert(
+                text=text,
+                target_language_code=language_code,
+                speaker=TTS_SPEAKER,
+                model=TTS_MODEL,
+                request_options=http_client.sdk_request_options(),
+                **options
+            )
+            wav_bytes = base64.b64decode(response.audios[0])
+            with wave.open(io.BytesIO(wav_bytes), 'rb') as wf:
+                if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                    span.tag(status="error")
+                    print("[ERROR] TTS returned audio that is not 16-bit mono PCM.")
+                    return None
+                return wf.readframes(wf.getnframes()), wf.getframerate()
+        except Exception as e:
+            span.tag(status="error")
+            print(f"[ERROR] An error occurred during speech synthesis: {e}")
+            return None
+
+def split_sentences(text: str, min_chars: int = SENTENCE_MIN_CHARS) -> list[str]:
+    """Splits text after sentence-ending punctuation, joining pieces shorter than `min_chars`."""
+    sentences = []
+    pending = ""
+    for piece in SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+def synthesize_sentences(text: str, language_code: str = 'en-IN', sample_rate: int = TTS_SAMPLE_RATE):
+    """
+    Yields (PCM bytes, sample rate) sentence by sentence, in order. Up to SYNTHESIS_LOOKAHEAD
+    sentences are synthesized at once, so later ones are ready while the first is playing.
+    Sentences that fail to synthesize are skipped.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) == 1:
+        audio = synthesize_pcm(text, language_code, sample_rate)
+        if audio:
+            yield audio
         return
+
+    pool = ThreadPoolExecutor(max_workers=SYNTHESIS_LOOKAHEAD, thread_name_prefix="tts")
+    try:
+        # Each job runs in a copy of the caller's context so its span keeps the trace tags
+        jobs = [pool.submit(contextvars.copy_context().run, synthesize_pcm, sentence, language_code, sample_rate)
+                for sentence in sentences]
+        for sentence, job in zip(sentences, jobs):
+            audio = job.result()
+            if audio:
+                yield audio
+            else:
+                print(f"[WARNING] Skipping sentence that could not be synthesized: '{sentence}'")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _open_output_stream(sample_rate: int):
+    sd = get_sounddevice()
+    stream = sd.RawOutputStream(samplerate=sample_rate, channels=1, dtype='int16')
+    stream.start()
+    return stream
+
+def stream_pcm(segments, started: float | None = None, open_stream=_open_output_stream) -> float | None:
+    """
+    Plays (16-bit mono PCM, sample rate) segments back to back through one output stream,
+    writing each as soon as it arrives. Returns the seconds from `started` (default: now)
+    until the first audio was handed to the device, or None if nothing was played.
+    """
+    started = started if started is not None else time.perf_counter()
+    first_audio = None
+    stream = None
+    stream_rate = None
+    try:
+        for pcm, sample_rate in segments:
+            if stream is not None and sample_rate != stream_rate:
+                stream.stop() # Drains what is queued before switching rates
+                stream.close()
+                stream = None
+            if stream is None:
+                stream = open_stream(sample_rate)
+                stream_rate = sample_rate
+            block_bytes = 2 * max(1, sample_rate * PLAYBACK_BLOCK_MS // 1000)
+            view = memoryview(pcm)
+            for offset in range(0, len(view), block_bytes):
+                stream.write(view[offset:offset + block_bytes]) # Blocks while the device buffer is full
+                if first_audio is None:
+                    first_audio = time.perf_counter() - started
+    finally:
+        if stream is not None:
+            stream.stop()
+            stream.close()
+    return first_audio
+
+def play_pcm(pcm, sample_rate: int):
+    """Plays 16-bit mono PCM (bytes or memoryview) without copying it."""
+    with tracing.span("playback"):
+        stream_pcm([(pcm, sample_rate)])
+
+def speak_text(text: str, language_code: str = 'en-IN', audio: tuple[bytes, int] | None = None):
+    """
+    Converts text to speech for a given language and plays it.
+    Prompts compiled into the prompt bundle, or already synthesized by the caller as
+    `audio` (PCM bytes, sample rate), are played directly without any network call.
+    Anything else is synthesized sentence by sentence and played as it arrives.
+    """
     if not text:
         print("[WARNING] speak_text called with empty string.")
         return
 
-    print(f"[INFO] Generating speech for text: '{text}' in language: {language_code}")
-    try:
-        response = client.text_to_speech.convert(
-            text=text,
-            target_language_code=language_code,
-            speaker = 'anushka',
-            model='bulbul:v2'
-        )
-
-        audio_bytes = base64.b64decode(response.audios[0])
+    if audio is None:
+        bundle = load_prompt_bundle()
+        audio = bundle.find_audio(language_code, text) if bundle else None
+    if audio is not None:
+        pcm, sample_rate = audio
+        print(f"[INFO] Playing pre-synthesized audio for text: '{text}' in language: {language_code}")
+        try:
+            play_pcm(pcm, sample_rate)
+        except Exception as e:
+            print(f"[ERROR] An error occurred during pre-synthesized audio playback: {e}")
+        return
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            temp_file.write(audio_bytes)
-            temp_path = temp_file.name
+    if not _get_client():
+        print("[ERROR] TTS client not initialized. Cannot speak.")
+        return
 
-        audio = AudioSegment.from_file(temp_path)
-        play(audio)
-        os.remove(temp_path)
+    print(f"[INFO] Generating speech for text: '{text}' in language: {language_code}")
+    started = time.perf_counter()
+    try:
+        with tracing.span("playback", streamed=True):
+            first_audio = stream_pcm(synthesize_sentences(text, language_code), started)
+        if first_audio is not None:
+            tracing.record("tts_first_audio", first_audio)
+            print(f"[INFO] Time to first audio: {first_audio * 1000:.0f} ms")
 
     except Exception as e:
         print(f"[ERROR] An error occurred during text-to-speech conversion or playback: {e}")
-
@@ -0,0 +1,219 @@
+"""
+Voice activity detection and endpointing for 16-bit mono audio.
+
+Audio is cut into short frames (20 ms by default) and per-frame features are computed for
+a whole block at once with NumPy. A small state machine on top turns frame decisions into
+`speech_start` / `speech_end` events with separately tunable start and end timeouts, a
+pre-roll window before the start and a hangover window after the end.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# --- Configuration ---
+FRAME_MS = 20
+START_SPEECH_MS = 60      # Voiced audio needed before speech is considered started
+END_SPEECH_MS = 600       # Silence needed after speech before the utterance is considered over
+PRE_ROLL_MS = 200         # Audio kept from before the detected start (soft word onsets)
+HANGOVER_MS = 150         # Audio kept after the last voiced frame (trailing consonants)
+SPEECH_MARGIN_DB = 12.0   # How far above the noise floor a frame must be to count as speech
+MIN_SPEECH_DB = 45.0      # Absolute floor, in dB relative to 1 LSB, so digital silence never triggers
+MAX_SPEECH_ZCR = 0.35     # Zero-crossing rate above which quiet frames are treated as hiss
+INITIAL_NOISE_DB = 50.0
+NOISE_FALL_RATE = 0.2     # Per-frame weight when the noise floor moves down
+NOISE_RISE_RATE = 0.005   # Per-frame weight when it moves up (~4 s time constant at 20 ms frames)
+NOISE_WINDOW_MS = 1000    # Recent audio the noise floor percentile is taken over, whatever the block size
+
+
+@dataclass
+class VadEvent:
+    """
+    A speech boundary. `sample` is the absolute stream index of the boundary, with pre-roll
+    or hangover applied; `detected_at` is the index at which the decision was made.
+    """
+    kind: str  # "speech_start" or "speech_end"
+    sample: int
+    detected_at: int
+
+
+def frame_features(frames: np.ndarray):
+    """Returns (energy in dB, zero-crossing rate) for an (n_frames, frame_len) int16 array."""
+    samples = frames.astype(np.float32)
+    energy_db = 10.0 * np.log10(np.mean(samples * samples, axis=1) + 1.0)
+    signs = np.signbit(samples)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+    return energy_db, zcr
+
+
+class AdaptiveVAD:
+    """
+    Energy + zero-crossing-rate detector with an adaptive noise floor.
+
+    Feed it audio of any block size with process(); it keeps the partial frame between
+    calls and returns the events found in that block.
+    """
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = FRAME_MS, start_ms: int = START_SPEECH_MS,
+                 end_ms: int = END_SPEECH_MS, pre_roll_ms: int = PRE_ROLL_MS, hangover_ms: int = HANGOVER_MS,
+                 margin_db: float = SPEECH_MARGIN_DB, min_speech_db: float = MIN_SPEECH_DB,
+                 max_zcr: float = MAX_SPEECH_ZCR, noise_window_ms: int = NOISE_WINDOW_MS):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.pre_roll_samples = sample_rate * pre_roll_ms // 1000
+        self.hangover_samples = sample_rate * hangover_ms // 1000
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.noise_window_frames = max(10, noise_window_ms // frame_ms)
+        self.reset()
+
+    @property
+    def lookback_samples(self) -> int:
+        """
+        How far before the current frame a speech_start can reach: the voiced run that
+        confirms the onset, the pre-roll before it, and one frame in progress. Buffers
+        holding audio before the start must keep at least this much.
+        """
+        return (self.start_frames + 1) * self.frame_len + self.pre_roll_samples
+
+    def reset(self):
+        self.noise_db = INITIAL_NOISE_DB
+        self._recent_db = np.zeros(0, dtype=np.float32)
+        self.in_speech = False
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._frames_seen = 0
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._last_voiced_end = 0
+        self.frames_processed = 0
+
+    def is_speech(self, energy_db: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        """Per-frame speech decision against the current noise floor."""
+        threshold = max(self.noise_db + self.margin_db, self.min_speech_db)
+        loud = energy_db > threshold
+        # Quiet, noise-like frames (high ZCR) are hiss unless they are clearly loud
+        return loud & ((zcr < self.max_zcr) | (energy_db > threshold + self.margin_db))
+
+    def _update_noise_floor(self, energy_db: np.ndarray, speech: np.ndarray):
+        """
+        Minimum-statistics style tracking, once per block: the floor drops quickly to the
+        quietest frames and rises slowly, so line noise is learned but speech is not. The
+        percentile is taken over the last NOISE_WINDOW_MS of non-speech frames rather than
+        the block alone, since a 20 ms block is a single frame. Until that window has filled
+        every frame counts, so a line louder than the initial floor is still learned.
+        """
+        if self._frames_seen >= self.noise_window_frames:
+            energy_db = energy_db[~speech]
+            if energy_db.size == 0:
+                return
+        self._recent_db = np.concatenate((self._recent_db, energy_db))[-self.noise_window_frames:]
+        k = self._recent_db.size // 10
+        quiet_db = float(np.partition(self._recent_db, k)[k]) # ~10th percentile of the window
+        rate = NOISE_FALL_RATE if quiet_db < self.noise_db else NOISE_RISE_RATE
+        weight = 1.0 - (1.0 - rate) ** energy_db.size
+        self.noise_db += weight * (quiet_db - self.noise_db)
+
+    def process(self, samples: np.ndarray) -> list:
+        """Processes a block of int16 samples (any length) and returns the VadEvents it produced."""
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+        n_frames = samples.size // self.frame_len
+        self._pending = samples[n_frames * self.frame_len:].copy()
+        if n_frames == 0:
+            return []
+
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energy_db, zcr = frame_features(frames)
+        speech = self.is_speech(energy_db, zcr)
+
+        self._update_noise_floor(energy_db, speech)
+
+        events = []
+        first_frame = self._frames_seen
+        for i, voiced in enumerate(speech.tolist()):
+            frame_index = first_frame + i
+            if voiced:
+                self._voiced_run += 1
+                self._silent_run = 0
+                self._last_voiced_end = (frame_index + 1) * self.frame_len
+                if not self.in_speech and self._voiced_run >= self.start_frames:
+                    self.in_speech = True
+                    onset = (frame_index + 1 - self._voiced_run) * self.frame_len
+                    events.append(VadEvent("speech_start", max(0, onset - self.pre_roll_samples), self._last_voiced_end))
+            else:
+                self._voiced_run = 0
+                if self.in_speech:
+                    self._silent_run += 1
+                    if self._silent_run >= self.end_frames:
+                        self.in_speech = False
+                        self._silent_run = 0
+                        events.append(VadEvent("speech_end", self._last_voiced_end + self.hangover_samples,
+                                               (frame_index + 1) * self.frame_len))
+
+        self._frames_seen += n_frames
+        self.frames_processed += n_frames
+        return events
+
+
+def speech_bounds(detector: AdaptiveVAD, samples: np.ndarray, block_ms: int = FRAME_MS) -> tuple | None:
+    """
+    Runs a fresh detector over a finished recording in live-sized blocks and returns the
+    (start, end) sample range from the first speech start to the last speech end, pre-roll
+    and hangover included, or None if it holds no speech.
+    """
+    samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+    block = max(1, detector.sample_rate * block_ms // 1000)
+    start = end = None
+    for offset in range(0, samples.size, block):
+        for event in detector.process(samples[offset:offset + block]):
+            if event.kind == "speech_start" and start is None:
+                start = event.sample
+            elif event.kind == "speech_end":
+                end = event.sample
+    if start is None:
+        return None
+    if detector.in_speech or end is None or end < start:
+        end = detector._last_voiced_end + detector.hangover_samples # Still speaking when the recording ends
+    return start, min(end, samples.size)
+
+
+class RmsThresholdVAD:
+    """
+    The original detector: one RMS value per block against a fixed threshold, with the
+    utterance ending after `pause_seconds` of quiet blocks. Kept for comparison.
+    """
+    def __init__(self, sample_rate: int = 16000, threshold: float = 2000, pause_seconds: float = 1.0, block_size: int = 8000):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.block_size = block_size
+        self.pause_blocks = int(pause_seconds * sample_rate / block_size)
+        self.reset()
+
+    def reset(self):
+        self.in_speech = False
+        self._silent_blocks = 0
+        self._samples_seen = 0
+        self._last_voiced_end = 0
+        self.frames_processed = 0
+
+    def process(self, samples: np.ndarray) -> list:
+        samples = np.asarray(samples).reshape(-1)
+        start = self._samples_seen
+        self._samples_seen += samples.size
+        self.frames_processed += 1
+        events = []
+        if np.sqrt(np.mean(samples.astype(np.float64) ** 2)) > self.threshold:
+            if not self.in_speech:
+                self.in_speech = True
+                events.append(VadEvent("speech_start", start, self._samples_seen))
+            self._silent_blocks = 0
+            self._last_voiced_end = self._samples_seen
+        elif self.in_speech:
+            self._silent_blocks += 1
+            if self._silent_blocks > self.pause_blocks:
+                self.in_speech = False
+                self._silent_blocks = 0
+                events.append(VadEvent("speech_end", self._last_voiced_end, self._samples_seen))
+        return events
@@ -0,0 +1,249 @@
+"""
+Cache of LLM validation results, so answers callers give again and again ("graduate",
+"12th pass", "driver", "10 km") are validated without a round trip to the chat API.
+
+Entries are keyed on (step key, prompt version, normalized utterance). The prompt version
+is a hash of the step's validation prompt, so editing a prompt invalidates its old
+results automatically. Utterances are compared ignoring case, punctuation and spacing.
+The cache stores the raw LLM verdict ({"status": "true", "value": "Graduate", ...}, or
+"true: Graduate" for seeded entries); the caller still parses and range-checks it, so
+rules that depend on earlier answers keep applying.
+
+Pre-seed it from the stored submissions (including migrated db.json records) with:
+
+    python validation_cache.py --seed
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import config # Loads .env before the settings below are read
+
+# --- Configuration ---
+CACHE_DB_FILE = os.getenv("VALIDATION_CACHE_FILE", "validation_cache.sqlite3") # Empty: memory only
+MAX_MEMORY_ENTRIES = 2048
+MAX_DISK_ENTRIES = 50000
+SEED_MIN_OCCURRENCES = 2 # A stored answer must appear this often to be pre-seeded
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercases, turns punctuation into spaces and collapses whitespace ("12th Pass." -> "12th pass")."""
+    # Only punctuation is dropped: vowel signs of Indic scripts are combining marks and must stay
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text.casefold())
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=64)
+def prompt_version(prompt: str) -> str:
+    """Short hash of a validation prompt, ignoring indentation changes."""
+    return hashlib.sha1(" ".join(prompt.split()).encode("utf-8")).hexdigest()[:12]
+
+
+class ValidationCache:
+    """
+    LRU cache of validation replies in memory, backed by an SQLite file that survives restarts.
+
+    The first lookup for a step under a new prompt version deletes the step's entries
+    made with older prompts from disk.
+    """
+    def __init__(self, db_path: Optional[str] = CACHE_DB_FILE, max_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict() # (step, version, utterance) -> reply
+        self._current_versions = {} # step -> prompt version seen in this process
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.invalidated = 0
+
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS validations ("
+                    " step TEXT NOT NULL, prompt_version TEXT NOT NULL, utterance TEXT NOT NULL,"
+                    " reply TEXT NOT NULL, created_at REAL NOT NULL,"
+                    " PRIMARY KEY (step, prompt_version, utterance))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARNING] Validation cache disk store unavailable, using memory only: {e}")
+                self._db = None
+
+    def _use_version(self, step: str, version: str):
+        """Drops entries made with other prompt versions the first time a step's version is seen."""
+        if self._current_versions.get(step) == version:
+            return
+        self._current_versions[step] = version
+        stale = [key for key in self._memory if key[0] == step and key[1] != version]
+        for key in stale:
+            del self._memory[key]
+        self.invalidated += len(stale)
+        if self._db is not None:
+            try:
+                cursor = self._db.execute("DELETE FROM validations WHERE step = ? AND prompt_version != ?", (step, version))
+                self._db.commit()
+                self.invalidated += cursor.rowcount
+            except sqlite3.Error as e:
+                print(f"[WARNING] Could not drop stale validation cache entries: {e}")
+
+    def get(self, step: str, version: str, text: str) -> Optional[str]:
+        """Returns the cached reply for the utterance, or None on a miss."""
+        utterance = normalize_utterance(text)
+        if not utterance:
+            return None
+        key = (step, version, utterance)
+        with self._lock:
+            self._use_version(step, version)
+            reply = self._memory.get(key)
+            if reply is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return reply
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT reply FROM validations WHERE step = ? AND prompt_version = ? AND utterance = ?", key
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, step: str, version: str, text: str, reply: str):
+        """Stores a validation reply in memory and on disk."""
+        self.put_many(step, version, [(text, reply)])
+
+    def put_many(self, step: str, version: str, entries: Iterable[tuple], replace: bool = True) -> int:
+        """Stores (utterance, reply) pairs in one transaction; returns how many were new or replaced."""
+        created_at = time.time()
+        stored = 0
+        with self._lock:
+            self._use_version(step, version)
+            rows = []
+            for text, reply in entries:
+                utterance = normalize_utterance(text)
+                if not utterance:
+                    continue
+                key = (step, version, utterance)
+                if not replace and (key in self._memory or self._on_disk(key)):
+                    continue
+                self._remember(key, reply)
+                rows.append((step, version, utterance, reply, created_at))
+                stored += 1
+            if self._db is None or not rows:
+                return stored
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO validations VALUES (?, ?, ?, ?, ?)", rows)
+                self._trim_disk()
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARNING] Could not persist validation results to cache: {e}")
+        return stored
+
+    def _on_disk(self, key) -> bool:
+        if self._db is None:
+            return False
+        return self._db.execute(
+            "SELECT 1 FROM validations WHERE step = ? AND prompt_version = ? AND utterance = ?", key
+        ).fetchone() is not None
+
+    def _remember(self, key, reply: str):
+        self._memory[key] = reply
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _trim_disk(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM validations").fetchone()
+        if count > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM validations WHERE rowid IN"
+                " (SELECT rowid FROM validations ORDER BY created_at LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
+
+    def seed(self, records: Iterable[dict], prompts: dict, fields: dict,
+             min_occurrences: int = SEED_MIN_OCCURRENCES) -> int:
+        """
+        Pre-seeds accepted answers from stored submissions.
+
+        `prompts` maps step keys to their validation prompt and `fields` maps them to the
+        submission field holding the normalized answer. Every value seen at least
+        `min_occurrences` times is cached as its own `true: <value>` reply, so a caller who
+        says it the same way skips the LLM. Existing entries are kept. Returns the number added.
+        """
+        counts = {step: Counter() for step in prompts}
+        for record in records:
+            for step in prompts:
+                value = record.get(fields[step])
+                if isinstance(value, str) and value.strip():
+                    counts[step][value.strip()] += 1
+
+        seeded = 0
+        for step, prompt in prompts.items():
+            common = [(value, f"true: {value}") for value, count in counts[step].items() if count >= min_occurrences]
+            seeded += self.put_many(step, prompt_version(prompt), common, replace=False)
+        return seeded
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "invalidated": self.invalidated,
+                "memory_entries": len(self._memory),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM validations")
+                self._db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the LLM validation result cache.")
+    parser.add_argument("--seed", action="store_true", help="Pre-seed common answers from the stored submissions.")
+    parser.add_argument("--from", dest="source", help="Seed from this JSON array file (e.g. an old db.json) instead.")
+    parser.add_argument("--min-occurrences", type=int, default=SEED_MIN_OCCURRENCES)
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result first.")
+    args = parser.parse_args()
+
+    import json
+    from conversation_manager import ConversationManager, validation_cache
+
+    if args.clear:
+        validation_cache.clear()
+        print("[INFO] Validation cache cleared.")
+    if args.seed or args.source:
+        conversation = ConversationManager()
+        if args.source:
+            with open(args.source, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        else:
+            records = conversation.submission_store.records()
+        seeded = conversation.seed_validation_cache(records, args.min_occurrences)
+        print(f"[INFO] Seeded {seeded} validation result(s).")
+    print(f"[INFO] Validation cache stats: {validation_cache.stats()}")